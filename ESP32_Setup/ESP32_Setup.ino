@@ -1,5 +1,6 @@
 #include <WiFi.h>
 #include <WebServer.h>
+#include <HTTPClient.h>
 
 // WiFi Configuration - Update with your network credentials
 const char* ssid = "EXIREN";
@@ -9,6 +10,27 @@ const char* password = "say my name";
 const int tempPin = 34;   // LM35 temperature sensor (analog input)
 const int smokePin = 35;  // MQ-2 smoke sensor (analog input)
 
+// Push Configuration - leave serverUrl empty to only answer requests (pull mode)
+const char* serverUrl = "";  // e.g. "http://192.168.1.10:5000/api/ingest"
+const char* nodeId = "default";  // Node ID on the server ("default" is the settings node)
+const unsigned long sampleIntervalMs = 1000;  // Time between samples
+const unsigned long pushIntervalMs = 2000;    // Time between batches
+const int maxPending = 60;  // Unacknowledged samples kept while the server is unreachable
+
+struct Sample {
+  unsigned long seq;
+  unsigned long t;  // millis() when taken
+  int smoke;
+  float temperature;
+};
+
+Sample pending[maxPending];
+int pendingCount = 0;
+unsigned long nextSeq = 1;
+String bootId;  // Sequence numbers restart with every boot
+unsigned long lastSampleAt = 0;
+unsigned long lastPushAt = 0;
+
 // Create web server instance
 WebServer server(80);
 
@@ -37,17 +59,105 @@ void setup() {
   // Start the web server
   server.begin();
   Serial.println("HTTP server started successfully!");
+
+  bootId = String(esp_random(), HEX);
 }
 
 void loop() {
   server.handleClient();  // Handle incoming HTTP requests
+
+  if (strlen(serverUrl) > 0) {
+    unsigned long now = millis();
+    if (now - lastSampleAt >= sampleIntervalMs) {
+      lastSampleAt = now;
+      recordSample();
+    }
+    if (pendingCount > 0 && now - lastPushAt >= pushIntervalMs) {
+      lastPushAt = now;
+      pushSamples();
+    }
+  }
+}
+
+int readSmoke() {
+  return analogRead(smokePin);
+}
+
+float readTemperature() {
+  long sum = 0;
+  int validReadings = 0;
+
+  // Take multiple readings for accuracy
+  for(int i = 0; i < 10; i++){
+    int tempRaw = analogRead(tempPin);
+    if (tempRaw > 0) {
+      sum += tempRaw;
+      validReadings++;
+    }
+    delayMicroseconds(100);
+  }
+
+  // Convert to Celsius: (ADC_value * 3.3V / 4095) * 100
+  float temperature = 0;
+  if (validReadings > 0) {
+    temperature = (sum / (float)validReadings * 3.3 / 4095.0) * 100.0;
+  }
+  return temperature;
+}
+
+void recordSample() {
+  if (pendingCount == maxPending) {
+    // Server unreachable for too long: drop the oldest sample
+    for (int i = 1; i < maxPending; i++) {
+      pending[i - 1] = pending[i];
+    }
+    pendingCount--;
+  }
+  pending[pendingCount++] = {nextSeq++, millis(), readSmoke(), readTemperature()};
+}
+
+// POST all unacknowledged samples to /api/ingest. The server acknowledges
+// the highest sequence number it has, so samples are kept until then and
+// re-sending after a lost reply is harmless.
+void pushSamples() {
+  String body = "{\"node_id\":\"" + String(nodeId) + "\",\"boot_id\":\"" + bootId +
+                "\",\"ip\":\"" + WiFi.localIP().toString() +
+                "\",\"sent_at\":" + String(millis() / 1000.0, 3) + ",\"samples\":[";
+  for (int i = 0; i < pendingCount; i++) {
+    if (i > 0) body += ",";
+    body += "{\"seq\":" + String(pending[i].seq) +
+            ",\"t\":" + String(pending[i].t / 1000.0, 3) +
+            ",\"smoke\":" + String(pending[i].smoke) +
+            ",\"temperature\":" + String(pending[i].temperature) + "}";
+  }
+  body += "]}";
+
+  HTTPClient http;
+  http.begin(serverUrl);
+  http.addHeader("Content-Type", "application/json");
+  int code = http.POST(body);
+  if (code == 200) {
+    String response = http.getString();
+    int at = response.indexOf("\"ack\":");
+    if (at >= 0) {
+      unsigned long ack = response.substring(at + 6).toInt();
+      int kept = 0;
+      for (int i = 0; i < pendingCount; i++) {
+        if (pending[i].seq > ack) pending[kept++] = pending[i];
+      }
+      pendingCount = kept;
+    }
+  } else {
+    Serial.println("Push failed: " + String(code));
+  }
+  http.end();
 }
 
 void setupWebEndpoints() {
   // Endpoint: GET /smoke
   // Returns current smoke sensor reading (0-4095)
   server.on("/smoke", HTTP_GET, [](){
-    int smokeLevel = analogRead(smokePin);
+    int smokeLevel = readSmoke();
     server.send(200, "application/json", String(smokeLevel));
     Serial.println("Smoke level requested: " + String(smokeLevel));
   });
@@ -55,25 +165,7 @@ void setupWebEndpoints() {
   // Endpoint: GET /temperature  
   // Returns averaged temperature reading in Celsius
   server.on("/temperature", HTTP_GET, [](){
-    long sum = 0;
-    int validReadings = 0;
-    
-    // Take multiple readings for accuracy
-    for(int i = 0; i < 10; i++){
-      int tempRaw = analogRead(tempPin);
-      if (tempRaw > 0) {
-        sum += tempRaw;
-        validReadings++;
-      }
-      delayMicroseconds(100);
-    }
-    
-    // Convert to Celsius: (ADC_value * 3.3V / 4095) * 100
-    float temperature = 0;
-    if (validReadings > 0) {
-      temperature = (sum / (float)validReadings * 3.3 / 4095.0) * 100.0;
-    }
-    
+    float temperature = readTemperature();
     server.send(200, "application/json", String(temperature));
     Serial.println("Temperature requested: " + String(temperature) + "°C");
   });
@@ -0,0 +1,214 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from sensor_nodes import REQUEST_ERRORS, REQUEST_SECONDS
+
+# Alarm Dispatch Configuration Parameters
+ALARM_DEADLINE = 3.0  # Seconds every actuator has to acknowledge a command
+ATTEMPT_TIMEOUT = 1.0  # Per-request timeout (seconds); failed attempts are retried
+RETRY_DELAY = 0.1  # First delay (seconds) between attempts, doubled per retry
+DISPATCH_WORKERS = 32  # Concurrent actuator requests and pooled connections
+
+ACTUATION_SECONDS = metrics.histogram(
+    "alarm_actuation_seconds",
+    "Time from an alarm command to an actuator's acknowledgement",
+    ["command"],
+)
+ACTUATION_FAILURES = metrics.counter(
+    "alarm_actuation_failures_total",
+    "Actuators that did not acknowledge an alarm command",
+    ["command"],
+)
+
+
+class ActuatorState:
+    """How one actuator has answered one alarm command."""
+
+    def __init__(self, node_id):
+        self.node_id = node_id
+        self.state = "pending"  # Then "acknowledged", "failed" or "superseded"
+        self.attempts = 0
+        self.latency = None  # Seconds from dispatch to acknowledgement
+        self.error = None  # Last failure, e.g. "HTTP 503" or "ConnectTimeout"
+
+    def to_dict(self):
+        return {
+            "node_id": self.node_id,
+            "state": self.state,
+            "attempts": self.attempts,
+            "latency": None if self.latency is None else round(self.latency, 3),
+            "error": self.error,
+        }
+
+
+class AlarmDispatch:
+    """One alarm command sent to every actuator, and each one's acknowledgement."""
+
+    def __init__(self, command, node_ids, deadline=ALARM_DEADLINE):
+        self.command = command  # "trigger_alarm" or "stop_alarm"
+        self.started = time.monotonic()
+        self.deadline = self.started + deadline
+        self.actuators = {node_id: ActuatorState(node_id) for node_id in node_ids}
+        self.superseded = threading.Event()  # Set when a newer command is sent
+        self._pending = len(self.actuators)
+        self._cond = threading.Condition()
+
+    def finish(self, node_id, state, latency=None):
+        with self._cond:
+            actuator = self.actuators[node_id]
+            actuator.state = state
+            actuator.latency = latency
+            self._pending -= 1
+            self._cond.notify_all()
+
+    def acknowledged(self):
+        with self._cond:
+            return [
+                a.node_id for a in self.actuators.values() if a.state == "acknowledged"
+            ]
+
+    def unacknowledged(self):
+        with self._cond:
+            return [
+                a.node_id for a in self.actuators.values() if a.state != "acknowledged"
+            ]
+
+    def wait_first(self):
+        """
+        Block until an actuator acknowledges or every one has given up.
+
+        Returns:
+            bool: True if at least one actuator acknowledged
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._pending == 0
+                or any(a.state == "acknowledged" for a in self.actuators.values())
+            )
+        return bool(self.acknowledged())
+
+    def wait(self):
+        """Block until every actuator has acknowledged or given up."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending == 0)
+
+    def to_dict(self):
+        with self._cond:
+            latencies = [
+                a.latency for a in self.actuators.values() if a.state == "acknowledged"
+            ]
+            done = self._pending == 0
+            return {
+                "command": self.command,
+                "acknowledged": len(latencies),
+                "actuators": len(self.actuators),
+                "complete": done,
+                "first_ack": round(min(latencies), 3) if latencies else None,
+                # Only meaningful once every actuator has acknowledged
+                "all_ack": (
+                    round(max(latencies), 3)
+                    if done and len(latencies) == len(self.actuators)
+                    else None
+                ),
+                "states": [a.to_dict() for a in self.actuators.values()],
+            }
+
+
+class AlarmDispatcher:
+    """
+    Sends alarm commands to every actuator node at once.
+
+    Each actuator is retried with exponential backoff until it acknowledges
+    (any 2xx reply) or the dispatch deadline passes, so one dead siren
+    neither delays the others nor stops the command from reaching them.
+    A newer command supersedes the retries of an older one, and commands
+    to the same actuator never overlap, so a late "trigger" retry cannot
+    land after a "stop".
+    """
+
+    def __init__(self, registry, deadline=ALARM_DEADLINE, max_workers=DISPATCH_WORKERS):
+        self.registry = registry
+        self.deadline = deadline
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="alarm-dispatch"
+        )
+        self.current = None  # The most recent AlarmDispatch
+        self._node_locks = {}
+        self._lock = threading.Lock()
+
+    def actuators(self):
+        """Nodes that take alarm commands (push-only nodes have no address)."""
+        return [
+            node
+            for node in self.registry.nodes()
+            if node.ip is not None and "alarm" in node.roles
+        ]
+
+    def dispatch(self, command):
+        """
+        Send ``command`` to every actuator without waiting for replies.
+
+        Returns:
+            AlarmDispatch: Tracks each actuator's acknowledgement
+        """
+        nodes = self.actuators()
+        dispatch = AlarmDispatch(
+            command, [node.node_id for node in nodes], self.deadline
+        )
+        with self._lock:
+            if self.current is not None:
+                self.current.superseded.set()
+            self.current = dispatch
+        for node in nodes:
+            self.executor.submit(self._actuate, dispatch, node)
+        return dispatch
+
+    def _node_lock(self, node_id):
+        with self._lock:
+            return self._node_locks.setdefault(node_id, threading.Lock())
+
+    def _actuate(self, dispatch, node):
+        actuator = dispatch.actuators[node.node_id]
+        delay = RETRY_DELAY
+        with self._node_lock(node.node_id):
+            while True:
+                if dispatch.superseded.is_set():
+                    dispatch.finish(node.node_id, "superseded")
+                    return
+                remaining = dispatch.deadline - time.monotonic()
+                if remaining <= 0:
+                    ACTUATION_FAILURES.inc(command=dispatch.command)
+                    dispatch.finish(node.node_id, "failed")
+                    return
+
+                actuator.attempts += 1
+                start = time.perf_counter()
+                try:
+                    response = self.session.post(
+                        node.url(dispatch.command),
+                        timeout=min(ATTEMPT_TIMEOUT, remaining),
+                    )
+                    REQUEST_SECONDS.observe(
+                        time.perf_counter() - start, endpoint=dispatch.command
+                    )
+                    if response.ok:
+                        latency = time.monotonic() - dispatch.started
+                        ACTUATION_SECONDS.observe(latency, command=dispatch.command)
+                        dispatch.finish(node.node_id, "acknowledged", latency)
+                        return
+                    actuator.error = f"HTTP {response.status_code}"
+                except requests.exceptions.RequestException as e:
+                    actuator.error = type(e).__name__
+                REQUEST_ERRORS.inc(endpoint=dispatch.command)
+
+                remaining = dispatch.deadline - time.monotonic()
+                dispatch.superseded.wait(max(0.0, min(delay, remaining)))
+                delay *= 2
@@ -1,27 +1,110 @@
+import os
+
+# Async server mode. The cooperative modes patch the standard library before
+# anything else is imported, so sockets, sleeps and the monitoring loops'
+# waits all yield to the event loop.
+ASYNC_MODE = os.environ.get(
+    "ASYNC_MODE", "threading"
+)  # "threading" (development server), "eventlet" or "gevent"
+if ASYNC_MODE == "eventlet":
+    import eventlet
+
+    eventlet.monkey_patch()
+elif ASYNC_MODE == "gevent":
+    from gevent import monkey
+
+    monkey.patch_all()
+
 from flask import Flask, render_template, jsonify, request, Response
 from flask_socketio import SocketIO, emit
 import cv2
 import time
-import requests
 import threading
-import base64
 import json
-from ultralytics import YOLO
+import atexit
+import math
+import sys
 from datetime import datetime
-import os
+from alarm_dispatch import AlarmDispatcher
+from broadcast import StatusBroadcaster
+from camera_capture import CaptureService
+from evidence_writer import EVIDENCE_DIR, EvidenceRecorder
+import numpy as np
+from history_store import HistoryStore
+from incidents import Incident, IncidentLog
+from inference_backends import IMAGE_SIZE, class_ids, filter_detections, load_backend
+from inference_engine import BatchInferenceEngine
+from inference_pool import InferencePool
+from latency_scheduler import INPUT_SIZES, LatencyScheduler
+import metrics
+from pipeline import (
+    CLEARED_PAUSE,
+    DETECTION_CONFIDENCE,
+    FIRE_CHECK_DURATION,
+    FIRE_CLASSES,
+    SMOKE_THRESHOLD,
+    TEMP_CHECK_ATTEMPTS,
+    TEMP_CHECK_INTERVAL,
+    TEMP_THRESHOLD,
+    SmokeStage,
+    temperature_confirms,
+)
+from prefilter import FramePrefilter
+from state_backend import create_backend
+from sensor_nodes import NODE_ROLES, NODE_TIMEOUT, NodeRegistry, SensorPoller
+from streaming import MJPEG_BOUNDARY, FrameBroadcaster
+from tiling import TiledDetector
 
 # Initialize Flask application and WebSocket support
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "fire_detection_secret_key"
-socketio = SocketIO(app, cors_allowed_origins="*")
 
 # System Configuration Parameters
+# Detection thresholds and stage timings are in pipeline.py, shared with replay
 ESP_IP = "192.168.2.131"  # Default ESP32 IP address (configurable via web interface)
-SMOKE_THRESHOLD = 2600  # Emperically determined; Demo value for prototype
-TEMP_THRESHOLD = 20  # Emperically determined; Demo value for prototype
-FIRE_CHECK_DURATION = 20  # Duration (seconds); Demo value for prototype
-TEMP_CHECK_INTERVAL = 1  # Interval (seconds) between temperature checks
-TEMP_CHECK_ATTEMPTS = 20  # Number of temperature checks for confirmation
+LATENCY_BUDGET = 0.5  # Target seconds from capture to processed frame in verification
+CAMERA_OPEN_TIMEOUT = 5  # Seconds to wait for the verification camera's first frame
+CAMERA_INDEX = 0  # Camera device index, video file, or "synthetic://fire" test feed
+CAMERA_ALWAYS_WARM = False  # Keep cameras open while monitoring (faster verification)
+CAMERA_SOURCES = {
+    "camera_0": CAMERA_INDEX
+}  # Cameras used when CAMERA_ALWAYS_WARM is set
+INFERENCE_BATCH_SIZE = 8  # Maximum frames per batched model call
+INFERENCE_MAX_WAIT = 0.05  # Seconds to wait for more cameras before a partial batch
+INFERENCE_BACKEND = (
+    "pytorch"  # "pytorch", "onnx", "onnx-int8", "openvino" or "openvino-int8"
+)
+INFERENCE_WORKERS = 0  # Model processes (0 = run the model in the web process)
+INFERENCE_THREADS_PER_WORKER = 1  # Runtime threads per model process
+PREFILTER_ENABLED = True  # Skip model calls on frames without motion or flame colours
+MODEL_WARMUP_RUNS = (
+    2  # Dummy inferences per input size before the model counts as ready
+)
+TILED_INFERENCE = False  # Run high-resolution cameras as tiles around activity
+
+# Deployment Configuration Parameters (overridable per process from the environment)
+STATE_BACKEND = os.environ.get(
+    "STATE_BACKEND", "local"
+)  # "local" (one server process) or "file://<dir>" shared by several
+SOCKETIO_MESSAGE_QUEUE = os.environ.get(
+    "SOCKETIO_MESSAGE_QUEUE"
+)  # e.g. "redis://localhost:6379/0" to fan events out across processes
+RUN_ENGINE = (
+    os.environ.get("RUN_ENGINE", "1") != "0"
+)  # Contend to run this site's monitoring engine (0 = web tier only)
+ENGINE_SYNC_INTERVAL = 1  # Seconds between engine checks of the shared state
+ENGINE_STANDBY_RETRY = 5  # Seconds between a standby's attempts to take over
+STREAM_PORT = int(
+    os.environ.get("STREAM_PORT", "5001")
+)  # Port an --engine-only process serves the live video on
+
+# WebSocket events from any process reach every dashboard through the queue
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode=ASYNC_MODE,
+    message_queue=SOCKETIO_MESSAGE_QUEUE,
+)
 
 # Global system state variables
 monitoring_active = False
@@ -37,13 +120,160 @@ current_status = {
     "stage_description": "System is idle",  # Human-readable stage description
 }
 
-# Load pre-trained YOLO model for fire detection
-try:
-    model = YOLO("YOLOv11n_custom_fire.pt")
-    print("✅ YOLO fire detection model loaded successfully!")
-except Exception as e:
-    print(f"Error loading YOLO model: {e}")
-    model = None
+
+def run_native(function, *args, **kwargs):
+    """
+    Run a long native call on a real OS thread in the cooperative modes, so
+    the event loop keeps serving dashboards while it runs.
+    """
+    if ASYNC_MODE == "eventlet":
+        from eventlet import tpool
+
+        return tpool.execute(function, *args, **kwargs)
+    if ASYNC_MODE == "gevent":
+        import gevent
+
+        return gevent.get_hub().threadpool.apply(function, args, kwargs)
+    return function(*args, **kwargs)
+
+
+class NativeThreadModel:
+    """Loaded backend whose ``predict`` calls go through ``run_native``."""
+
+    def __init__(self, model):
+        self.model = model
+        self.name = model.name
+        self.names = model.names
+
+    def predict(self, *args, **kwargs):
+        return run_native(self.model.predict, *args, **kwargs)
+
+
+# Status, settings and commands shared with the other server processes
+shared_state = create_backend(STATE_BACKEND)
+engine_lock_held = False  # True in the one process running the engine
+published_health = None  # Engine health last published to the other processes
+
+# Optional inference worker processes, started from a fork server
+inference_pool = None
+if INFERENCE_WORKERS and ASYNC_MODE != "threading":
+    print("INFERENCE_WORKERS needs ASYNC_MODE=threading; running the model in-process")
+elif INFERENCE_WORKERS and RUN_ENGINE:
+    inference_pool = InferencePool(
+        INFERENCE_BACKEND,
+        workers=INFERENCE_WORKERS,
+        threads=INFERENCE_THREADS_PER_WORKER,
+    )
+    inference_pool.start()
+
+# Coalesced, delta-encoded status and log broadcasting
+broadcaster = StatusBroadcaster(socketio, current_status, store=shared_state)
+broadcaster.start()
+
+# Registry of ESP32 sensor nodes; the configured ESP_IP is the "default" node
+node_registry = NodeRegistry()
+node_registry.add("default", ESP_IP)
+sensor_poller = SensorPoller(node_registry)
+
+# Sends alarm commands to every node with the "alarm" role in parallel
+alarm_dispatcher = AlarmDispatcher(node_registry)
+
+# Per-node sensor history (ring buffers flushed to append-only files)
+history_store = HistoryStore()
+history_store.start()
+
+# Background evidence writer with a rolling pre-event frame buffer
+evidence_recorder = EvidenceRecorder(
+    on_saved=lambda info: broadcaster.log(
+        f"Evidence clip saved: {info['clip']} ({info['frames']} frames)", "success"
+    ),
+    blocking_call=run_native,
+)
+evidence_recorder.start()
+
+# Optional always-warm cameras; started with monitoring when CAMERA_ALWAYS_WARM is set
+capture_services = {}
+if CAMERA_ALWAYS_WARM:
+    capture_services = {
+        camera_id: CaptureService(source, blocking_call=run_native)
+        for camera_id, source in CAMERA_SOURCES.items()
+    }
+
+
+def record_encode(camera_id, seconds):
+    """Feed the encode time of single-camera verification frames to its scheduler."""
+    if camera_id is None:  # Warm cameras publish under their own ID
+        inference_scheduler.observe_encode(seconds)
+
+
+# Shares processed frames with dashboards (binary Socket.IO and MJPEG)
+frame_broadcaster = FrameBroadcaster(blocking_call=run_native, on_encoded=record_encode)
+frame_broadcaster.attach_socketio(socketio)
+frame_broadcaster.start()
+
+# The YOLO fire detection model is loaded and warmed up in the background
+# (see load_model); until then the pipeline runs on its sensors alone.
+# Web-tier processes never run the pipeline and do not load it at all.
+model = None
+fire_class_ids = np.empty(0, int)  # Resolved once so post-processing is array work
+model_state = {
+    "status": (
+        "loading" if RUN_ENGINE else "disabled"
+    ),  # Then "warming", "ready" or "failed"
+    "error": None,
+    "load_seconds": None,  # From process start until the model was ready
+}
+process_started_at = time.monotonic()
+NO_DETECTIONS = (
+    np.empty((0, 4), np.float32),
+    np.empty(0, np.float32),
+    np.empty(0, int),
+)
+
+# Paces single-camera verification to LATENCY_BUDGET. Only the in-process
+# PyTorch model takes a new input size per call; exported graphs are fixed.
+inference_scheduler = LatencyScheduler(
+    LATENCY_BUDGET,
+    input_sizes=(
+        INPUT_SIZES
+        if INFERENCE_BACKEND == "pytorch"
+        and inference_pool is None
+        and not TILED_INFERENCE
+        else (IMAGE_SIZE,)
+    ),
+)
+
+# Scrape-time metrics for queues and drop counters kept by the components
+metrics.gauge(
+    "evidence_queue_depth", "Evidence clips waiting to be written"
+).set_function(evidence_recorder.queue_depth)
+metrics.counter(
+    "evidence_clips_dropped_total", "Confirmations not recorded (writer busy)"
+).set_function(lambda: evidence_recorder.dropped)
+metrics.counter(
+    "log_lines_dropped_total", "Log lines dropped from oversized batches"
+).set_function(lambda: broadcaster.dropped_logs)
+stream_clients_gauge = metrics.gauge(
+    "stream_clients", "Dashboards receiving the video stream", ["transport"]
+)
+for transport in ("socket", "mjpeg"):
+    stream_clients_gauge.set_function(
+        lambda transport=transport: frame_broadcaster.viewer_count(transport),
+        transport=transport,
+    )
+schedule_gauge = metrics.gauge(
+    "inference_schedule",
+    "Camera verification settings chosen by the latency scheduler",
+    ["setting"],
+)
+for setting in ("input_size", "inference_fps", "stream_fps", "latency_ms"):
+    schedule_gauge.set_function(
+        lambda setting=setting: inference_scheduler.to_dict()[setting] or 0,
+        setting=setting,
+    )
+STAGE_SECONDS = metrics.counter(
+    "monitoring_stage_seconds_total", "Time spent in each monitoring stage", ["stage"]
+)
 
 
 class FireDetectionSystem:
@@ -59,185 +289,438 @@ class FireDetectionSystem:
         self.cap = None  # OpenCV camera capture object
         self.monitoring = False  # System monitoring state
         self.current_stage = "idle"  # Current detection pipeline stage
+        self.smoke_stage = SmokeStage()  # Escalation and pacing of smoke checks
+        self.smoke_escalation = None  # (node_id, reason) from the last sweep
+        self.pushed_escalation = None  # (node_id, reason) from pushed samples
+        self.push_lock = threading.Lock()
 
     def get_smoke_level(self):
         """
-        Retrieve current smoke level from ESP32 smoke sensor.
+        Retrieve current smoke level from all registered ESP32 smoke sensors.
+
+        Nodes in pull mode are read concurrently; nodes that push their
+        readings contribute their latest sample. The highest reading is
+        returned. Every reading also feeds the node's trend detector, which
+        decides whether the smoke stage escalates (see ``smoke_escalation``).
 
         Returns:
-            int: Smoke level in ppm, or None if ESP32 is unreachable
+            int: Highest smoke level in ppm, or None if no node is reachable
         """
-        try:
-            response = requests.get(f"http://{ESP_IP}/smoke", timeout=2)
-            if response.status_code == 200:
-                current_status["esp32_status"] = "online"
-                return response.json()
-            current_status["esp32_status"] = "offline"
-            return None
-        except requests.exceptions.RequestException as e:
-            current_status["esp32_status"] = "offline"
+        readings = sensor_poller.sweep("smoke")
+        current_status["esp32_status"] = (
+            "online" if sensor_poller.any_online() else "offline"
+        )
+        for node_id, value in readings.items():
+            history_store.append(node_id, smoke=value)
+        self.smoke_escalation = self.smoke_stage.update(
+            readings, time.monotonic(), SMOKE_THRESHOLD
+        )
+        pushed_escalation = self.take_pushed_escalation()
+        if self.smoke_escalation is None:
+            self.smoke_escalation = pushed_escalation
+
+        readings.update(sensor_poller.pushed("smoke"))
+        if not readings:
             return None
+        return max(readings.values())
 
     def get_temperature(self):
         """
-        Retrieve current temperature from ESP32 temperature sensor.
+        Retrieve current temperature from all registered ESP32 sensors.
 
         Returns:
-            float: Temperature in Celsius, or None if ESP32 is unreachable
+            float: Highest temperature in Celsius, or None if no node is reachable
         """
-        try:
-            response = requests.get(f"http://{ESP_IP}/temperature", timeout=2)
-            if response.status_code == 200:
-                return response.json()
-            return None
-        except requests.exceptions.RequestException as e:
+        readings = sensor_poller.sweep("temperature")
+        for node_id, value in readings.items():
+            history_store.append(node_id, temperature=value)
+        readings.update(sensor_poller.pushed("temperature"))
+        if not readings:
             return None
+        return max(readings.values())
+
+    def ingest(self, node_id, samples, ip=None, boot_id=None, sent_at=None):
+        """
+        Apply one batch of readings pushed by a node, on arrival.
+
+        Samples already accepted (by sequence number) are dropped. The rest
+        are recorded and fed to the node's trend detector; an escalation
+        wakes the smoke stage at once instead of at its next check.
+
+        Args:
+            sent_at: The node's clock when it sent the batch; with a sample's
+                own "t" (same clock) it dates the sample on the server
+
+        Returns:
+            int: Number of new samples
+        """
+        node = node_registry.get(node_id)
+        if node is None:
+            node = node_registry.add(node_id, ip)  # Push-only unless ip is given
+        fresh = node.accept(samples, boot_id)
+        if not fresh:
+            return 0
+
+        wall, monotonic = time.time(), time.monotonic()
+        for sample in fresh:
+            age = 0.0
+            if sent_at is not None and sample.get("t") is not None:
+                age = max(0.0, sent_at - sample["t"])
+            smoke = sample.get("smoke")
+            temperature = sample.get("temperature")
+            history_store.append(
+                node_id,
+                wall - age,
+                smoke=np.nan if smoke is None else smoke,
+                temperature=np.nan if temperature is None else temperature,
+            )
+            if smoke is None:
+                continue
+            escalation, _ = self.smoke_stage.trends.update(
+                {node_id: smoke}, monotonic - age, SMOKE_THRESHOLD
+            )
+            if escalation is not None and monitoring_active:
+                with self.push_lock:
+                    if self.pushed_escalation is None:
+                        self.pushed_escalation = escalation
+
+        current_status["esp32_status"] = "online"
+        smoke_levels = sensor_poller.pushed("smoke")
+        if smoke_levels:
+            current_status["smoke_level"] = max(smoke_levels.values())
+            current_status["last_update"] = datetime.now().strftime("%H:%M:%S")
+        broadcaster.status_changed()
+        if self.pushed_escalation is not None:
+            notify_state_changed()
+        return len(fresh)
+
+    def take_pushed_escalation(self):
+        with self.push_lock:
+            escalation, self.pushed_escalation = self.pushed_escalation, None
+            return escalation
 
     def trigger_alarm(self):
-        try:
-            response = requests.post(f"http://{ESP_IP}/trigger_alarm", timeout=2)
-            if response.text == "Alarm activated":
-                current_status["alarm_active"] = True
-                socketio.emit("alarm_triggered", {"status": "active"})
-                return True
-        except requests.exceptions.RequestException:
-            pass
-        return False
+        """
+        Sound every alarm actuator in parallel.
+
+        The alarm counts as active as soon as the first actuator
+        acknowledges; the rest keep being retried until the dispatch
+        deadline.
+
+        Returns:
+            AlarmDispatch: Per-actuator acknowledgement of the command
+        """
+        dispatch = alarm_dispatcher.dispatch("trigger_alarm")
+        if not dispatch.actuators:
+            broadcaster.log("No alarm actuators registered!", "error")
+        elif dispatch.wait_first():
+            current_status["alarm_active"] = True
+            socketio.emit(
+                "alarm_triggered",
+                {"status": "active", "actuators": dispatch.acknowledged()},
+            )
+            broadcaster.status_changed(urgent=True)
+        else:
+            broadcaster.log("No alarm actuator acknowledged the trigger!", "error")
+        return dispatch
 
     def stop_alarm(self):
-        try:
-            response = requests.post(f"http://{ESP_IP}/stop_alarm", timeout=2)
-            if response.text == "Alarm stopped":
-                current_status["alarm_active"] = False
-                socketio.emit("alarm_stopped", {"status": "inactive"})
-                return True
-        except requests.exceptions.RequestException:
-            pass
-        return False
+        """
+        Silence every alarm actuator in parallel.
 
-    def detect_fire_in_camera(self):
-        """Camera fire detection for verification stage"""
-        if model is None:
+        Returns:
+            bool: True if any actuator acknowledged (or none is registered)
+        """
+        dispatch = alarm_dispatcher.dispatch("stop_alarm")
+        dispatch.wait()
+        self.publish_alarm(dispatch)
+        if dispatch.actuators and not dispatch.acknowledged():
             return False
+        missing = dispatch.unacknowledged()
+        if missing:
+            broadcaster.log(
+                f"Alarm actuators did not confirm the stop: {', '.join(missing)}",
+                "warning",
+            )
+        current_status["alarm_active"] = False
+        socketio.emit("alarm_stopped", {"status": "inactive"})
+        broadcaster.status_changed()
+        notify_state_changed()
+        return True
 
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
+    def publish_alarm(self, dispatch):
+        """Share the latest dispatch of each command with every process."""
+        shared_state.update_published("alarm", {dispatch.command: dispatch.to_dict()})
+
+    def detect_fire_in_camera(self, cancel=None):
+        """
+        Camera fire detection for verification stage.
+
+        Args:
+            cancel: Optional threading.Event that ends verification early
+
+        Returns:
+            bool: True if the camera confirmed fire
+        """
+        if model is None:
+            broadcaster.log(
+                f"Camera verification unavailable (detection model {model_state['status']}); relying on temperature",
+                "warning",
+            )
+            return False
+        cancel = cancel or threading.Event()
+
+        # Use the always-warm cameras when available so verification starts on
+        # the first tick instead of waiting for a device to open and settle
+        if inference_engine is not None and any(
+            capture.is_open() for capture in capture_services.values()
+        ):
+            return self.detect_fire_in_cameras(cancel)
+
+        # The camera is read on its own thread, so the loop always takes the
+        # newest frame and never works through frames that queued up
+        capture = CaptureService(CAMERA_INDEX, blocking_call=run_native)
+        capture.start()
+        seq, frame = capture.wait_for_frame(0, timeout=CAMERA_OPEN_TIMEOUT)
+        if frame is None:
+            capture.stop()
             current_status["camera_status"] = "offline"
             return False
 
         current_status["camera_status"] = "online"
         fire_detected = False
+        release_camera = True
         start_time = time.time()
+        prefilter = FramePrefilter() if PREFILTER_ENABLED else None
+        tiler = self.create_tiler() if TILED_INFERENCE else None
+        fire_found, detections = False, NO_DETECTIONS
+        scheduler = inference_scheduler
 
         try:
-            while (time.time() - start_time) < FIRE_CHECK_DURATION:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                # Detect fire in frame
-                fire_found, processed_frame = self.detect_fire_frame(frame)
-
-                # Encode frame to base64 and emit
-                _, buffer = cv2.imencode(".jpg", processed_frame)
-                frame_b64 = base64.b64encode(buffer).decode("utf-8")
-                socketio.emit(
-                    "video_frame", {"frame": frame_b64, "fire_detected": fire_found}
-                )
+            while (
+                time.time() - start_time
+            ) < FIRE_CHECK_DURATION and not cancel.is_set():
+                tick = time.monotonic()
+                frame_age = capture.frame_age(seq) or 0.0
+                frame = frame.copy()  # The capture thread reuses ring slots
+
+                # Detect fire in frame, unless the prefilter rules out new flame
+                inference_seconds = None
+                if prefilter is None or prefilter.should_infer(frame):
+                    activity = prefilter.mask if prefilter is not None else None
+                    infer_start = time.monotonic()
+                    fire_found, detections = self.detect_fire_frame(
+                        frame, tiler, activity, imgsz=scheduler.input_size
+                    )
+                    inference_seconds = time.monotonic() - infer_start
+                evidence_recorder.add_frame(frame)
+                if scheduler.stream_due():
+                    # Encoded on the streaming side, which reports the cost
+                    self.emit_frame(frame, fire_found, detections)
+                if scheduler.observe(frame_age, inference_seconds):
+                    shared_state.publish("scheduler", scheduler.to_dict())
 
                 if fire_found:
                     fire_detected = True
-                    # Save evidence image
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    cv2.imwrite(f"fire_detected_{timestamp}.jpg", frame)
-                    socketio.emit(
-                        "log_message",
-                        {
-                            "message": f"Fire confirmed by camera! Evidence saved as fire_detected_{timestamp}.jpg",
-                            "type": "error",
-                        },
+                    # The evidence writer keeps reading post-event frames and
+                    # stops the camera afterwards, off this thread
+                    release_camera = False
+                    self.save_evidence(
+                        frame,
+                        detections,
+                        read_frame=lambda: self.copy_latest(capture),
+                        on_done=capture.stop,
                     )
                     break
 
-                time.sleep(0.1)  # ~10 FPS
+                cancel.wait(scheduler.delay(time.monotonic() - tick))
+                seq, frame = capture.wait_for_frame(seq, CAMERA_OPEN_TIMEOUT)
+                if frame is None:
+                    break  # The camera stopped delivering frames
 
         finally:
-            cap.release()
+            if release_camera:
+                capture.stop()
             current_status["camera_status"] = "offline"
+            shared_state.publish("scheduler", scheduler.to_dict())
 
         return fire_detected
 
-    def detect_fire_frame(self, frame):
+    def detect_fire_in_cameras(self, cancel):
+        """
+        Camera verification across all warm cameras using batched inference.
+
+        Returns:
+            bool: True as soon as any camera confirms fire
+        """
+        fire_event = threading.Event()
+        evidence = {}
+
+        def on_result(camera_id, frame, outcome):
+            fire_found, detections = outcome
+            evidence_recorder.add_frame(frame, camera_id)
+            self.emit_frame(frame, fire_found, detections, camera_id)
+            if fire_found and not fire_event.is_set():
+                evidence.update(frame=frame, detections=detections, camera_id=camera_id)
+                fire_event.set()
+                cancel.set()  # Fire found; ends the wait below
+
+        for camera_id, capture in capture_services.items():
+            if capture.is_open():
+                inference_engine.register(camera_id, capture, on_result)
+
+        current_status["camera_status"] = "online"
+        inference_engine.start()
+        try:
+            cancel.wait(FIRE_CHECK_DURATION)
+            fire_detected = fire_event.is_set() and monitoring_active
+        finally:
+            inference_engine.stop()
+            for camera_id in capture_services:
+                inference_engine.unregister(camera_id)
+            current_status["camera_status"] = "offline"
+
+        if fire_detected:
+            capture = capture_services[evidence["camera_id"]]
+            self.save_evidence(
+                evidence["frame"],
+                evidence["detections"],
+                evidence["camera_id"],
+                read_frame=lambda: self.copy_latest(capture),
+            )
+        return fire_detected
+
+    def copy_latest(self, capture):
+        _, frame = capture.latest()
+        return None if frame is None else frame.copy()
+
+    def emit_frame(self, frame, fire_found, detections, camera_id=None):
+        """
+        Hand a frame to the streaming layer (encoded off this thread).
+
+        Nothing is drawn or published while no dashboard is watching. The
+        overlay goes on a copy so the raw frame stays clean for evidence.
+        """
+        if not frame_broadcaster.has_viewers():
+            return False
+        frame = self.draw_detections(frame.copy(), detections)
+        frame_broadcaster.publish(frame, fire_found, camera_id)
+        return True
+
+    def save_evidence(
+        self, frame, detections, camera_id=None, read_frame=None, on_done=None
+    ):
+        """Queue an evidence clip with sensor readings and detections."""
+        boxes, scores, classes = detections
+        metadata = {
+            "smoke_level": current_status["smoke_level"],
+            "temperature": current_status["temperature"],
+            "detections": [
+                {
+                    "class": model.names[class_id],
+                    "score": round(float(score), 3),
+                    "box": [round(float(v), 1) for v in box],
+                }
+                for box, score, class_id in zip(boxes, scores, classes)
+            ],
+        }
+        name = evidence_recorder.trigger(
+            frame, metadata, camera_id, read_frame=read_frame, on_done=on_done
+        )
+        if name is None:
+            broadcaster.log(
+                "Fire confirmed by camera! Evidence writer busy; clip dropped.",
+                "error",
+            )
+        else:
+            broadcaster.log(
+                f"Fire confirmed by camera! Recording evidence as {EVIDENCE_DIR}/{name}",
+                "error",
+            )
+
+    def create_tiler(self):
+        return TiledDetector(fire_class_ids, DETECTION_CONFIDENCE)
+
+    def detect_fire_frame(self, frame, tiler=None, activity=None, imgsz=None):
+        """
+        Run the model on one frame.
+
+        Args:
+            frame: The camera frame
+            tiler: Optional TiledDetector to run the frame as tiles
+            activity: Optional prefilter mask guiding where tiles go
+            imgsz: Optional model input size (full-frame inference only)
+
+        Returns:
+            tuple: (fire_found, detections) where detections is
+            (boxes, scores, class IDs) for every fire box
+        """
         if model is None:
-            return False, frame
+            return False, NO_DETECTIONS
 
         try:
-            results = model.predict(frame, conf=0.5, verbose=False)
-            fire_classes = [
-                "Cooking Oil",
-                "Electrical",
-                "Gas",
-                "Liquid",
-                "Metal",
-                "Solid",
-            ]
-
-            for result in results:
-                if hasattr(result, "boxes") and result.boxes is not None:
-                    for box in result.boxes:
-                        if hasattr(box, "cls"):
-                            class_id = int(box.cls[0])
-                            if class_id < len(result.names):
-                                class_name = result.names[class_id]
-                                if class_name in fire_classes:
-                                    # Draw bounding box
-                                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                                    cv2.rectangle(
-                                        frame, (x1, y1), (x2, y2), (0, 0, 255), 2
-                                    )
-                                    cv2.putText(
-                                        frame,
-                                        f"FIRE: {class_name}",
-                                        (x1, y1 - 10),
-                                        cv2.FONT_HERSHEY_SIMPLEX,
-                                        0.5,
-                                        (0, 0, 255),
-                                        2,
-                                    )
-                                    return True, frame
-            return False, frame
+            if tiler is not None:
+                return self.process_result(frame, tiler.predict(model, frame, activity))
+            options = {} if imgsz is None else {"imgsz": imgsz}
+            results = model.predict(
+                frame, conf=DETECTION_CONFIDENCE, verbose=False, **options
+            )
+            return self.process_result(frame, results[0])
         except Exception as e:
             print(f"Error in fire detection: {e}")
-            return False, frame
+            return False, NO_DETECTIONS
 
-    def monitor_temperature_fallback(self):
-        """Temperature monitoring as fallback mechanism"""
-        socketio.emit(
-            "log_message",
-            {
-                "message": "Camera verification failed. Starting temperature monitoring as fallback...",
-                "type": "warning",
-            },
+    def process_result(self, frame, result):
+        """
+        Filter one model result down to fire detections.
+
+        Returns:
+            tuple: (fire_found, (boxes, scores, class IDs))
+        """
+        detections = filter_detections(result, fire_class_ids, DETECTION_CONFIDENCE)
+        return len(detections[1]) > 0, detections
+
+    def draw_detections(self, frame, detections):
+        """Draw fire boxes and scores onto ``frame`` in place."""
+        boxes, scores, classes = detections
+        for (x1, y1, x2, y2), score, class_id in zip(
+            boxes.astype(int), scores, classes
+        ):
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+            cv2.putText(
+                frame,
+                f"FIRE: {model.names[class_id]} {score:.2f}",
+                (x1, y1 - 10),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.5,
+                (0, 0, 255),
+                2,
+            )
+        return frame
+
+    def monitor_temperature(self, cancel=None):
+        """
+        Temperature monitoring, run alongside camera verification.
+
+        Args:
+            cancel: Optional threading.Event that ends monitoring early
+
+        Returns:
+            bool: True if the temperature threshold was exceeded
+        """
+        cancel = cancel or threading.Event()
+        broadcaster.log(
+            "Starting temperature monitoring alongside camera verification...",
+            "warning",
         )
 
         for attempt in range(TEMP_CHECK_ATTEMPTS):
-            if not monitoring_active:
-                socketio.emit(
-                    "log_message",
-                    {
-                        "message": "Temperature monitoring stopped by user",
-                        "type": "warning",
-                    },
-                )
+            if cancel.is_set():
                 break
 
             # Always log the attempt number first
-            socketio.emit(
-                "log_message",
-                {
-                    "message": f"Temperature check {attempt + 1}/{TEMP_CHECK_ATTEMPTS}: Requesting reading...",
-                    "type": "info",
-                },
+            broadcaster.log(
+                f"Temperature check {attempt + 1}/{TEMP_CHECK_ATTEMPTS}: Requesting reading..."
             )
 
             temp = self.get_temperature()
@@ -246,257 +729,542 @@ class FireDetectionSystem:
                 current_status["temperature"] = temp
                 current_status["last_update"] = datetime.now().strftime("%H:%M:%S")
 
-                socketio.emit("status_update", current_status)
-                socketio.emit(
-                    "log_message",
-                    {
-                        "message": f"Temperature reading received: {temp}°C",
-                        "type": "success",
-                    },
-                )
+                broadcaster.status_changed()
+                broadcaster.log(f"Temperature reading received: {temp}°C", "success")
 
-                if temp > TEMP_THRESHOLD:
-                    socketio.emit(
-                        "log_message",
-                        {
-                            "message": f"🚨 Temperature threshold exceeded! {temp}°C > {TEMP_THRESHOLD}°C",
-                            "type": "error",
-                        },
+                if temperature_confirms(temp, TEMP_THRESHOLD):
+                    broadcaster.log(
+                        f"🚨 Temperature threshold exceeded! {temp}°C > {TEMP_THRESHOLD}°C",
+                        "error",
                     )
                     return True
             else:
-                socketio.emit(
-                    "log_message",
-                    {
-                        "message": f"Failed to get temperature reading (ESP32 connection issue)",
-                        "type": "error",
-                    },
+                broadcaster.log(
+                    f"Failed to get temperature reading (ESP32 connection issue)",
+                    "error",
                 )
 
             # Wait before next check
-            socketio.emit(
-                "log_message",
-                {
-                    "message": f"Waiting {TEMP_CHECK_INTERVAL} seconds before next check...",
-                    "type": "info",
-                },
+            broadcaster.log(
+                f"Waiting {TEMP_CHECK_INTERVAL} seconds before next check..."
             )
-            time.sleep(TEMP_CHECK_INTERVAL)
+            if cancel.wait(TEMP_CHECK_INTERVAL):
+                break
 
-        socketio.emit(
-            "log_message",
-            {
-                "message": "Temperature monitoring completed. No sustained temperature rise detected.",
-                "type": "info",
-            },
-        )
+        if cancel.is_set():
+            broadcaster.log("Temperature monitoring stopped")
+        else:
+            broadcaster.log(
+                "Temperature monitoring completed. No sustained temperature rise detected."
+            )
         return False
 
 
 fire_system = FireDetectionSystem()
 
+# Batched inference over all warm cameras (one model call per batch), created
+# once the model has loaded
+inference_engine = None
 
-def sequential_monitoring_pipeline():
+
+def set_model_status(status, error=None):
+    model_state["status"] = status
+    model_state["error"] = error
+    if status == "ready":
+        model_state["load_seconds"] = round(time.monotonic() - process_started_at, 2)
+    if engine_lock_held:
+        publish_health()
+
+
+def warm_up(loaded):
     """
-    Sequential Fire Detection Pipeline:
-    1. Smoke Monitoring (continuous)
-    2. Camera Verification (when smoke threshold exceeded)
-    3. Temperature Fallback (if camera fails to detect fire)
-    4. Back to Smoke Monitoring
+    Run dummy frames through a freshly loaded model, so lazy initialisation
+    (graph compilation, memory allocation) is not paid by the first camera
+    frame. Every input size the scheduler may choose is warmed.
     """
-    global monitoring_active, current_status
-
-    socketio.emit(
-        "log_message",
-        {
-            "message": "Starting sequential fire detection pipeline...",
-            "type": "success",
-        },
+    frame = np.zeros((IMAGE_SIZE, IMAGE_SIZE, 3), np.uint8)
+    # One frame per worker process, so every worker gets warmed
+    frames = [frame] * (INFERENCE_WORKERS if loaded is inference_pool else 1)
+    for _ in range(MODEL_WARMUP_RUNS):
+        for size in inference_scheduler.input_sizes:
+            loaded.predict(frames, conf=DETECTION_CONFIDENCE, verbose=False, imgsz=size)
+
+
+def load_model():
+    """
+    Load and warm up the detection model off the startup path.
+
+    The server answers and smoke monitoring runs meanwhile; camera
+    verification joins in once ``model`` is set, which happens last.
+    """
+    global model, fire_class_ids, inference_engine
+    try:
+        if inference_pool is not None:
+            if not inference_pool.wait_ready():
+                raise RuntimeError(
+                    inference_pool.error or "no inference worker could load the model"
+                )
+            loaded = inference_pool
+        elif ASYNC_MODE != "threading":
+            loaded = NativeThreadModel(run_native(load_backend, INFERENCE_BACKEND))
+        else:
+            loaded = load_backend(INFERENCE_BACKEND)
+        set_model_status("warming")
+        warm_up(loaded)
+    except Exception as e:
+        print(f"Error loading YOLO model: {e}")
+        set_model_status("failed", str(e))
+        return
+
+    fire_class_ids = class_ids(loaded.names, FIRE_CLASSES)
+    if capture_services:
+        inference_engine = BatchInferenceEngine(
+            loaded,
+            fire_system.process_result,
+            batch_size=INFERENCE_BATCH_SIZE,
+            max_wait=INFERENCE_MAX_WAIT,
+            conf=DETECTION_CONFIDENCE,
+            prefilter=FramePrefilter if PREFILTER_ENABLED else None,
+            tiler=fire_system.create_tiler if TILED_INFERENCE else None,
+        )
+    model = loaded
+    set_model_status("ready")
+    print(
+        f"✅ YOLO fire detection model loaded successfully! ({model.name} backend, "
+        f"ready {model_state['load_seconds']}s after start)"
     )
 
+
+model_loader = None
+if RUN_ENGINE:
+    model_loader = threading.Thread(target=load_model, name="model-loader", daemon=True)
+    model_loader.start()
+
+
+# Wakes pipeline waits when monitoring stops or the alarm is cleared
+state_changed = threading.Condition()
+active_incident = None
+incident_log = IncidentLog()
+
+# Time spent per monitoring stage (exported on /metrics by the engine process)
+stage_lock = threading.Lock()
+stage_entered_at = time.monotonic()
+stage_totals = {}  # Seconds spent in each stage, up to its latest exit
+
+
+def stage_seconds(stage):
+    """Time spent in ``stage`` so far, including a visit still in progress."""
+    with stage_lock:
+        seconds = stage_totals.get(stage, 0.0)
+        if current_status["monitoring_stage"] == stage:
+            seconds += time.monotonic() - stage_entered_at
+        return seconds
+
+
+def count_stage(stage):
+    """Export ``stage`` on /metrics from now on (caller holds stage_lock)."""
+    if stage not in stage_totals:
+        stage_totals[stage] = 0.0
+        STAGE_SECONDS.set_function(lambda: stage_seconds(stage), stage=stage)
+
+
+def start_stage_clock():
+    """Start counting stage time once this process has taken the engine."""
+    global stage_entered_at
+    with stage_lock:
+        stage_entered_at = time.monotonic()
+        count_stage(current_status["monitoring_stage"])
+
+
+def set_stage(stage, description):
+    """Switch the monitoring stage, crediting the time spent in the previous one."""
+    global stage_entered_at
+    with stage_lock:
+        now = time.monotonic()
+        previous = current_status["monitoring_stage"]
+        count_stage(previous)
+        count_stage(stage)
+        stage_totals[previous] += now - stage_entered_at
+        stage_entered_at = now
+        current_status["monitoring_stage"] = stage
+        current_status["stage_description"] = description
+
+
+def notify_state_changed():
+    with state_changed:
+        state_changed.notify_all()
+
+
+def wait_for_state(predicate, timeout=None):
+    """
+    Block until ``predicate()`` holds or ``timeout`` passes, without polling.
+
+    Returns:
+        bool: The final value of the predicate
+    """
+    with state_changed:
+        return state_changed.wait_for(predicate, timeout)
+
+
+def monitoring_pipeline():
+    """
+    Event-driven Fire Detection Pipeline:
+    1. Smoke Monitoring (continuous)
+    2. Verification (when smoke threshold exceeded): camera and temperature
+       checks run in parallel and the first to confirm fire decides
+    3. Alarm until stopped, then back to Smoke Monitoring
+    """
+    global active_incident
+
+    broadcaster.log("Starting event-driven fire detection pipeline...", "success")
+
     while monitoring_active:
         try:
             # STAGE 1: SMOKE MONITORING
-            current_status["monitoring_stage"] = "smoke_monitoring"
-            current_status["stage_description"] = (
-                "Monitoring smoke levels (camera and temperature sensors OFF)"
+            set_stage(
+                "smoke_monitoring",
+                "Monitoring smoke levels (camera and temperature sensors OFF)",
             )
             current_status["camera_status"] = "offline"
 
-            socketio.emit("status_update", current_status)
-            socketio.emit(
-                "log_message",
-                {
-                    "message": "Stage 1: Smoke monitoring active. Camera and temperature sensors OFF.",
-                    "type": "info",
-                },
+            broadcaster.status_changed()
+            broadcaster.log(
+                "Stage 1: Smoke monitoring active. Camera and temperature sensors OFF."
             )
 
             # Continuous smoke monitoring
-            smoke_detection_active = True
-            while smoke_detection_active and monitoring_active:
+            while monitoring_active:
                 smoke = fire_system.get_smoke_level()
-                # smoke = 3000
 
                 if smoke is not None:
                     current_status["smoke_level"] = smoke
                     current_status["last_update"] = datetime.now().strftime("%H:%M:%S")
-                    socketio.emit("status_update", current_status)
-
-                    # Check if smoke threshold is exceeded
-                    if smoke > SMOKE_THRESHOLD:
-                        socketio.emit(
-                            "log_message",
-                            {
-                                "message": f"🚨 SMOKE THRESHOLD EXCEEDED! Level: {smoke} ppm (Threshold: {SMOKE_THRESHOLD} ppm)",
-                                "type": "warning",
-                            },
+                    broadcaster.status_changed()
+
+                    # Escalate on a confirmed threshold crossing, a fast
+                    # rise or an accumulated shift above the baseline
+                    escalation = fire_system.smoke_escalation
+                    if escalation is not None:
+                        node_id, trigger = escalation
+                        if trigger == "threshold":
+                            broadcaster.log(
+                                f"🚨 SMOKE THRESHOLD EXCEEDED! Level: {smoke} ppm (Threshold: {SMOKE_THRESHOLD} ppm)",
+                                "warning",
+                            )
+                        else:
+                            broadcaster.log(
+                                f"🚨 SMOKE RISING at node {node_id} ({trigger.replace('_', ' ')})! Level: {smoke} ppm",
+                                "warning",
+                            )
+                        break  # Move to next stage
+                    if fire_system.smoke_stage.suspect:
+                        broadcaster.log(
+                            f"Smoke reading jumped to {smoke} ppm; re-reading to confirm"
                         )
-                        smoke_detection_active = False  # Move to next stage
                     else:
-                        socketio.emit(
-                            "log_message",
-                            {
-                                "message": f"Smoke level normal: {smoke} ppm",
-                                "type": "info",
-                            },
-                        )
+                        broadcaster.log(f"Smoke level normal: {smoke} ppm")
 
-                time.sleep(5)  # Check smoke every 5 seconds
+                # Pushed samples that escalate end the wait on arrival
+                wait_for_state(
+                    lambda: not monitoring_active
+                    or fire_system.pushed_escalation is not None,
+                    fire_system.smoke_stage.interval(),
+                )
 
             if not monitoring_active:
                 break
 
-            # STAGE 2: CAMERA VERIFICATION
-            current_status["monitoring_stage"] = "camera_verification"
-            current_status["stage_description"] = (
-                "Camera verifying fire detection (smoke sensor OFF)"
+            # STAGE 2: PARALLEL VERIFICATION (camera and temperature race)
+            set_stage(
+                "verification",
+                "Camera and temperature verifying fire in parallel (smoke sensor OFF)",
+            )
+            broadcaster.status_changed()
+            broadcaster.log(
+                "Stage 2: Camera verification and temperature checks running in parallel. Smoke sensor OFF.",
+                "warning",
             )
-            socketio.emit("status_update", current_status)
 
-            socketio.emit(
-                "log_message",
+            incident = Incident(smoke, trigger)
+            active_incident = incident
+            incident.run_checks(
                 {
-                    "message": "Stage 2: Starting camera verification. Smoke sensor OFF.",
-                    "type": "warning",
-                },
+                    "camera": fire_system.detect_fire_in_camera,
+                    "temperature": fire_system.monitor_temperature,
+                }
             )
-
-            fire_confirmed_by_camera = fire_system.detect_fire_in_camera()
-
-            if fire_confirmed_by_camera:
+            outcome = incident.wait()
+            active_incident = None
+            incident_log.add(incident)
+            shared_state.publish("incidents", incident_log.to_list())
+            fire_system.smoke_stage.rearm(outcome)
+            fire_system.take_pushed_escalation()  # Raised during verification
+
+            if outcome == "fire":
                 # FIRE CONFIRMED - TRIGGER ALARM
+                source = incident.confirmed_by
                 current_status["fire_detected"] = True
-                current_status["monitoring_stage"] = "fire_confirmed"
-                current_status["stage_description"] = (
-                    "FIRE CONFIRMED by camera! Alarm triggered."
+                set_stage(
+                    "fire_confirmed", f"FIRE CONFIRMED by {source}! Alarm triggered."
                 )
 
-                socketio.emit("status_update", current_status)
-                socketio.emit(
-                    "log_message",
-                    {
-                        "message": "🔥 FIRE CONFIRMED BY CAMERA! Triggering alarm system!",
-                        "type": "error",
-                    },
+                broadcaster.status_changed(urgent=True)
+                broadcaster.log(
+                    f"🔥 FIRE CONFIRMED BY {source.upper()} after {incident.time_to_decision:.1f}s! Triggering alarm system!",
+                    "error",
                 )
 
-                fire_system.trigger_alarm()
+                dispatch = fire_system.trigger_alarm()
+                if dispatch.acknowledged():
+                    incident.alarm_latency = round(incident.elapsed(), 3)
+
+                # Record how every actuator answered, once each has
+                # acknowledged or run out of time
+                dispatch.wait()
+                incident.actuation = dispatch.to_dict()
+                shared_state.publish("incidents", incident_log.to_list())
+                fire_system.publish_alarm(dispatch)
+                missing = dispatch.unacknowledged()
+                if dispatch.acknowledged() and missing:
+                    broadcaster.log(
+                        f"Alarm actuators not responding: {', '.join(missing)}",
+                        "error",
+                    )
 
                 # Keep alarm active until manually stopped
-                while current_status["alarm_active"] and monitoring_active:
-                    time.sleep(1)
+                wait_for_state(
+                    lambda: not current_status["alarm_active"] or not monitoring_active
+                )
 
                 # Reset after alarm is stopped
                 current_status["fire_detected"] = False
-                current_status["monitoring_stage"] = "idle"
-                current_status["stage_description"] = (
-                    "Alarm stopped. Returning to smoke monitoring."
-                )
-                socketio.emit("status_update", current_status)
+                set_stage("idle", "Alarm stopped. Returning to smoke monitoring.")
+                broadcaster.status_changed()
 
-            else:
-                # STAGE 3: TEMPERATURE FALLBACK
-                current_status["monitoring_stage"] = "temp_fallback"
-                current_status["stage_description"] = (
-                    "Camera verification failed. Using temperature fallback."
-                )
-                current_status["camera_status"] = "offline"
-                socketio.emit("status_update", current_status)
-
-                socketio.emit(
-                    "log_message",
-                    {
-                        "message": "Stage 3: Camera failed to detect fire. Starting temperature fallback monitoring.",
-                        "type": "warning",
-                    },
+            elif outcome == "cleared":
+                # NO FIRE DETECTED - RETURN TO SMOKE MONITORING
+                broadcaster.log(
+                    f"No fire confirmed by camera or temperature after {incident.time_to_decision:.1f}s. Returning to smoke monitoring."
                 )
 
-                fire_confirmed_by_temp = fire_system.monitor_temperature_fallback()
+                set_stage("idle", "False alarm cleared. Returning to smoke monitoring.")
+                broadcaster.status_changed()
 
-                if fire_confirmed_by_temp:
-                    # FIRE CONFIRMED BY TEMPERATURE
-                    current_status["fire_detected"] = True
-                    current_status["monitoring_stage"] = "fire_confirmed"
-                    current_status["stage_description"] = (
-                        "FIRE CONFIRMED by temperature! Alarm triggered."
-                    )
+                # Brief pause before returning to smoke monitoring
+                wait_for_state(lambda: not monitoring_active, CLEARED_PAUSE)
 
-                    socketio.emit("status_update", current_status)
-                    socketio.emit(
-                        "log_message",
-                        {
-                            "message": "🔥 FIRE CONFIRMED BY TEMPERATURE FALLBACK! Triggering alarm system!",
-                            "type": "error",
-                        },
-                    )
+        except Exception as e:
+            broadcaster.log(f"Error in monitoring pipeline: {str(e)}", "error")
+            wait_for_state(lambda: not monitoring_active, 5)  # Wait before retrying
 
-                    fire_system.trigger_alarm()
+    # Cleanup when monitoring stops
+    set_stage("idle", "Monitoring stopped")
+    current_status["camera_status"] = "offline"
+    current_status["fire_detected"] = False
+    broadcaster.status_changed()
 
-                    # Keep alarm active until manually stopped
-                    while current_status["alarm_active"] and monitoring_active:
-                        time.sleep(1)
 
-                    # Reset after alarm is stopped
-                    current_status["fire_detected"] = False
-                    current_status["monitoring_stage"] = "idle"
-                    current_status["stage_description"] = (
-                        "Alarm stopped. Returning to smoke monitoring."
-                    )
-                    socketio.emit("status_update", current_status)
-
-                else:
-                    # NO FIRE DETECTED - RETURN TO SMOKE MONITORING
-                    socketio.emit(
-                        "log_message",
-                        {
-                            "message": "No fire confirmed by temperature fallback. Returning to smoke monitoring.",
-                            "type": "info",
-                        },
-                    )
+# The pipeline thread run by this process while it is the site's engine
+monitoring_thread = None
+pipeline_lock = threading.Lock()
 
-                    current_status["monitoring_stage"] = "idle"
-                    current_status["stage_description"] = (
-                        "False alarm cleared. Returning to smoke monitoring."
-                    )
-                    socketio.emit("status_update", current_status)
 
-                    # Brief pause before returning to smoke monitoring
-                    time.sleep(5)
+def start_pipeline():
+    """
+    Start the monitoring pipeline unless it is already running.
 
-        except Exception as e:
-            socketio.emit(
-                "log_message",
-                {"message": f"Error in monitoring pipeline: {str(e)}", "type": "error"},
+    Returns:
+        bool: True if a new pipeline was started
+    """
+    global monitoring_active, monitoring_thread
+    with pipeline_lock:
+        if monitoring_thread is not None and monitoring_thread.is_alive():
+            return False
+        monitoring_active = True
+        for capture in capture_services.values():
+            capture.start()
+
+        # Start the event-driven monitoring pipeline
+        monitoring_thread = threading.Thread(
+            target=monitoring_pipeline, name="monitoring-pipeline", daemon=True
+        )
+        monitoring_thread.start()
+        return True
+
+
+def stop_pipeline():
+    global monitoring_active
+    with pipeline_lock:
+        monitoring_active = False
+        if active_incident is not None:
+            active_incident.abort()
+        fire_system.stop_alarm()
+        for capture in capture_services.values():
+            capture.stop()
+        current_status["alarm_active"] = False
+        current_status["fire_detected"] = False
+        set_stage("idle", "System stopped by user")
+        current_status["camera_status"] = "offline"
+        broadcaster.status_changed()
+        notify_state_changed()
+
+
+def apply_settings(settings):
+    """Apply settings written by any web worker to this engine."""
+    global ESP_IP, SMOKE_THRESHOLD, TEMP_THRESHOLD
+    ESP_IP = settings.get("esp_ip", ESP_IP)
+    SMOKE_THRESHOLD = settings.get("smoke_threshold", SMOKE_THRESHOLD)
+    TEMP_THRESHOLD = settings.get("temp_threshold", TEMP_THRESHOLD)
+    default_node = node_registry.get("default")
+    if default_node is None or default_node.ip != ESP_IP:
+        node_registry.add("default", ESP_IP)
+
+
+def apply_node_config(node_config):
+    """Register or remove the nodes written by any web worker (None removes)."""
+    for node_id, config in node_config.items():
+        node = node_registry.get(node_id)
+        if config is None:
+            if node is not None:
+                node_registry.remove(node_id)
+                fire_system.smoke_stage.trends.remove(node_id)
+        elif node is None or (node.ip, node.timeout, node.roles) != (
+            config["ip"],
+            config["timeout"],
+            tuple(config.get("roles", NODE_ROLES)),
+        ):
+            node_registry.add(
+                node_id,
+                config["ip"],
+                config["timeout"],
+                config.get("roles", NODE_ROLES),
             )
-            time.sleep(5)  # Wait before retrying
 
-    # Cleanup when monitoring stops
-    current_status["monitoring_stage"] = "idle"
-    current_status["stage_description"] = "Monitoring stopped"
-    current_status["camera_status"] = "offline"
-    current_status["fire_detected"] = False
-    socketio.emit("status_update", current_status)
+
+def run_command(command):
+    if command.get("command") == "stop_alarm":
+        fire_system.stop_alarm()
+    elif command.get("command") == "ingest":
+        fire_system.ingest(
+            command["node_id"],
+            command["samples"],
+            command.get("ip"),
+            command.get("boot_id"),
+            command.get("sent_at"),
+        )
+    else:
+        print(f"Error: unknown engine command {command}")
+
+
+def sync_engine():
+    """Reconcile the engine with the shared control state and publish its view."""
+    apply_settings(shared_state.get("settings", {}))
+    apply_node_config(shared_state.get("node_config", {}))
+    for command in shared_state.pop_commands():
+        run_command(command)
+
+    # Starting and stopping are idempotent: the desired state is a flag
+    if shared_state.get("monitoring", False):
+        start_pipeline()
+    elif monitoring_active:
+        stop_pipeline()
+
+    trends = fire_system.smoke_stage.trends.to_dict()
+    shared_state.publish(
+        "nodes",
+        [
+            dict(node, smoke_trend=trends.get(node["node_id"]))
+            for node in node_registry.to_list()
+        ],
+    )
+    publish_health()
+
+
+def publish_health():
+    """Publish the engine's health for the other processes when it changes."""
+    global published_health
+    report = health()
+    current = (report["subsystems"], report["model"])
+    if current != published_health:
+        shared_state.publish("health", report)
+        published_health = current
+
+
+def run_engine():
+    """
+    Engine supervisor: exactly one process per site holds the engine lock
+    and runs the pipeline; the others stand by and take over if it dies.
+    """
+    global engine_lock_held
+    while True:
+        if not engine_lock_held:
+            engine_lock_held = shared_state.acquire_engine_lock()
+            if not engine_lock_held:
+                socketio.sleep(ENGINE_STANDBY_RETRY)
+                continue
+            print(f"✅ Monitoring engine running in process {os.getpid()}")
+            start_stage_clock()
+            shared_state.publish("status", broadcaster.snapshot())
+            shared_state.publish("incidents", incident_log.to_list())
+
+        version = shared_state.version()
+        try:
+            sync_engine()
+        except Exception as e:
+            print(f"Error syncing engine state: {e}")
+        shared_state.wait(version, ENGINE_SYNC_INTERVAL)
+
+
+def shared_status():
+    return shared_state.published("status") or broadcaster.snapshot()
+
+
+def health():
+    """
+    Readiness of this process's subsystems.
+
+    "web" answers as soon as the server is up, "engine" is "running" in the
+    process that holds the engine lock, "smoke_monitoring" is available
+    there straight away and "camera_verification" once the model is loaded
+    and warmed up.
+
+    Returns:
+        dict: Subsystem states, model load details and overall readiness
+    """
+    if not RUN_ENGINE:
+        engine = "disabled"
+    else:
+        engine = "running" if engine_lock_held else "standby"
+    # Workers that keep failing to load the model are given up on for good
+    pool_failed = inference_pool is not None and inference_pool.failed()
+    subsystems = {
+        "web": "ready",
+        "engine": engine,
+        "smoke_monitoring": "ready" if engine_lock_held else "unavailable",
+        "model": "failed" if pool_failed else model_state["status"],
+        "camera_verification": (
+            "ready"
+            if model is not None and engine_lock_held and not pool_failed
+            else "unavailable"
+        ),
+        "sensors": "online" if sensor_poller.any_online() else "offline",
+    }
+    if inference_pool is not None:
+        subsystems["inference_workers"] = (
+            "failed" if pool_failed else "ready" if model is not None else "loading"
+        )
+    model_report = dict(model_state)
+    if pool_failed:
+        model_report.update(status="failed", error=inference_pool.error)
+    return {
+        # Engine processes are ready once their model is; web-only ones at once
+        "ready": subsystems["model"] in ("ready", "disabled"),
+        "pid": os.getpid(),
+        "uptime": round(time.monotonic() - process_started_at, 1),
+        "subsystems": subsystems,
+        "model": model_report,
+        "inference_pool": None if inference_pool is None else inference_pool.stats(),
+    }
 
 
 @app.route("/")
@@ -506,74 +1274,350 @@ def index():
 
 @app.route("/api/start_monitoring", methods=["POST"])
 def start_monitoring():
-    global monitoring_active
-    monitoring_active = True
-
-    # Start the sequential monitoring pipeline
-    monitoring_thread = threading.Thread(target=sequential_monitoring_pipeline)
-    monitoring_thread.daemon = True
-    monitoring_thread.start()
-
-    return jsonify({"status": "started"})
+    # The engine starts one pipeline however often (and wherever) this is called
+    already_running = shared_state.get("monitoring", False)
+    shared_state.set("monitoring", True)
+    return jsonify({"status": "started", "already_running": already_running})
 
 
 @app.route("/api/stop_monitoring", methods=["POST"])
 def stop_monitoring():
-    global monitoring_active
-    monitoring_active = False
-    fire_system.stop_alarm()
-    current_status["alarm_active"] = False
-    current_status["fire_detected"] = False
-    current_status["monitoring_stage"] = "idle"
-    current_status["stage_description"] = "System stopped by user"
-    current_status["camera_status"] = "offline"
+    shared_state.set("monitoring", False)
     return jsonify({"status": "stopped"})
 
 
 @app.route("/api/stop_alarm", methods=["POST"])
 def stop_alarm_api():
-    success = fire_system.stop_alarm()
-    return jsonify({"success": success})
+    if engine_lock_held:
+        success = fire_system.stop_alarm()
+        return jsonify({"success": success})
+    # Another process runs the engine; it stops the alarm on its next sync
+    shared_state.push_command("stop_alarm")
+    return jsonify({"success": True, "queued": True})
+
+
+@app.route("/api/alarm")
+def alarm_status():
+    """Per-actuator acknowledgement of the latest trigger and stop commands."""
+    return jsonify(
+        dict(
+            shared_state.published("alarm", {}),
+            alarm_active=shared_status().get("alarm_active", False),
+        )
+    )
+
+
+def finite_number(value):
+    """
+    Convert a request value to a float, rejecting booleans, NaN and infinities.
+
+    Returns:
+        float: The number; raises ValueError if it is not finite
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"{value!r} is not a number")
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number")
+    return number
+
+
+@app.route("/api/ingest", methods=["POST"])
+def ingest():
+    """
+    Batched readings pushed by a sensor node.
+
+    Body: ``node_id``, ``samples`` (each with an integer ``seq`` and any of
+    ``smoke``, ``temperature`` and ``t``), and optionally ``boot_id``,
+    ``sent_at`` (node clock, like ``t``) and ``ip`` (for pull fallback).
+    Re-sent samples are acknowledged but not applied twice.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "expected a JSON object"}), 400
+    node_id = data.get("node_id")
+    samples = data.get("samples")
+    boot_id = data.get("boot_id")
+    ip = data.get("ip")
+    if isinstance(boot_id, bool) or not isinstance(boot_id, (str, int, type(None))):
+        return jsonify({"error": "boot_id must be a string or an integer"}), 400
+    if not isinstance(ip, (str, type(None))):
+        return jsonify({"error": "ip must be a string"}), 400
+    if (
+        not isinstance(node_id, str)
+        or not node_id
+        or not isinstance(samples, list)
+        or not samples
+    ):
+        return jsonify({"error": "node_id and a list of samples are required"}), 400
+    try:
+        for sample in samples:
+            # Sequence numbers are compared exactly; never round them
+            seq = sample["seq"]
+            if isinstance(seq, bool) or not isinstance(seq, int):
+                raise TypeError(f"seq {seq!r} is not an integer")
+        samples = [
+            {
+                "seq": sample["seq"],
+                **{
+                    key: finite_number(sample[key])
+                    for key in ("t", "smoke", "temperature")
+                    if sample.get(key) is not None
+                },
+            }
+            for sample in samples
+        ]
+        sent_at = data.get("sent_at")
+        sent_at = None if sent_at is None else finite_number(sent_at)
+    except (KeyError, TypeError, ValueError):
+        return (
+            jsonify({"error": "each sample needs an integer seq and finite numbers"}),
+            400,
+        )
+
+    ack = max(sample["seq"] for sample in samples)
+    if engine_lock_held:
+        accepted = fire_system.ingest(node_id, samples, ip, boot_id, sent_at)
+        return jsonify({"ack": ack, "accepted": accepted})
+    # Another process runs the engine; it applies the batch on its next sync
+    shared_state.push_command(
+        "ingest",
+        node_id=node_id,
+        samples=samples,
+        ip=ip,
+        boot_id=boot_id,
+        sent_at=sent_at,
+    )
+    return jsonify({"ack": ack, "queued": True})
+
+
+@app.route("/api/health")
+def health_check():
+    """Liveness and subsystem readiness; answers 200 whenever the process is up."""
+    report = health()
+    if not engine_lock_held:
+        # The engine may run in another process; show what it last reported
+        report["engine"] = shared_state.published("health")
+    return jsonify(report)
+
+
+@app.route("/api/ready")
+@app.route("/api/ready/<subsystem>")
+def readiness(subsystem=None):
+    """
+    Readiness probe: 200 when this process (or one subsystem) is ready,
+    503 while it is still starting or has failed.
+    """
+    report = health()
+    if subsystem is None:
+        ready = report["ready"]
+    elif subsystem in report["subsystems"]:
+        ready = report["subsystems"][subsystem] in ("ready", "running", "online")
+    else:
+        return jsonify({"error": f"Unknown subsystem '{subsystem}'"}), 404
+    return jsonify(report), 200 if ready else 503
 
 
 @app.route("/api/status")
 def get_status():
-    return jsonify(current_status)
+    return jsonify(shared_status())
+
+
+@app.route("/api/incidents")
+def incidents():
+    return jsonify(shared_state.published("incidents", []))
 
 
 @app.route("/api/settings", methods=["GET", "POST"])
 def settings():
-    global ESP_IP, SMOKE_THRESHOLD, TEMP_THRESHOLD
-
     if request.method == "POST":
-        data = request.json
-        ESP_IP = data.get("esp_ip", ESP_IP)
-        SMOKE_THRESHOLD = data.get("smoke_threshold", SMOKE_THRESHOLD)
-        TEMP_THRESHOLD = data.get("temp_threshold", TEMP_THRESHOLD)
+        data = request.json or {}
+        shared_state.update(
+            "settings",
+            {
+                key: data[key]
+                for key in ("esp_ip", "smoke_threshold", "temp_threshold")
+                if key in data
+            },
+        )
         return jsonify({"status": "updated"})
 
-    return jsonify(
-        {
-            "esp_ip": ESP_IP,
-            "smoke_threshold": SMOKE_THRESHOLD,
-            "temp_threshold": TEMP_THRESHOLD,
-        }
+    defaults = {
+        "esp_ip": ESP_IP,
+        "smoke_threshold": SMOKE_THRESHOLD,
+        "temp_threshold": TEMP_THRESHOLD,
+    }
+    return jsonify(dict(defaults, **shared_state.get("settings", {})))
+
+
+@app.route("/api/history")
+def history():
+    """
+    Downsampled sensor history for one node.
+
+    Query parameters: node (default "default"), start/end (epoch seconds,
+    default the last hour) and buckets (default 200).
+    """
+    try:
+        end = finite_number(request.args.get("end", time.time()))
+        start = finite_number(request.args.get("start", end - 3600))
+    except ValueError:
+        return jsonify({"error": "start and end must be finite numbers"}), 400
+    if start >= end:
+        return jsonify({"error": "start must be before end"}), 400
+    node_id = request.args.get("node", "default")
+    buckets = request.args.get("buckets", 200, type=int)
+    return jsonify(history_store.query(node_id, start, end, buckets))
+
+
+@app.route("/api/nodes", methods=["GET", "POST"])
+def nodes():
+    if request.method == "POST":
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "expected a JSON object"}), 400
+        node_id = data.get("node_id")
+        ip = data.get("ip")
+        roles = data.get("roles", list(NODE_ROLES))
+        if not all(isinstance(value, str) and value for value in (node_id, ip)):
+            return jsonify({"error": "node_id and ip are required strings"}), 400
+        if not isinstance(roles, list) or not all(role in NODE_ROLES for role in roles):
+            return jsonify({"error": f"roles must be a subset of {NODE_ROLES}"}), 400
+        try:
+            timeout = finite_number(data.get("timeout", NODE_TIMEOUT))
+        except (TypeError, ValueError):
+            timeout = 0
+        if timeout <= 0:
+            return jsonify({"error": "timeout must be a positive number"}), 400
+        config = {"ip": ip, "timeout": timeout, "roles": roles}
+        shared_state.update("node_config", {node_id: config})
+        return jsonify({"status": "registered", "node": dict(config, node_id=node_id)})
+
+    return jsonify(shared_state.published("nodes", []))
+
+
+@app.route("/api/nodes/<node_id>", methods=["DELETE"])
+def remove_node(node_id):
+    if node_id == "default":
+        # Re-registered from the settings' ESP32 IP on every engine sync
+        return (
+            jsonify({"error": "the default node follows the ESP32 IP setting"}),
+            400,
+        )
+    known = {node["node_id"] for node in shared_state.published("nodes", [])}
+    if shared_state.get("node_config", {}).get(node_id) is None and (
+        node_id not in known
+    ):
+        return jsonify({"error": "unknown node"}), 404
+    shared_state.update("node_config", {node_id: None})
+    return jsonify({"status": "removed"})
+
+
+@app.route("/video_feed")
+def video_feed():
+    level = request.args.get("level", type=int)
+    return Response(
+        frame_broadcaster.mjpeg(level),
+        mimetype=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
     )
 
 
+@app.route("/api/stream_clients")
+def stream_clients():
+    return jsonify(frame_broadcaster.clients())
+
+
+@app.route("/api/scheduler")
+def scheduler_status():
+    return jsonify(shared_state.published("scheduler", inference_scheduler.to_dict()))
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 @socketio.on("connect")
 def handle_connect():
-    emit("status_update", current_status)
+    # One full snapshot; later status_update events only carry changed fields
+    emit("status_update", shared_status())
 
 
 @socketio.on("disconnect")
 def handle_disconnect():
+    frame_broadcaster.remove_socket_client(request.sid)
     print("Client disconnected")
 
 
+@socketio.on("video_subscribe")
+def handle_video_subscribe(data=None):
+    frame_broadcaster.add_socket_client(request.sid, (data or {}).get("level"))
+
+
+@socketio.on("video_unsubscribe")
+def handle_video_unsubscribe():
+    frame_broadcaster.remove_socket_client(request.sid)
+
+
+@socketio.on("frame_ack")
+def handle_frame_ack(data):
+    frame_broadcaster.ack(request.sid, data.get("seq"))
+
+
+# Served by an --engine-only process: live video needs the engine's frames
+STREAM_ENDPOINTS = {"video_feed", "stream_clients"}
+
+
+def stream_only():
+    """Refuse every request but the live video (Socket.IO is handled before)."""
+    if request.endpoint not in STREAM_ENDPOINTS:
+        return jsonify({"error": "This process only serves the video stream"}), 404
+
+
+@atexit.register
+def flush_history():
+    history_store.stop()
+
+
+@atexit.register
+def stop_inference_pool():
+    if inference_pool is not None:
+        inference_pool.stop()
+
+
+@atexit.register
+def release_engine():
+    shared_state.release_engine_lock()
+
+
+# Exactly one process per site runs the engine; the others stand by
+engine_thread = None
+if RUN_ENGINE:
+    engine_thread = threading.Thread(
+        target=run_engine, name="engine-supervisor", daemon=True
+    )
+    engine_thread.start()
+
+
 if __name__ == "__main__":
     # Create templates directory if it doesn't exist
     os.makedirs("templates", exist_ok=True)
     os.makedirs("static", exist_ok=True)
 
-    socketio.run(app, debug=True, host="0.0.0.0", port=5000)
+    engine_only = "--engine-only" in sys.argv
+    if engine_only:
+        # Run the engine without the web interface, serving only the video
+        # stream (and its sockets) on STREAM_PORT
+        if engine_thread is None:
+            sys.exit("--engine-only needs RUN_ENGINE enabled")
+        app.before_request(stream_only)
+
+    # The cooperative modes serve with their own production WSGI server;
+    # threading mode is the development server, also when run as a service
+    socketio.run(
+        app,
+        debug=ASYNC_MODE == "threading" and not engine_only,
+        host="0.0.0.0",
+        port=STREAM_PORT if engine_only else 5000,
+        allow_unsafe_werkzeug=True,
+    )
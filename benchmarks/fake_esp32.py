@@ -0,0 +1,314 @@
+"""
+Local stand-in for the ESP32 sensor node HTTP API.
+
+Serves /smoke, /temperature, /trigger_alarm and /stop_alarm like
+ESP32_Setup.ino, replaying a scripted sensor curve and optionally injecting
+latency and failures. With a push URL it also posts batched samples to the
+server's /api/ingest, like the firmware with serverUrl set.
+
+Usage:
+    python -m benchmarks.fake_esp32 --port 8081 --scenario fire --latency 0.05
+    python -m benchmarks.fake_esp32 --curve recorded.csv --failure-rate 0.1
+    python -m benchmarks.fake_esp32 --push http://localhost:5000/api/ingest
+"""
+
+import argparse
+import csv
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+# Scripted curves: (seconds since start, value) keyframes, linearly interpolated
+SCENARIOS = {
+    "normal": {
+        "smoke": [(0, 1200), (600, 1250)],
+        "temperature": [(0, 24), (600, 25)],
+    },
+    "fire": {
+        "smoke": [(0, 1200), (5, 1300), (8, 3200), (120, 3600)],
+        "temperature": [(0, 24), (8, 25), (14, 45), (120, 80)],
+    },
+    "spike": {
+        "smoke": [(0, 1200), (5, 1200), (5.5, 3400), (6, 1200), (600, 1200)],
+        "temperature": [(0, 24), (600, 24)],
+    },
+    "slow_rise": {
+        "smoke": [(0, 1200), (60, 2500), (120, 2700)],
+        "temperature": [(0, 24), (120, 30)],
+    },
+}
+
+NOISE = {"smoke": 15.0, "temperature": 0.2}  # Standard deviation added to readings
+SAMPLE_INTERVAL = 1.0  # Seconds between pushed samples
+PUSH_INTERVAL = 2.0  # Seconds between pushed batches
+MAX_PENDING = 60  # Unacknowledged samples kept while the server is unreachable
+
+
+def load_curve(path):
+    """
+    Load a recorded curve from CSV with columns t, smoke, temperature.
+
+    Returns:
+        dict: Keyframes per sensor, in the same shape as SCENARIOS entries
+    """
+    curve = {"smoke": [], "temperature": []}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            t = float(row["t"])
+            for sensor in curve:
+                if row.get(sensor) not in (None, ""):
+                    curve[sensor].append((t, float(row[sensor])))
+    return curve
+
+
+class FakeESP32:
+    """A threaded HTTP server that behaves like one ESP32 sensor node."""
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        curve="fire",
+        latency=0.0,
+        jitter=0.0,
+        failure_rate=0.0,
+        noise=True,
+        seed=None,
+        push_url=None,
+        node_id="default",
+        sample_interval=SAMPLE_INTERVAL,
+        push_interval=PUSH_INTERVAL,
+    ):
+        self.curve = SCENARIOS[curve] if isinstance(curve, str) else curve
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.noise = noise
+        self.random = random.Random(seed)
+        self.requests = {
+            "smoke": 0,
+            "temperature": 0,
+            "trigger_alarm": 0,
+            "stop_alarm": 0,
+            "push": 0,
+        }
+        self.failures = 0
+        self.alarm_events = []  # (seconds since start, "trigger" | "stop")
+        self.alarm_active = False
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+        self.push_url = push_url
+        self.node_id = node_id
+        self.sample_interval = sample_interval
+        self.push_interval = push_interval
+        self.boot_id = f"{self.random.getrandbits(32):08x}"
+        self._pending = []  # Samples not yet acknowledged by the server
+        self._next_seq = 1
+        self._stopped = threading.Event()
+        self._push_thread = None
+
+    @property
+    def address(self):
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def elapsed(self):
+        return time.monotonic() - self._started_at
+
+    def value(self, sensor, t=None):
+        keyframes = self.curve[sensor]
+        t = self.elapsed() if t is None else t
+        times, values = zip(*keyframes)
+        value = float(np.interp(t, times, values))
+        if self.noise:
+            value += self.random.gauss(0, NOISE[sensor])
+        return value
+
+    def first_crossing(self, sensor, threshold, step=0.05):
+        """Scripted time (seconds) at which a sensor first exceeds ``threshold``."""
+        times, values = zip(*self.curve[sensor])
+        for t in np.arange(0, times[-1] + step, step):
+            if np.interp(t, times, values) > threshold:
+                return float(t)
+        return None
+
+    def start(self):
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-esp32", daemon=True
+        )
+        self._thread.start()
+        if self.push_url:
+            self._stopped.clear()
+            self._push_thread = threading.Thread(
+                target=self._push_loop, name="fake-esp32-push", daemon=True
+            )
+            self._push_thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._push_thread is not None:
+            self._push_thread.join()
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _push_loop(self):
+        session = requests.Session()
+        next_push = time.monotonic() + self.push_interval
+        while not self._stopped.wait(self.sample_interval):
+            t = self.elapsed()
+            self._pending.append(
+                {
+                    "seq": self._next_seq,
+                    "t": round(t, 3),
+                    "smoke": int(max(0, min(4095, self.value("smoke", t)))),
+                    "temperature": round(self.value("temperature", t), 2),
+                }
+            )
+            self._next_seq += 1
+            del self._pending[:-MAX_PENDING]
+            if time.monotonic() >= next_push:
+                next_push = time.monotonic() + self.push_interval
+                self.push(session)
+
+    def push(self, session=requests):
+        """POST the unacknowledged samples; drop the ones the server acks."""
+        with self._lock:
+            self.requests["push"] += 1
+        try:
+            response = session.post(
+                self.push_url,
+                json={
+                    "node_id": self.node_id,
+                    "boot_id": self.boot_id,
+                    "ip": self.address,
+                    "sent_at": round(self.elapsed(), 3),
+                    "samples": self._pending,
+                },
+                timeout=5,
+            )
+            response.raise_for_status()
+            ack = response.json()["ack"]
+        except (requests.exceptions.RequestException, ValueError, KeyError):
+            with self._lock:
+                self.failures += 1
+            return
+        self._pending = [s for s in self._pending if s["seq"] > ack]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "address": self.address,
+                "requests": dict(self.requests),
+                "failures": self.failures,
+                "alarm_events": list(self.alarm_events),
+            }
+
+    def _handler_class(self):
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the ESP32 WebServer
+
+            def log_message(self, format, *args):
+                pass
+
+            def _inject(self, endpoint):
+                with node._lock:
+                    node.requests[endpoint] += 1
+                delay = node.latency + node.random.uniform(0, node.jitter)
+                if delay > 0:
+                    time.sleep(delay)
+                if node.random.random() < node.failure_rate:
+                    with node._lock:
+                        node.failures += 1
+                    self.send_error(503)
+                    return False
+                return True
+
+            def _reply(self, body, content_type):
+                data = body.encode()
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                endpoint = self.path.strip("/")
+                if endpoint not in ("smoke", "temperature"):
+                    self.send_error(404)
+                    return
+                if not self._inject(endpoint):
+                    return
+                value = node.value(endpoint)
+                if endpoint == "smoke":
+                    body = str(int(max(0, min(4095, value))))
+                else:
+                    body = f"{value:.2f}"
+                self._reply(body, "application/json")
+
+            def do_POST(self):
+                endpoint = self.path.strip("/")
+                if endpoint not in ("trigger_alarm", "stop_alarm"):
+                    self.send_error(404)
+                    return
+                if not self._inject(endpoint):
+                    return
+                with node._lock:
+                    node.alarm_active = endpoint == "trigger_alarm"
+                    event = "trigger" if node.alarm_active else "stop"
+                    node.alarm_events.append((round(node.elapsed(), 3), event))
+                self._reply(
+                    "Alarm activated" if node.alarm_active else "Alarm stopped",
+                    "text/plain",
+                )
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--scenario", default="fire", choices=sorted(SCENARIOS))
+    parser.add_argument("--curve", help="CSV file with t, smoke, temperature columns")
+    parser.add_argument("--latency", type=float, default=0.0, help="Added delay (s)")
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Random extra delay (s)"
+    )
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--push", help="Also push samples to this /api/ingest URL")
+    parser.add_argument("--node-id", default="default", help="Node ID when pushing")
+    args = parser.parse_args()
+
+    node = FakeESP32(
+        args.host,
+        args.port,
+        curve=load_curve(args.curve) if args.curve else args.scenario,
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        push_url=args.push,
+        node_id=args.node_id,
+    ).start()
+    print(f"Fake ESP32 listening on http://{node.address} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(json.dumps(node.stats(), indent=2))
+        node.stop()
+
+
+if __name__ == "__main__":
+    main()
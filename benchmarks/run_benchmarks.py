@@ -0,0 +1,448 @@
+"""
+End-to-end benchmarks for the fire detection system.
+
+Scenarios:
+    sensor_sweep   Concurrent polling of simulated ESP32 nodes
+    sensor_drift   Escalations caused by a sustained harmless smoke offset
+    inference      Model FPS and per-frame latency on synthetic or recorded video
+    prefilter      Share of frames the motion/colour prefilter keeps from the model
+    streaming      JPEG encode cost per stream quality level
+    time_to_alarm  Full pipeline against a simulated fire (smoke -> alarm)
+    async_verification  Camera verification under ASYNC_MODE=eventlet (loop stalls)
+
+Usage:
+    python -m benchmarks.run_benchmarks --output bench_results.json
+    python -m benchmarks.run_benchmarks --scenario inference --video clip.mp4
+
+Results are written as JSON so runs can be compared between releases.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.fake_esp32 import FakeESP32
+from camera_capture import open_camera
+from prefilter import FramePrefilter
+
+
+def percentiles(samples):
+    if not samples:
+        return {}
+    values = np.asarray(samples) * 1000.0
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p90_ms": round(float(np.percentile(values, 90)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def measure(scenario, *args, **kwargs):
+    """
+    Run a scenario and add wall time, CPU use and peak memory to its result.
+
+    Returns:
+        dict: The scenario's own metrics plus a "resources" entry
+    """
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    result = scenario(*args, **kwargs)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    result["resources"] = {
+        "wall_s": round(wall, 3),
+        "cpu_s": round(cpu, 3),
+        "cpu_percent": round(100.0 * cpu / wall, 1) if wall else 0.0,
+        "max_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1
+        ),
+    }
+    return result
+
+
+def read_frames(source, count):
+    cap = open_camera(source)
+    frames = []
+    try:
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+    finally:
+        cap.release()
+    return frames
+
+
+def bench_sensor_sweep(nodes=20, latency=0.2, sweeps=10, dead_nodes=2):
+    """A sweep over N nodes should cost about one node's latency, not N."""
+    from sensor_nodes import NodeRegistry, SensorPoller
+
+    fakes = [
+        FakeESP32(curve="normal", latency=latency, jitter=latency / 4).start()
+        for _ in range(nodes)
+    ]
+    dead = [
+        FakeESP32(curve="normal", failure_rate=1.0).start() for _ in range(dead_nodes)
+    ]
+    registry = NodeRegistry()
+    for index, fake in enumerate(fakes + dead):
+        registry.add(f"node_{index}", fake.address)
+    poller = SensorPoller(registry)
+
+    durations = []
+    readings = 0
+    try:
+        for _ in range(sweeps):
+            start = time.perf_counter()
+            readings += len(poller.sweep("smoke"))
+            durations.append(time.perf_counter() - start)
+    finally:
+        poller.close()
+        for fake in fakes + dead:
+            fake.stop()
+
+    return {
+        "nodes": nodes,
+        "dead_nodes": dead_nodes,
+        "injected_latency_ms": latency * 1000,
+        "sweeps": sweeps,
+        "readings": readings,
+        "dead_node_requests": sum(fake.stats()["requests"]["smoke"] for fake in dead),
+        "sweep": percentiles(durations),
+        "sequential_estimate_ms": round(nodes * latency * 1000, 1),
+    }
+
+
+def bench_sensor_drift(
+    offset=150, hours=1.0, interval=5.0, noise=15.0, max_escalations=2
+):
+    """
+    A smoke level that steps up by ``offset`` and stays there (a dusty
+    sensor, a nearby kitchen) should escalate once: every verification
+    clears it and rearms the detector with the new level as its baseline.
+    Only the trend detectors are exercised; the threshold is out of reach.
+    """
+    from sensor_filters import TrendMonitor
+
+    rng = np.random.default_rng(0)
+    offset_at = 600.0  # Clean air for ten minutes first
+    results = {}
+    for rebaseline in (True, False):
+        monitor = TrendMonitor()
+        escalations = []
+        t = 0.0
+        while t < offset_at + hours * 3600:
+            value = 1200 + (offset if t >= offset_at else 0) + rng.normal(0, noise)
+            escalation, _ = monitor.update({"default": value}, t, math.inf)
+            if escalation is not None:
+                escalations.append((round(t - offset_at, 1), escalation[1]))
+                monitor.rearm(rebaseline)  # Verification found no fire
+            t += interval
+        results["rearm_rebaseline" if rebaseline else "rearm_only"] = {
+            "escalations": len(escalations),
+            "first": escalations[:3],
+        }
+
+    return {
+        "offset": offset,
+        "hours": hours,
+        "sample_interval_s": interval,
+        **results,
+        "passed": results["rearm_rebaseline"]["escalations"] <= max_escalations,
+    }
+
+
+def bench_inference(source, frames=200, batch_sizes=(1, 4, 8), backend="pytorch"):
+    """Per-frame latency and throughput of the model, single and batched."""
+    from inference_backends import filter_detections, load_backend
+
+    model = load_backend(backend)
+    samples = read_frames(source, frames)
+    if not samples:
+        return {"error": f"no frames from {source}"}
+
+    allowed = np.array(list(model.names))
+    model.predict(samples[0], verbose=False)  # Warm-up
+
+    latencies = []
+    fire_frames = 0
+    start = time.perf_counter()
+    for frame in samples:
+        t0 = time.perf_counter()
+        result = model.predict(frame, verbose=False)[0]
+        latencies.append(time.perf_counter() - t0)
+        if len(filter_detections(result, allowed, 0.5)[1]):
+            fire_frames += 1
+    elapsed = time.perf_counter() - start
+
+    prefilter = FramePrefilter()
+    start = time.perf_counter()
+    for frame in samples:
+        if prefilter.should_infer(frame):
+            model.predict(frame, verbose=False)
+    gated_elapsed = time.perf_counter() - start
+
+    batched = {}
+    for batch_size in batch_sizes:
+        if batch_size <= 1:
+            continue
+        t0 = time.perf_counter()
+        processed = 0
+        for offset in range(0, len(samples) - batch_size + 1, batch_size):
+            model.predict(samples[offset : offset + batch_size], verbose=False)
+            processed += batch_size
+        batch_elapsed = time.perf_counter() - t0
+        if processed:
+            batched[str(batch_size)] = {
+                "fps": round(processed / batch_elapsed, 2),
+                "per_frame_ms": round(1000 * batch_elapsed / processed, 3),
+            }
+
+    return {
+        "source": str(source),
+        "backend": backend,
+        "frames": len(samples),
+        "resolution": list(samples[0].shape[1::-1]),
+        "fps": round(len(samples) / elapsed, 2),
+        "latency": percentiles(latencies),
+        "frames_with_detections": fire_frames,
+        "batched": batched,
+        "prefiltered": dict(
+            prefilter.stats(), fps=round(len(samples) / gated_elapsed, 2)
+        ),
+    }
+
+
+def bench_prefilter(source, frames=200):
+    """Prefilter cost per frame and how many frames it keeps from the model."""
+    samples = read_frames(source, frames)
+    prefilter = FramePrefilter()
+    durations = []
+    reasons = {}
+    for frame in samples:
+        t0 = time.perf_counter()
+        prefilter.should_infer(frame)
+        durations.append(time.perf_counter() - t0)
+        reason = prefilter.last_reason or "skipped"
+        reasons[reason] = reasons.get(reason, 0) + 1
+    return dict(
+        prefilter.stats(),
+        source=str(source),
+        reasons=reasons,
+        latency=percentiles(durations),
+    )
+
+
+def bench_streaming(source, frames=100):
+    """JPEG encode cost per stream quality level."""
+    from streaming import QUALITY_LEVELS, FrameBroadcaster
+
+    samples = read_frames(source, frames)
+    broadcaster = FrameBroadcaster()
+    levels = {}
+    for level, (quality, max_width) in enumerate(QUALITY_LEVELS):
+        durations = []
+        sizes = []
+        for frame in samples:
+            t0 = time.perf_counter()
+            data = broadcaster._encode(frame, level)
+            durations.append(time.perf_counter() - t0)
+            sizes.append(len(data))
+        levels[f"q{quality}_w{max_width or 'full'}"] = {
+            "encode": percentiles(durations),
+            "mean_kb": round(float(np.mean(sizes)) / 1024, 1),
+        }
+    return {"source": str(source), "frames": len(samples), "levels": levels}
+
+
+def bench_time_to_alarm(source, timeout=90.0, sensor_latency=0.02):
+    """
+    Run the real monitoring pipeline against a simulated fire and measure
+    the time from the scripted smoke crossing to the alarm reaching the node.
+    """
+    import app
+
+    # The model loads in the background; timing starts once it is ready, so
+    # camera verification is not skipped and load time is not counted
+    if app.model_loader is not None:
+        app.model_loader.join()
+    if app.model is None:
+        raise RuntimeError(
+            f"detection model {app.model_state['status']}: {app.model_state['error']}"
+        )
+
+    fake = FakeESP32(curve="fire", latency=sensor_latency).start()
+    app.CAMERA_INDEX = source
+
+    smoke_crossing = fake.first_crossing("smoke", app.SMOKE_THRESHOLD)
+    # Go through the shared state like the web interface does
+    app.shared_state.update("settings", {"esp_ip": fake.address})
+    app.shared_state.set("monitoring", True)
+
+    deadline = time.monotonic() + timeout
+    try:
+        while time.monotonic() < deadline:
+            events = fake.stats()["alarm_events"]
+            if any(event == "trigger" for _, event in events):
+                break
+            time.sleep(0.05)
+    finally:
+        app.shared_state.set("monitoring", False)
+        app.current_status["alarm_active"] = False
+        app.notify_state_changed()
+        if app.monitoring_thread is not None:
+            app.monitoring_thread.join(timeout=10)
+        fake.stop()
+
+    triggers = [t for t, event in fake.stats()["alarm_events"] if event == "trigger"]
+    incidents = app.incident_log.to_list()
+    return {
+        "source": str(source),
+        "smoke_crossing_s": smoke_crossing,
+        "alarm_at_s": triggers[0] if triggers else None,
+        "time_to_alarm_s": (
+            round(triggers[0] - smoke_crossing, 3)
+            if triggers and smoke_crossing is not None
+            else None
+        ),
+        "incidents": incidents,
+        "sensor_requests": fake.stats()["requests"],
+    }
+
+
+def bench_async_verification(mode="eventlet", duration=5.0):
+    """
+    Run a camera verification in a server process started in a cooperative
+    async mode and report how long its event loop went without running.
+    The mode has to be set before app is imported, hence the subprocess.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".json") as output:
+        completed = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.async_verification",
+                "--duration",
+                str(duration),
+                "--output",
+                output.name,
+            ],
+            env=dict(os.environ, ASYNC_MODE=mode),
+            capture_output=True,
+            text=True,
+            timeout=duration + 120,
+        )
+        text = open(output.name).read()
+    if not text:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return json.loads(text)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=[
+            "sensor_sweep",
+            "sensor_drift",
+            "inference",
+            "prefilter",
+            "streaming",
+            "time_to_alarm",
+            "async_verification",
+        ],
+        help="Scenario to run (repeatable; default all)",
+    )
+    parser.add_argument("--video", help="Video file to use instead of synthetic frames")
+    parser.add_argument("--backend", default="pytorch", help="Inference backend")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--nodes", type=int, default=20)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    scenarios = args.scenario or [
+        "sensor_sweep",
+        "sensor_drift",
+        "inference",
+        "prefilter",
+        "streaming",
+        "time_to_alarm",
+        "async_verification",
+    ]
+    offline_source = (
+        args.video or "synthetic://fire?start=2&realtime=0&width=1280&height=720"
+    )
+    live_source = args.video or "synthetic://fire?start=0&fps=15"
+
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "scenarios": {},
+    }
+    runners = {
+        "sensor_sweep": lambda: measure(bench_sensor_sweep, nodes=args.nodes),
+        "sensor_drift": lambda: measure(bench_sensor_drift),
+        "inference": lambda: measure(
+            bench_inference, offline_source, args.frames, backend=args.backend
+        ),
+        "prefilter": lambda: measure(bench_prefilter, offline_source, args.frames),
+        "streaming": lambda: measure(bench_streaming, offline_source),
+        "time_to_alarm": lambda: measure(bench_time_to_alarm, live_source),
+        "async_verification": lambda: bench_async_verification(),
+    }
+    for name in scenarios:
+        print(f"Running {name}...")
+        try:
+            results["scenarios"][name] = runners[name]()
+        except Exception as e:
+            results["scenarios"][name] = {"error": str(e)}
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"✅ Results written to {args.output}")
+    else:
+        print(output)
+
+    # Scenarios that check behaviour report "passed"
+    failed = [
+        name
+        for name, result in results["scenarios"].items()
+        if result.get("passed") is False
+    ]
+    if failed:
+        print(f"❌ Failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
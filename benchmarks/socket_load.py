@@ -0,0 +1,378 @@
+"""
+WebSocket load test: many simulated dashboards against one server.
+
+Opens N Socket.IO connections, drives the monitoring pipeline with a
+simulated ESP32 node and reports connect times, broadcast latency (from
+the server sending a ``log_batch`` to each client receiving it) and the
+server's CPU use. Clients speak Engine.IO v4 over a plain asyncio
+WebSocket, so no client library is needed and thousands of them fit in
+one process.
+
+Usage:
+    python -m benchmarks.socket_load --spawn eventlet --clients 2000
+    python -m benchmarks.socket_load --url http://localhost:5000 --pid 12345
+
+Latency compares wall clocks, so run the tool on the server's host.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import resource
+import signal
+import struct
+import subprocess
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+import requests
+
+from benchmarks.fake_esp32 import FakeESP32
+from benchmarks.run_benchmarks import percentiles
+
+CONNECT_CONCURRENCY = 100  # Handshakes in flight at once
+CONNECT_TIMEOUT = 30  # Seconds allowed for one client's handshake
+SERVER_START_TIMEOUT = 180  # Seconds for a spawned server to answer (model load)
+
+
+class LoadClient:
+    """One simulated dashboard: a Socket.IO connection that only listens."""
+
+    def __init__(self, host, port, latencies):
+        self.host = host
+        self.port = port
+        self.latencies = latencies  # Shared list of broadcast latencies (seconds)
+        self.connect_seconds = None
+        self.events = 0
+        self.error = None
+        self._reader = None
+        self._writer = None
+
+    async def connect(self):
+        start = time.perf_counter()
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self._writer.write(
+            (
+                "GET /socket.io/?EIO=4&transport=websocket HTTP/1.1\r\n"
+                f"Host: {self.host}:{self.port}\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\n"
+                "Sec-WebSocket-Version: 13\r\n\r\n"
+            ).encode()
+        )
+        response = await self._reader.readuntil(b"\r\n\r\n")
+        status_line = response.split(b"\r\n", 1)[0].decode(errors="replace")
+        if status_line.split()[1:2] != ["101"]:
+            raise ConnectionError(status_line)
+
+        opened = await self._receive()  # Engine.IO open packet
+        if opened is None or not opened.startswith("0"):
+            raise ConnectionError(f"unexpected open packet {opened!r}")
+        self._send("40")  # Join the default namespace
+        while True:
+            message = await self._receive()
+            if message is None:
+                raise ConnectionError("closed during namespace connect")
+            if message.startswith("40"):
+                break
+            self._handle(message)
+        self.connect_seconds = time.perf_counter() - start
+
+    async def listen(self):
+        while True:
+            message = await self._receive()
+            if message is None:
+                return
+            self._handle(message)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    def _handle(self, message):
+        if message == "2":
+            self._send("3")  # Engine.IO heartbeat
+        elif message.startswith("42"):
+            received = time.time()
+            name, payload = json.loads(message[2:])[:2]
+            self.events += 1
+            if name == "log_batch" and "sent_at" in payload:
+                self.latencies.append(received - payload["sent_at"])
+
+    def _send(self, text, opcode=0x1):
+        data = text.encode() if isinstance(text, str) else text
+        header = bytearray([0x80 | opcode])
+        if len(data) < 126:
+            header.append(0x80 | len(data))
+        elif len(data) < 65536:
+            header.append(0x80 | 126)
+            header += struct.pack("!H", len(data))
+        else:
+            header.append(0x80 | 127)
+            header += struct.pack("!Q", len(data))
+        mask = os.urandom(4)
+        header += mask
+        self._writer.write(
+            bytes(header) + bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+        )
+
+    async def _receive(self):
+        """
+        Returns:
+            str: The next text message, or None once the server closes
+        """
+        parts = []
+        message_opcode = None
+        while True:
+            try:
+                head = await self._reader.readexactly(2)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return None
+            opcode = head[0] & 0x0F
+            length = head[1] & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await self._reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await self._reader.readexactly(8))[0]
+            mask = await self._reader.readexactly(4) if head[1] & 0x80 else None
+            data = await self._reader.readexactly(length)
+            if mask is not None:
+                data = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                self._send(data, opcode=0xA)
+                continue
+            if opcode == 0xA:
+                continue
+            if opcode != 0x0:
+                message_opcode = opcode
+            parts.append(data)
+            if head[0] & 0x80:
+                if message_opcode == 0x1:
+                    return b"".join(parts).decode()
+                parts = []  # Binary attachments are not used by the dashboard
+
+
+def process_tree_cpu(pid):
+    """
+    CPU seconds used so far by ``pid`` and its descendants (Linux only).
+
+    Returns:
+        float: User plus system time, or None if it cannot be read
+    """
+    if pid is None or not os.path.isdir("/proc"):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    parents = {}
+    cpu = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        fields = stat[stat.rindex(")") + 2 :].split()
+        parents[int(entry)] = int(fields[1])
+        cpu[int(entry)] = (int(fields[11]) + int(fields[12])) / ticks
+    if pid not in cpu:
+        return None
+
+    total = 0.0
+    for process, seconds in cpu.items():
+        ancestor = process
+        while ancestor > 1 and ancestor != pid:
+            ancestor = parents.get(ancestor, 0)
+        if ancestor == pid:
+            total += seconds
+    return total
+
+
+def spawn_server(mode, log_path=None):
+    """
+    Start app.py in ``mode`` (threading, eventlet or gevent) and wait until
+    it answers.
+
+    Returns:
+        subprocess.Popen: The server, leader of its own process group
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    log = open(log_path, "w") if log_path else subprocess.DEVNULL
+    server = subprocess.Popen(
+        [sys.executable, "app.py"],
+        cwd=root,
+        env=dict(os.environ, ASYNC_MODE=mode),
+        stdout=log,
+        stderr=subprocess.STDOUT,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with code {server.returncode}")
+        try:
+            requests.get("http://localhost:5000/api/status", timeout=1)
+            return server
+        except requests.exceptions.RequestException:
+            time.sleep(0.5)
+    stop_server(server)
+    raise RuntimeError("server did not start in time")
+
+
+def stop_server(server):
+    try:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def run_load(url, clients, duration, server_pid=None, drive=True):
+    """
+    Connect ``clients`` dashboards, let the pipeline broadcast for
+    ``duration`` seconds and collect latency and CPU figures.
+
+    Returns:
+        dict: The load test report
+    """
+    target = urlparse(url)
+    host, port = target.hostname, target.port or 80
+    latencies = []
+    load = [LoadClient(host, port, latencies) for _ in range(clients)]
+    gate = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+    async def open_client(client):
+        async with gate:
+            try:
+                await asyncio.wait_for(client.connect(), CONNECT_TIMEOUT)
+            except Exception as e:
+                client.error = f"{type(e).__name__}: {e}"[:80]
+                client.close()
+                return
+        await client.listen()
+
+    cpu_start = process_tree_cpu(server_pid)
+    connect_start = time.perf_counter()
+    tasks = [asyncio.create_task(open_client(client)) for client in load]
+    while any(c.connect_seconds is None and c.error is None for c in load):
+        await asyncio.sleep(0.1)
+    connect_wall = time.perf_counter() - connect_start
+    cpu_connected = process_tree_cpu(server_pid)
+
+    fake = None
+    started_monitoring = False
+    if drive:
+        # Smoke readings make the pipeline broadcast status and log lines
+        fake = FakeESP32(curve="normal").start()
+        await asyncio.to_thread(
+            requests.post,
+            f"{url}/api/settings",
+            json={"esp_ip": fake.address},
+            timeout=5,
+        )
+        response = await asyncio.to_thread(
+            requests.post, f"{url}/api/start_monitoring", timeout=5
+        )
+        started_monitoring = not response.json().get("already_running", False)
+
+    steady_start = time.perf_counter()
+    client_cpu_start = time.process_time()
+    await asyncio.sleep(duration)
+    steady_wall = time.perf_counter() - steady_start
+    client_cpu = time.process_time() - client_cpu_start
+    cpu_end = process_tree_cpu(server_pid)
+
+    if started_monitoring:
+        await asyncio.to_thread(requests.post, f"{url}/api/stop_monitoring", timeout=5)
+    if fake is not None:
+        fake.stop()
+    for client in load:
+        client.close()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    connected = [c for c in load if c.connect_seconds is not None]
+    report = {
+        "url": url,
+        "clients": clients,
+        "connected": len(connected),
+        "errors": dict(Counter(c.error for c in load if c.error).most_common(5)),
+        "connect": percentiles([c.connect_seconds for c in connected]),
+        "connect_wall_s": round(connect_wall, 3),
+        "duration_s": round(steady_wall, 3),
+        "events_received": sum(c.events for c in load),
+        "broadcast_latency": percentiles(latencies),
+        "broadcast_samples": len(latencies),
+        "client_cpu_percent": round(100.0 * client_cpu / steady_wall, 1),
+    }
+    if None not in (cpu_start, cpu_connected, cpu_end):
+        report["server_cpu_percent"] = {
+            "connect": round(100.0 * (cpu_connected - cpu_start) / connect_wall, 1),
+            "steady": round(100.0 * (cpu_end - cpu_connected) / steady_wall, 1),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument(
+        "--spawn",
+        choices=["threading", "eventlet", "gevent"],
+        help="Start app.py on port 5000 in this async mode for the test",
+    )
+    parser.add_argument("--server-log", help="Write a spawned server's output here")
+    parser.add_argument("--pid", type=int, help="Server process to measure CPU of")
+    parser.add_argument(
+        "--no-drive",
+        action="store_true",
+        help="Do not point the server at a simulated ESP32 or start monitoring",
+    )
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    # Every client is a socket; allow as many as the hard limit permits
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    server = spawn_server(args.spawn, args.server_log) if args.spawn else None
+    try:
+        report = asyncio.run(
+            run_load(
+                args.url,
+                args.clients,
+                args.duration,
+                server_pid=server.pid if server else args.pid,
+                drive=not args.no_drive,
+            )
+        )
+    finally:
+        if server is not None:
+            stop_server(server)
+    report["async_mode"] = args.spawn
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"✅ Results written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
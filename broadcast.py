@@ -0,0 +1,106 @@
+import threading
+import time
+from datetime import datetime
+
+# Broadcast Configuration Parameters
+BROADCAST_INTERVAL = 0.5  # Minimum seconds between two status/log broadcasts
+MAX_LOG_BATCH = 200  # Log lines kept per batch; older lines in a burst are dropped
+
+_MISSING = object()
+
+
+class StatusBroadcaster:
+    """
+    Coalesces status changes and log lines into periodic socket events.
+
+    ``status_update`` carries only the fields that changed since the last
+    broadcast, and ``log_batch`` carries every log line since the last
+    broadcast and the time it was sent (for latency measurements). Bursts
+    are merged into at most one of each per interval. Newly connected
+    clients get one full snapshot and then deltas.
+
+    With a ``store`` (see state_backend.py) each delta is also published, so
+    server processes that do not run the engine serve the same status.
+    """
+
+    def __init__(self, socketio, status, interval=BROADCAST_INTERVAL, store=None):
+        self.socketio = socketio
+        self.status = status  # The live status dict being broadcast
+        self.interval = interval
+        self.store = store
+        self._sent = {}  # Status as last broadcast
+        self._logs = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._urgent = threading.Event()
+        self._running = False
+        self._thread = None
+        self.dropped_logs = 0
+
+    def status_changed(self, urgent=False):
+        """Schedule a status broadcast; ``urgent`` skips the coalescing delay."""
+        if urgent:
+            self._urgent.set()
+        self._wake.set()
+
+    def log(self, message, type="info"):
+        with self._lock:
+            self._logs.append(
+                {
+                    "message": message,
+                    "type": type,
+                    "time": datetime.now().strftime("%H:%M:%S"),
+                }
+            )
+            if len(self._logs) > MAX_LOG_BATCH:
+                self.dropped_logs += len(self._logs) - MAX_LOG_BATCH
+                del self._logs[: len(self._logs) - MAX_LOG_BATCH]
+        self._wake.set()
+
+    def snapshot(self):
+        return dict(self.status)
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="status-broadcast", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        self._urgent.set()
+
+    def flush(self):
+        """Broadcast pending changes now."""
+        current = self.snapshot()
+        delta = {
+            key: value
+            for key, value in current.items()
+            if self._sent.get(key, _MISSING) != value
+        }
+        with self._lock:
+            logs, self._logs = self._logs, []
+
+        if delta:
+            self._sent.update(delta)
+            if self.store is not None:
+                self.store.update_published("status", delta)
+            self.socketio.emit("status_update", delta)
+        if logs:
+            self.socketio.emit("log_batch", {"entries": logs, "sent_at": time.time()})
+
+    def _run(self):
+        while self._running:
+            self._wake.wait()
+            self._wake.clear()
+            self._urgent.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error broadcasting status: {e}")
+            # Hold off the next broadcast so bursts coalesce, unless urgent
+            self._urgent.wait(self.interval)
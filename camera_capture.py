@@ -0,0 +1,260 @@
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+# Capture Configuration Parameters
+RING_SIZE = 4  # Number of preallocated frame slots
+REOPEN_DELAY = 2  # Delay (seconds) before reopening a camera that failed
+SYNTHETIC_SCHEME = "synthetic"  # e.g. "synthetic://fire?start=5&fps=30"
+
+
+def open_camera(source):
+    """
+    Open a camera source.
+
+    ``source`` may be a device index, a video file path or URL (anything
+    cv2.VideoCapture accepts), or a "synthetic://<scene>?..." URL for a
+    generated test feed (see SyntheticCamera).
+    """
+    if isinstance(source, str) and source.startswith(f"{SYNTHETIC_SCHEME}://"):
+        return SyntheticCamera.from_url(source)
+    return cv2.VideoCapture(source)
+
+
+class SyntheticCamera:
+    """
+    Stand-in for cv2.VideoCapture that generates frames, for demos and
+    benchmarks without camera hardware.
+
+    Scenes: "static" (noise only), "motion" (a moving block) and "fire" (a
+    flickering orange blob that appears after ``start`` seconds and grows).
+    With ``realtime`` off, frames are produced as fast as they are read and
+    time advances by 1/fps per frame.
+    """
+
+    def __init__(
+        self, scene="static", width=640, height=480, fps=30, start=0.0, realtime=True
+    ):
+        self.scene = scene
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.start = start
+        self.realtime = realtime
+        self.frame_index = 0
+        self._opened = True
+        self._started_at = time.monotonic()
+        rng = np.random.default_rng(0)
+        gradient = np.linspace(40, 120, width, dtype=np.float32)[None, :, None]
+        noise = rng.normal(0, 4, (height, width, 3)).astype(np.float32)
+        self._background = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+
+    @classmethod
+    def from_url(cls, url):
+        parsed = urlparse(url)
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        return cls(
+            scene=parsed.netloc or "static",
+            width=int(query.get("width", 640)),
+            height=int(query.get("height", 480)),
+            fps=float(query.get("fps", 30)),
+            start=float(query.get("start", 0)),
+            realtime=query.get("realtime", "1") != "0",
+        )
+
+    def isOpened(self):
+        return self._opened
+
+    def release(self):
+        self._opened = False
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+        }.get(prop, 0)
+
+    def read(self, image=None):
+        if not self._opened:
+            return False, None
+        if self.realtime:
+            due = self._started_at + self.frame_index / self.fps
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        t = self.frame_index / self.fps
+        self.frame_index += 1
+        if image is None or image.shape != self._background.shape:
+            image = np.empty_like(self._background)
+        np.copyto(image, self._background)
+
+        if self.scene == "motion":
+            x = int((t * 80) % max(1, self.width - 60))
+            image[self.height // 2 - 30 : self.height // 2 + 30, x : x + 60] = 200
+        elif self.scene == "fire" and t >= self.start:
+            radius = int(min(self.height / 3, 10 + 20 * (t - self.start)))
+            flicker = int(radius * (0.15 * np.sin(t * 25)))
+            center = (self.width // 2, self.height - radius - 10)
+            axes = (radius, max(1, radius + flicker))
+            cv2.ellipse(image, center, axes, 0, 0, 360, (0, 120, 255), -1)
+            cv2.ellipse(
+                image,
+                center,
+                (radius // 2, axes[1] // 2),
+                0,
+                0,
+                360,
+                (80, 220, 255),
+                -1,
+            )
+        return True, image
+
+
+class CaptureService:
+    """
+    Keeps a camera open on a background thread and decodes every frame into
+    a fixed-size ring of preallocated buffers.
+
+    Consumers get a view of the newest slot rather than a copy. A slot is
+    only rewritten after RING_SIZE - 1 newer frames have been captured, so a
+    consumer that needs a frame for longer (or wants to draw on it) must
+    copy it.
+
+    Opening, reading and releasing the device are native calls that never
+    yield. Under eventlet or gevent the capture thread is a green thread, so
+    pass a ``blocking_call`` (e.g. app.run_native) that runs them on a real
+    OS thread; otherwise every read stalls the event loop.
+    """
+
+    def __init__(self, source=0, ring_size=RING_SIZE, blocking_call=None):
+        self.source = source
+        self.ring_size = ring_size
+        self._call = blocking_call or (lambda function, *args: function(*args))
+        self._ring = None  # (ring_size, h, w, c) uint8 array, allocated on first frame
+        self._seq = 0  # Sequence number of the newest frame (0 = none yet)
+        self._stamps = [0.0] * ring_size  # Monotonic capture time per slot
+        self._opened = False
+        self._running = False
+        self._thread = None
+        self._cond = threading.Condition()
+        self._listeners = []  # Events set whenever a new frame lands
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="camera-capture", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=REOPEN_DELAY + 1)
+            self._thread = None
+
+    def add_listener(self, event):
+        """Set ``event`` (a threading.Event) every time a new frame is captured."""
+        with self._cond:
+            self._listeners.append(event)
+
+    def remove_listener(self, event):
+        with self._cond:
+            if event in self._listeners:
+                self._listeners.remove(event)
+
+    def is_open(self):
+        """Whether the device is open and at least one frame is available."""
+        return self._opened and self._seq > 0
+
+    def latest(self):
+        """
+        Get the newest frame without copying it.
+
+        Returns:
+            tuple: (sequence number, frame view), or (0, None) before the first frame
+        """
+        with self._cond:
+            if self._seq == 0:
+                return 0, None
+            return self._seq, self._ring[self._seq % self.ring_size]
+
+    def frame_age(self, seq):
+        """
+        Returns:
+            float: Seconds since frame ``seq`` was captured, or None once its
+            slot has been reused
+        """
+        with self._cond:
+            if seq <= 0 or seq <= self._seq - self.ring_size:
+                return None
+            return time.monotonic() - self._stamps[seq % self.ring_size]
+
+    def wait_for_frame(self, after_seq, timeout=1.0):
+        """
+        Block until a frame newer than ``after_seq`` is available.
+
+        Returns:
+            tuple: (sequence number, frame view), or (after_seq, None) on timeout
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._seq > after_seq or not self._running, timeout
+            )
+            if self._seq <= after_seq:
+                return after_seq, None
+            return self._seq, self._ring[self._seq % self.ring_size]
+
+    def _allocate(self, frame):
+        self._ring = np.empty((self.ring_size,) + frame.shape, dtype=frame.dtype)
+
+    def _run(self):
+        while self._running:
+            cap = self._call(open_camera, self.source)
+            if not cap.isOpened():
+                self._call(cap.release)
+                time.sleep(REOPEN_DELAY)
+                continue
+
+            self._opened = True
+            try:
+                while self._running:
+                    if self._ring is None:
+                        ret, frame = self._call(cap.read)
+                        if not ret:
+                            break
+                        self._allocate(frame)
+                        slot_index = (self._seq + 1) % self.ring_size
+                        self._ring[slot_index] = frame
+                    else:
+                        slot_index = (self._seq + 1) % self.ring_size
+                        slot = self._ring[slot_index]
+                        # Decode straight into the preallocated slot
+                        ret, frame = self._call(cap.read, slot)
+                        if not ret:
+                            break
+                        if frame is not slot:
+                            # Resolution changed under us; reallocate the ring
+                            self._allocate(frame)
+                            self._ring[slot_index] = frame
+
+                    with self._cond:
+                        self._stamps[slot_index] = time.monotonic()
+                        self._seq += 1
+                        self._cond.notify_all()
+                        for event in self._listeners:
+                            event.set()
+            finally:
+                self._opened = False
+                self._call(cap.release)
+
+            if self._running:
+                time.sleep(REOPEN_DELAY)
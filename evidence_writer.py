@@ -0,0 +1,176 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import cv2
+
+# Evidence Configuration Parameters
+EVIDENCE_DIR = "evidence"
+PRE_EVENT_SECONDS = 5  # Seconds of video kept in memory before a confirmation
+POST_EVENT_SECONDS = 3  # Seconds of video recorded after a confirmation
+CLIP_FPS = 10  # Frame rate of the rolling buffer and the written clips
+QUEUE_SIZE = 4  # Clips waiting to be written; further confirmations are dropped
+
+
+class EvidenceClip:
+    """Frames and metadata of one confirmation, waiting to be written."""
+
+    def __init__(self, name, frames, trigger_frame, metadata, read_frame, on_done):
+        self.name = name
+        self.frames = frames  # Pre-event frames, oldest first
+        self.trigger_frame = trigger_frame
+        self.metadata = metadata
+        self.read_frame = read_frame  # Returns the next live frame or None
+        self.on_done = on_done  # Run after post-event frames are read
+
+
+class EvidenceRecorder:
+    """
+    Keeps a rolling buffer of the last few seconds of frames per camera and,
+    on confirmation, writes a pre/post-event clip plus metadata on a
+    background thread.
+
+    The capture side only appends references to a bounded deque and puts a
+    job on a bounded queue, so disk writes never stall inference. Memory is
+    capped at PRE_EVENT_SECONDS * CLIP_FPS frames per camera plus the queued
+    clips.
+
+    Writing the snapshot and the clip are native calls that never yield;
+    under eventlet or gevent pass a ``blocking_call`` (e.g. app.run_native)
+    that runs them on a real OS thread, as for CaptureService.
+    """
+
+    def __init__(self, directory=EVIDENCE_DIR, on_saved=None, blocking_call=None):
+        self.directory = directory
+        self.on_saved = on_saved  # Called with the clip metadata once written
+        self._call = blocking_call or (lambda function, *args: function(*args))
+        self._buffers = {}
+        self._last_added = {}
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._running = False
+        self._thread = None
+        self.dropped = 0  # Confirmations not recorded because the queue was full
+        os.makedirs(directory, exist_ok=True)
+
+    def add_frame(self, frame, camera_id=None):
+        """Offer a raw frame to the rolling buffer (at most CLIP_FPS per second)."""
+        now = time.monotonic()
+        if now - self._last_added.get(camera_id, 0.0) < 1.0 / CLIP_FPS:
+            return
+        self._last_added[camera_id] = now
+        buffer = self._buffers.get(camera_id)
+        if buffer is None:
+            buffer = deque(maxlen=PRE_EVENT_SECONDS * CLIP_FPS)
+            self._buffers[camera_id] = buffer
+        buffer.append((now, frame))
+
+    def trigger(self, frame, metadata, camera_id=None, read_frame=None, on_done=None):
+        """
+        Queue a clip for writing. Never blocks.
+
+        Args:
+            frame: The frame in which fire was confirmed
+            metadata: JSON-serialisable details (sensor readings, boxes, scores)
+            camera_id: Camera whose rolling buffer supplies the pre-event frames
+            read_frame: Optional callable returning further live frames
+            on_done: Optional callable run after the post-event frames are read
+
+        Returns:
+            str: Base name of the files to be written, or None if dropped
+        """
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        name = f"fire_detected_{timestamp}" + (f"_{camera_id}" if camera_id else "")
+        # Frames are only added during verification, so the buffer can still
+        # hold frames from an earlier incident; keep the last few seconds only
+        oldest = time.monotonic() - PRE_EVENT_SECONDS
+        frames = [
+            buffered
+            for added_at, buffered in list(self._buffers.get(camera_id, ()))
+            if added_at >= oldest
+        ]
+        metadata = dict(metadata, camera=camera_id, confirmed_at=timestamp)
+        clip = EvidenceClip(name, frames, frame, metadata, read_frame, on_done)
+        try:
+            self._queue.put_nowait(clip)
+        except queue.Full:
+            self.dropped += 1
+            if on_done is not None:
+                on_done()
+            return None
+        return name
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="evidence-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+
+    def _run(self):
+        while self._running:
+            try:
+                clip = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                self._record_post_event(clip)
+                self._call(self._write, clip)
+                if self.on_saved is not None:
+                    self.on_saved(clip.metadata)
+            except Exception as e:
+                print(f"Error writing evidence {clip.name}: {e}")
+
+    def _record_post_event(self, clip):
+        clip.frames.append(clip.trigger_frame)
+        try:
+            if clip.read_frame is None:
+                return
+            deadline = time.monotonic() + POST_EVENT_SECONDS
+            while time.monotonic() < deadline:
+                frame = clip.read_frame()
+                if frame is None:
+                    break
+                clip.frames.append(frame)
+                time.sleep(1.0 / CLIP_FPS)
+        finally:
+            if clip.on_done is not None:
+                clip.on_done()
+
+    def _write(self, clip):
+        base = os.path.join(self.directory, clip.name)
+        cv2.imwrite(f"{base}.jpg", clip.trigger_frame)
+
+        height, width = clip.trigger_frame.shape[:2]
+        writer = cv2.VideoWriter(
+            f"{base}.mp4", cv2.VideoWriter_fourcc(*"mp4v"), CLIP_FPS, (width, height)
+        )
+        try:
+            for frame in clip.frames:
+                if frame.shape[:2] != (height, width):
+                    frame = cv2.resize(frame, (width, height))
+                writer.write(frame)
+        finally:
+            writer.release()
+
+        clip.metadata.update(
+            {
+                "image": f"{base}.jpg",
+                "clip": f"{base}.mp4",
+                "frames": len(clip.frames),
+                "fps": CLIP_FPS,
+            }
+        )
+        with open(f"{base}.json", "w") as f:
+            json.dump(clip.metadata, f, indent=2)
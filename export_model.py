@@ -0,0 +1,150 @@
+"""
+Export the fire detection model for a CPU-optimised inference backend and
+check that its detections match the PyTorch model.
+
+Usage:
+    python export_model.py --backend onnx --samples path/to/images
+    python export_model.py --backend openvino-int8 --samples path/to/images
+
+INT8 OpenVINO export needs sample images for calibration. Select the
+exported model with INFERENCE_BACKEND in app.py.
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from inference_backends import (
+    BACKEND_WEIGHTS,
+    IMAGE_SIZE,
+    MODEL_WEIGHTS,
+    load_backend,
+    parity_check,
+)
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.bmp")
+
+
+def find_images(directory):
+    images = []
+    for pattern in IMAGE_PATTERNS:
+        images.extend(glob.glob(os.path.join(directory, pattern)))
+    return sorted(images)
+
+
+def calibration_input(path):
+    """Pre-process an image the way the exported graph expects (NCHW, RGB, 0-1)."""
+    image = cv2.resize(cv2.imread(path), (IMAGE_SIZE, IMAGE_SIZE))
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB).astype(np.float32) / 255.0
+    return np.ascontiguousarray(image.transpose(2, 0, 1)[None])
+
+
+def quantize_onnx(source, target):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(source, target, weight_type=QuantType.QUInt8)
+
+
+def quantize_openvino(source_dir, target_dir, images):
+    import nncf
+    import openvino.runtime as ov
+
+    xml_path = glob.glob(os.path.join(source_dir, "*.xml"))[0]
+    ov_model = ov.Core().read_model(xml_path)
+    dataset = nncf.Dataset(images, calibration_input)
+    quantized = nncf.quantize(ov_model, dataset, preset=nncf.QuantizationPreset.MIXED)
+
+    os.makedirs(target_dir, exist_ok=True)
+    ov.serialize(quantized, os.path.join(target_dir, os.path.basename(xml_path)))
+    # Keep the class names and input size ultralytics reads from metadata.yaml
+    for extra in glob.glob(os.path.join(source_dir, "*.yaml")):
+        shutil.copy(extra, target_dir)
+
+
+def export(backend, images):
+    """
+    Export the PyTorch model for a backend.
+
+    Returns:
+        str: Path of the exported model
+    """
+    target = BACKEND_WEIGHTS[backend]
+    model = YOLO(MODEL_WEIGHTS)
+
+    if backend.startswith("onnx"):
+        # Dynamic axes so the batched inference engine can send several frames
+        exported = model.export(
+            format="onnx", imgsz=IMAGE_SIZE, dynamic=True, simplify=True
+        )
+        if backend == "onnx-int8":
+            quantize_onnx(exported, target)
+            return target
+    else:
+        exported = model.export(format="openvino", imgsz=IMAGE_SIZE)
+        if backend == "openvino-int8":
+            if not images:
+                raise SystemExit("INT8 OpenVINO export needs --samples for calibration")
+            quantize_openvino(exported, target, images)
+            return target
+
+    if os.path.normpath(exported) != os.path.normpath(target):
+        shutil.move(exported, target)
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--backend",
+        required=True,
+        choices=[name for name in BACKEND_WEIGHTS if name != "pytorch"],
+    )
+    parser.add_argument(
+        "--samples", help="Directory of sample images for calibration and parity"
+    )
+    parser.add_argument(
+        "--conf", type=float, default=0.5, help="Confidence threshold for parity"
+    )
+    parser.add_argument(
+        "--min-match",
+        type=float,
+        default=0.95,
+        help="Minimum fraction of PyTorch detections the export must reproduce",
+    )
+    parser.add_argument(
+        "--skip-export", action="store_true", help="Only run the parity check"
+    )
+    args = parser.parse_args()
+
+    images = find_images(args.samples) if args.samples else []
+
+    if not args.skip_export:
+        path = export(args.backend, images)
+        print(f"✅ Exported {args.backend} model to {path}")
+
+    if not images:
+        print("No sample images given; skipping parity check.")
+        return
+
+    report = parity_check(
+        load_backend("pytorch"), load_backend(args.backend), images, conf=args.conf
+    )
+    print(json.dumps(report, indent=2))
+    if report["match_rate"] < args.min_match:
+        print(
+            f"Parity check failed: {report['match_rate']:.1%} of detections matched "
+            f"(minimum {args.min_match:.1%})"
+        )
+        sys.exit(1)
+    print(f"✅ Parity check passed: {report['match_rate']:.1%} of detections matched")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import os
+import threading
+import time
+from urllib.parse import quote
+
+import numpy as np
+
+# History Configuration Parameters
+HISTORY_DIR = "history"  # One append-only <node_id>.bin file per node (percent-encoded)
+RING_CAPACITY = 3600  # In-memory samples per node (1 hour at 1 Hz)
+FLUSH_INTERVAL = 10  # Seconds between flushes to disk
+MAX_BUCKETS = 1000  # Upper bound on buckets served by one query
+
+# On-disk and in-memory record layout (16 bytes per sample); NaN = not measured
+RECORD = np.dtype([("t", "<f8"), ("smoke", "<f4"), ("temperature", "<f4")])
+FIELDS = ("smoke", "temperature")
+
+
+class NodeSeries:
+    """
+    Readings of one node: a fixed-size in-memory ring of unflushed samples
+    in front of an append-only file that is memory-mapped for queries.
+    """
+
+    def __init__(self, path, capacity=RING_CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self._ring = np.zeros(capacity, dtype=RECORD)
+        self._pending = 0  # Samples in the ring not yet written to disk
+        self._head = 0  # Ring index of the oldest pending sample
+        self._last_t = self._last_persisted_time()
+        self._lock = threading.Lock()
+        self.lost = 0  # Samples overwritten before a flush (ring overflow)
+
+    def _last_persisted_time(self):
+        data = self._mapped()
+        return float(data["t"][-1]) if len(data) else 0.0
+
+    def append(self, t, smoke=np.nan, temperature=np.nan):
+        """Add one sample. Samples older than the newest one are ignored."""
+        with self._lock:
+            if t < self._last_t:
+                return False
+            if self._pending == self.capacity:
+                # Flushing fell behind; drop the oldest pending sample
+                self._head = (self._head + 1) % self.capacity
+                self._pending -= 1
+                self.lost += 1
+            index = (self._head + self._pending) % self.capacity
+            self._ring[index] = (t, smoke, temperature)
+            self._pending += 1
+            self._last_t = t
+            return True
+
+    def _pending_records(self):
+        indices = (self._head + np.arange(self._pending)) % self.capacity
+        return self._ring[indices]
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return 0
+            records = self._pending_records()
+            with open(self.path, "ab") as f:
+                f.write(records.tobytes())
+            self._head = (self._head + self._pending) % self.capacity
+            self._pending = 0
+            return len(records)
+
+    def _mapped(self):
+        try:
+            count = os.path.getsize(self.path) // RECORD.itemsize
+        except OSError:
+            count = 0
+        if count == 0:
+            return np.empty(0, dtype=RECORD)
+        return np.memmap(self.path, dtype=RECORD, mode="r", shape=(count,))
+
+    def query(self, start, end):
+        """
+        Get the samples with start <= t < end.
+
+        Returns:
+            numpy.ndarray: Records in time order (disk slices are memory-mapped)
+        """
+        with self._lock:
+            pending = self._pending_records()
+        persisted = self._mapped()
+        times = persisted["t"]
+        lo, hi = np.searchsorted(times, [start, end])
+        parts = [persisted[lo:hi]]
+        if len(pending):
+            lo, hi = np.searchsorted(pending["t"], [start, end])
+            parts.append(pending[lo:hi])
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+
+def downsample(records, start, end, buckets):
+    """
+    Reduce records to fixed-width time buckets.
+
+    Returns:
+        dict: Bucket start times and per-field min/max/mean lists
+        (None where a bucket has no measurement)
+    """
+    edges = np.linspace(start, end, buckets + 1)
+    bounds = np.searchsorted(records["t"], edges)
+    counts = np.diff(bounds)
+    summary = {"t": edges[:-1].tolist(), "bucket_seconds": (end - start) / buckets}
+
+    occupied = counts > 0
+    offsets = bounds[:-1][occupied]
+    for field in FIELDS:
+        values = np.asarray(records[field], dtype=np.float64)
+        measured = ~np.isnan(values)
+        stats = {name: np.full(buckets, np.nan) for name in ("min", "max", "mean")}
+        if len(offsets):
+            n = np.add.reduceat(measured.astype(np.int64), offsets)
+            total = np.add.reduceat(np.where(measured, values, 0.0), offsets)
+            low = np.minimum.reduceat(np.where(measured, values, np.inf), offsets)
+            high = np.maximum.reduceat(np.where(measured, values, -np.inf), offsets)
+            has_data = n > 0
+            with np.errstate(invalid="ignore", divide="ignore"):
+                stats["mean"][occupied] = np.where(has_data, total / n, np.nan)
+            stats["min"][occupied] = np.where(has_data, low, np.nan)
+            stats["max"][occupied] = np.where(has_data, high, np.nan)
+        summary[field] = {
+            name: [None if np.isnan(v) else round(float(v), 3) for v in column]
+            for name, column in stats.items()
+        }
+    return summary
+
+
+class HistoryStore:
+    """Per-node sensor history with periodic background flushing to disk."""
+
+    def __init__(self, directory=HISTORY_DIR, capacity=RING_CAPACITY):
+        self.directory = directory
+        self.capacity = capacity
+        self._series = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, node_id):
+        # Percent-encoding keeps distinct IDs (e.g. "a/b" and "a_b") apart
+        return os.path.join(self.directory, f"{quote(node_id, safe='')}.bin")
+
+    def series(self, node_id):
+        with self._lock:
+            series = self._series.get(node_id)
+            if series is None:
+                series = NodeSeries(self.path(node_id), self.capacity)
+                self._series[node_id] = series
+            return series
+
+    def append(self, node_id, t=None, smoke=np.nan, temperature=np.nan):
+        return self.series(node_id).append(
+            time.time() if t is None else t, smoke, temperature
+        )
+
+    def query(self, node_id, start, end, buckets):
+        buckets = max(1, min(int(buckets), MAX_BUCKETS))
+        with self._lock:
+            series = self._series.get(node_id)
+        if series is None:
+            # Reads never register a series, so arbitrary IDs cost no memory;
+            # history from earlier runs is read straight from its file
+            series = NodeSeries(self.path(node_id), capacity=1)
+        records = series.query(start, end)
+        summary = downsample(records, start, end, buckets)
+        summary.update(
+            {"node": node_id, "start": start, "end": end, "samples": len(records)}
+        )
+        return summary
+
+    def flush(self):
+        with self._lock:
+            series = list(self._series.values())
+        return sum(s.flush() for s in series)
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="history-flush", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self.flush()
+
+    def _run(self):
+        while self._running:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Error flushing sensor history: {e}")
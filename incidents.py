@@ -0,0 +1,129 @@
+import itertools
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+INCIDENT_HISTORY = 50  # Number of finished incidents kept for /api/incidents
+
+_incident_ids = itertools.count(1)
+
+
+class Incident:
+    """
+    One smoke trigger and the verification checks racing to confirm it.
+
+    Each check runs on its own thread with the shared ``cancel`` event; the
+    first check to confirm fire decides the incident and cancels the rest.
+    The incident is decided as "cleared" once every check has finished
+    without confirming.
+    """
+
+    def __init__(self, smoke_level, trigger=None):
+        self.incident_id = next(_incident_ids)
+        self.smoke_level = smoke_level
+        self.trigger = trigger  # What escalated the smoke stage, e.g. "rate_of_rise"
+        self.started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.cancel = threading.Event()
+        self.outcome = None  # "fire", "cleared" or "cancelled"
+        self.confirmed_by = None  # Name of the check that confirmed fire
+        self.time_to_decision = None  # Seconds from smoke trigger to decision
+        self.alarm_latency = None  # Seconds from smoke trigger to alarm actuation
+        self.actuation = None  # Per-actuator acknowledgement of the alarm (dict)
+        self._start = time.monotonic()
+        self._decided = threading.Event()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return time.monotonic() - self._start
+
+    def run_checks(self, checks):
+        """
+        Start every check on its own thread.
+
+        ``checks`` maps a name to a callable ``check(cancel)``; a True result
+        confirms fire.
+        """
+        with self._lock:
+            self._pending += len(checks)
+
+        for name, check in checks.items():
+            threading.Thread(
+                target=self._run_check,
+                args=(name, check),
+                name=f"check-{name}",
+                daemon=True,
+            ).start()
+
+    def _run_check(self, name, check):
+        try:
+            if check(self.cancel):
+                self.confirm(name)
+        except Exception as e:
+            print(f"Error in {name} check: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+                if self._pending == 0:
+                    self._decide("cleared")
+
+    def confirm(self, name):
+        with self._lock:
+            if self._decide("fire"):
+                self.confirmed_by = name
+        self.cancel.set()
+
+    def abort(self):
+        """Cancel all checks without a decision (e.g. monitoring stopped)."""
+        with self._lock:
+            self._decide("cancelled")
+        self.cancel.set()
+
+    def _decide(self, outcome):
+        # Callers hold self._lock
+        if self.outcome is not None:
+            return False
+        self.outcome = outcome
+        self.time_to_decision = round(self.elapsed(), 3)
+        self._decided.set()
+        return True
+
+    def wait(self, timeout=None):
+        """
+        Block until the incident is decided.
+
+        Returns:
+            str: The outcome, or None on timeout
+        """
+        self._decided.wait(timeout)
+        return self.outcome
+
+    def to_dict(self):
+        return {
+            "incident_id": self.incident_id,
+            "started_at": self.started_at,
+            "smoke_level": self.smoke_level,
+            "trigger": self.trigger,
+            "outcome": self.outcome,
+            "confirmed_by": self.confirmed_by,
+            "time_to_decision": self.time_to_decision,
+            "alarm_latency": self.alarm_latency,
+            "actuation": self.actuation,
+        }
+
+
+class IncidentLog:
+    """Recent incidents, newest last."""
+
+    def __init__(self, maxlen=INCIDENT_HISTORY):
+        self._incidents = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, incident):
+        with self._lock:
+            self._incidents.append(incident)
+
+    def to_list(self):
+        with self._lock:
+            return [incident.to_dict() for incident in self._incidents]
@@ -0,0 +1,282 @@
+import importlib.util
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+import metrics
+
+# Backend Configuration Parameters
+MODEL_WEIGHTS = "YOLOv11n_custom_fire.pt"  # Reference PyTorch model
+MODEL_STEM = os.path.splitext(MODEL_WEIGHTS)[0]
+IMAGE_SIZE = 640  # Model input size used for export
+
+# Exported model location per backend (see export_model.py)
+BACKEND_WEIGHTS = {
+    "pytorch": MODEL_WEIGHTS,
+    "onnx": f"{MODEL_STEM}.onnx",
+    "onnx-int8": f"{MODEL_STEM}_int8.onnx",
+    "openvino": f"{MODEL_STEM}_openvino_model",
+    "openvino-int8": f"{MODEL_STEM}_int8_openvino_model",
+}
+
+# Optional runtime package each backend needs
+BACKEND_RUNTIMES = {
+    "onnx": "onnxruntime",
+    "onnx-int8": "onnxruntime",
+    "openvino": "openvino",
+    "openvino-int8": "openvino",
+}
+
+PREDICT_SECONDS = metrics.histogram(
+    "model_predict_seconds", "Duration of one model.predict call", ["backend"]
+)
+PREDICT_FRAMES = metrics.counter(
+    "model_predict_frames_total", "Frames run through the model", ["backend"]
+)
+
+
+class InferenceBackend:
+    """
+    A loaded detection model behind a backend-independent interface.
+
+    Exported ONNX and OpenVINO graphs are run through ultralytics' own
+    runtime wrappers, so every backend shares the same pre-processing, NMS
+    and result objects as the PyTorch model and callers can use
+    ``predict`` and ``names`` exactly as they would on a YOLO model.
+
+    ``threads`` caps the intra-op threads of an exported runtime; the
+    PyTorch model is capped with torch.set_num_threads by the caller.
+    """
+
+    def __init__(self, name, weights, threads=None):
+        # ultralytics pulls in torch and takes seconds to import, so it is
+        # only imported when a model is actually loaded
+        from ultralytics import YOLO
+
+        self.name = name
+        self.weights = weights
+        self.model = YOLO(weights, task="detect")
+        if threads is not None and name in BACKEND_RUNTIMES:
+            self._limit_threads(threads)
+
+    @property
+    def names(self):
+        return self.model.names
+
+    def predict(self, source, conf=0.5, verbose=False, **kwargs):
+        kwargs.setdefault("imgsz", IMAGE_SIZE)
+        start = time.perf_counter()
+        results = self.model.predict(source, conf=conf, verbose=verbose, **kwargs)
+        PREDICT_SECONDS.observe(time.perf_counter() - start, backend=self.name)
+        PREDICT_FRAMES.inc(len(results), backend=self.name)
+        return results
+
+    def _limit_threads(self, threads):
+        # ultralytics creates the runtime session on the first predict, with
+        # one thread per core and no way to pass options; run a blank frame
+        # to create it, then replace the session with a capped one
+        self.model.predict(
+            np.zeros((IMAGE_SIZE, IMAGE_SIZE, 3), np.uint8),
+            imgsz=IMAGE_SIZE,
+            verbose=False,
+        )
+        runtime = self.model.predictor.model
+        if BACKEND_RUNTIMES[self.name] == "onnxruntime":
+            import onnxruntime
+
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+            runtime.session = onnxruntime.InferenceSession(
+                self.weights, options, providers=runtime.session.get_providers()
+            )
+        else:
+            import openvino as ov
+
+            path = Path(self.weights)
+            xml = path if path.is_file() else next(path.glob("*.xml"))
+            core = ov.Core()
+            graph = core.read_model(model=str(xml), weights=xml.with_suffix(".bin"))
+            if graph.get_parameters()[0].get_layout().empty:
+                graph.get_parameters()[0].set_layout(ov.Layout("NCHW"))
+            runtime.ov_compiled_model = core.compile_model(
+                graph,
+                device_name="CPU",
+                config={
+                    "PERFORMANCE_HINT": runtime.inference_mode,
+                    "INFERENCE_NUM_THREADS": threads,
+                },
+            )
+
+
+def load_backend(name="pytorch", weights=None, threads=None):
+    """
+    Load the model for a configured backend.
+
+    Args:
+        name: Backend name, one of BACKEND_WEIGHTS
+        weights: Model path (default: the backend's exported model)
+        threads: Intra-op threads for an exported runtime (default: one per core)
+
+    Returns:
+        InferenceBackend: The loaded backend
+
+    Raises:
+        ValueError: If the backend is unknown
+        RuntimeError: If its runtime is missing or the model was not exported
+    """
+    if name not in BACKEND_WEIGHTS:
+        raise ValueError(
+            f"Unknown inference backend '{name}' (choose from {', '.join(BACKEND_WEIGHTS)})"
+        )
+
+    runtime = BACKEND_RUNTIMES.get(name)
+    if runtime is not None and importlib.util.find_spec(runtime) is None:
+        raise RuntimeError(f"The '{name}' backend needs the '{runtime}' package")
+
+    weights = weights or BACKEND_WEIGHTS[name]
+    if not os.path.exists(weights):
+        if name == "pytorch":
+            hint = "copy the trained PyTorch model there"
+        else:
+            hint = f"run: python export_model.py --backend {name}"
+        raise RuntimeError(f"Model '{weights}' not found; {hint}")
+    return InferenceBackend(name, weights, threads)
+
+
+def _to_numpy(values):
+    if hasattr(values, "cpu"):
+        values = values.cpu().numpy()
+    return np.asarray(values)
+
+
+class DetectionBoxes:
+    """Detection arrays shaped like a model result's ``boxes``."""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    def __len__(self):
+        return len(self.conf)
+
+
+class DetectionResult:
+    """
+    Detections computed outside the model call (merged tiles, worker
+    processes), usable wherever a model result is expected.
+    """
+
+    def __init__(self, boxes, scores, classes):
+        self.boxes = DetectionBoxes(boxes, scores, classes)
+
+
+def result_detections(result):
+    """
+    Extract detections from one model result as arrays.
+
+    Returns:
+        tuple: (boxes (N, 4) xyxy, scores (N,), class IDs (N,))
+    """
+    boxes = getattr(result, "boxes", None)
+    if boxes is None or len(boxes) == 0:
+        return np.empty((0, 4), np.float32), np.empty(0, np.float32), np.empty(0, int)
+    return (
+        _to_numpy(boxes.xyxy).astype(np.float32),
+        _to_numpy(boxes.conf).astype(np.float32),
+        _to_numpy(boxes.cls).astype(int),
+    )
+
+
+def class_ids(names, wanted):
+    """
+    Resolve class names to model class IDs once, at model load.
+
+    Returns:
+        numpy.ndarray: IDs of the classes in ``wanted`` that the model knows
+    """
+    wanted = set(wanted)
+    return np.array(
+        sorted(class_id for class_id, name in names.items() if name in wanted),
+        dtype=int,
+    )
+
+
+def filter_detections(result, allowed_ids, conf):
+    """
+    Keep the detections of allowed classes at or above ``conf``, in bulk.
+
+    Returns:
+        tuple: (boxes (N, 4) xyxy, scores (N,), class IDs (N,)) sorted by score
+    """
+    boxes, scores, classes = result_detections(result)
+    keep = np.isin(classes, allowed_ids) & (scores >= conf)
+    order = np.argsort(-scores[keep])
+    return boxes[keep][order], scores[keep][order], classes[keep][order]
+
+
+def box_iou(boxes_a, boxes_b):
+    """Pairwise IoU between two (N, 4) and (M, 4) xyxy box arrays."""
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+    area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-9)
+
+
+def parity_check(reference, candidate, images, conf=0.5, iou_threshold=0.5):
+    """
+    Compare a candidate backend's detections against the reference model.
+
+    A reference detection is matched when the candidate has a box of the
+    same class overlapping it by at least ``iou_threshold``.
+
+    Returns:
+        dict: Overall match rate and per-image details
+    """
+    report = {"images": [], "matched": 0, "reference_detections": 0, "extra": 0}
+    for image in images:
+        ref_boxes, ref_scores, ref_classes = result_detections(
+            reference.predict(image, conf=conf, verbose=False)[0]
+        )
+        cand_boxes, cand_scores, cand_classes = result_detections(
+            candidate.predict(image, conf=conf, verbose=False)[0]
+        )
+
+        matched = 0
+        score_deltas = []
+        used = np.zeros(len(cand_boxes), dtype=bool)
+        if len(ref_boxes) and len(cand_boxes):
+            iou = box_iou(ref_boxes, cand_boxes)
+            iou[ref_classes[:, None] != cand_classes[None, :]] = 0
+            for ref_index in np.argsort(-ref_scores):
+                candidates = np.where(~used & (iou[ref_index] >= iou_threshold))[0]
+                if len(candidates):
+                    best = candidates[np.argmax(iou[ref_index, candidates])]
+                    used[best] = True
+                    matched += 1
+                    score_deltas.append(
+                        abs(float(ref_scores[ref_index] - cand_scores[best]))
+                    )
+
+        report["images"].append(
+            {
+                "image": str(image),
+                "reference": len(ref_boxes),
+                "candidate": len(cand_boxes),
+                "matched": matched,
+                "max_score_delta": max(score_deltas) if score_deltas else 0.0,
+            }
+        )
+        report["matched"] += matched
+        report["reference_detections"] += len(ref_boxes)
+        report["extra"] += int((~used).sum())
+
+    total = report["reference_detections"]
+    report["match_rate"] = report["matched"] / total if total else 1.0
+    return report
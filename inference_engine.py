@@ -0,0 +1,214 @@
+import threading
+import time
+
+# Engine Configuration Parameters
+BATCH_SIZE = 8  # Maximum frames per model call
+MAX_WAIT = (
+    0.05  # Time (seconds) to wait for more cameras before running a partial batch
+)
+CONFIDENCE = 0.5  # Minimum detection confidence passed to the model
+
+
+class CameraSource:
+    """A camera registered with the engine and where its results go."""
+
+    def __init__(self, source_id, capture, on_result):
+        self.source_id = source_id
+        self.capture = (
+            capture  # Any object with latest() / add_listener(), e.g. CaptureService
+        )
+        self.on_result = on_result  # Called as on_result(source_id, frame, outcome)
+        self.last_seq = 0  # Sequence number of the last frame sent to the model
+        self.prefilter = None  # Optional FramePrefilter gating model calls
+        self.checked_seq = 0  # Sequence number of the last frame prefiltered
+        self.last_outcome = None  # Outcome reused for frames the prefilter skips
+        self.tiler = None  # Optional TiledDetector splitting frames into tiles
+
+
+class BatchInferenceEngine:
+    """
+    Collects the newest frame from every registered camera and runs them
+    through the model in a single batched call.
+
+    A batch is dispatched as soon as every camera has a new frame or
+    ``batch_size`` frames are ready, and otherwise after ``max_wait``
+    seconds, so the two settings trade latency against throughput. Only the
+    newest frame of each camera is ever used; older frames are skipped.
+
+    With a ``prefilter`` factory, each camera gets its own prefilter and
+    frames it rejects are passed to ``on_result`` with the camera's previous
+    outcome instead of taking a place in the batch. With a ``tiler``
+    factory, each frame contributes its tiles to the batch and the merged
+    tile detections are post-processed like a full-frame result.
+    """
+
+    def __init__(
+        self,
+        model,
+        postprocess,
+        batch_size=BATCH_SIZE,
+        max_wait=MAX_WAIT,
+        conf=CONFIDENCE,
+        prefilter=None,
+        tiler=None,
+    ):
+        self.model = model
+        self.postprocess = postprocess  # postprocess(frame, result) -> outcome
+        self.prefilter = prefilter  # Optional factory returning a FramePrefilter
+        self.tiler = tiler  # Optional factory returning a TiledDetector
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.conf = conf
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self._next = 0  # Round-robin start so no camera is starved in large sites
+        self.batches = 0
+        self.frames = 0
+        self.skipped = 0
+
+    def register(self, source_id, capture, on_result):
+        source = CameraSource(source_id, capture, on_result)
+        source.last_seq = capture.latest()[0] - 1  # Start from the newest frame
+        if self.prefilter is not None:
+            source.prefilter = self.prefilter()
+        if self.tiler is not None:
+            source.tiler = self.tiler()
+        with self._lock:
+            self._sources[source_id] = source
+        capture.add_listener(self._wake)
+        self._wake.set()
+        return source
+
+    def unregister(self, source_id):
+        with self._lock:
+            source = self._sources.pop(source_id, None)
+        if source is not None:
+            source.capture.remove_listener(self._wake)
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="batch-inference", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "mean_batch_size": self.frames / self.batches if self.batches else 0,
+        }
+
+    def _collect(self):
+        """Gather (source, seq, frame) for every camera with an unseen frame."""
+        with self._lock:
+            sources = list(self._sources.values())
+        if not sources:
+            return [], 0
+
+        start = self._next % len(sources)
+        ordered = sources[start:] + sources[:start]
+        batch = []
+        for source in ordered:
+            seq, frame = source.capture.latest()
+            if frame is None or seq <= source.last_seq:
+                continue
+            if source.prefilter is not None and seq != source.checked_seq:
+                source.checked_seq = seq
+                if not source.prefilter.should_infer(frame):
+                    source.last_seq = seq
+                    self._pass_through(source, frame)
+                    continue
+            batch.append((source, seq, frame))
+            if len(batch) == self.batch_size:
+                break
+        return batch, len(sources)
+
+    def _pass_through(self, source, frame):
+        """Deliver a prefiltered frame with the camera's previous outcome."""
+        self.skipped += 1
+        if source.last_outcome is None:
+            return
+        try:
+            source.on_result(source.source_id, frame.copy(), source.last_outcome)
+        except Exception as e:
+            print(f"Error handling result for {source.source_id}: {e}")
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(timeout=0.5)
+            if not self._running:
+                break
+
+            self._wake.clear()
+            batch, source_count = self._collect()
+            if not batch:
+                continue
+
+            # Give the remaining cameras up to max_wait to deliver a frame
+            target = min(self.batch_size, source_count)
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < target and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._wake.wait(remaining)
+                self._wake.clear()
+                batch, source_count = self._collect()
+
+            self._infer(batch)
+
+    def _infer(self, batch):
+        # Ring slots get reused by the capture threads, so detach the frames
+        # before handing them to the model and the result callbacks
+        frames = [frame.copy() for _, _, frame in batch]
+        for source, seq, _ in batch:
+            source.last_seq = seq
+        self._next += len(batch)
+
+        # Tiled cameras put several crops into the batch; spans map them back
+        inputs = []
+        spans = []
+        for (source, _, _), frame in zip(batch, frames):
+            if source.tiler is None:
+                tiles = None
+                inputs.append(frame)
+            else:
+                mask = source.prefilter.mask if source.prefilter is not None else None
+                tiles = source.tiler.plan(frame, mask)
+                inputs.extend(crop for _, _, crop in tiles)
+            spans.append((len(inputs) - (1 if tiles is None else len(tiles)), tiles))
+
+        try:
+            results = self.model.predict(inputs, conf=self.conf, verbose=False)
+        except Exception as e:
+            print(f"Error in batched inference: {e}")
+            return
+
+        self.batches += 1
+        self.frames += len(frames)
+        for (source, _, _), frame, (offset, tiles) in zip(batch, frames, spans):
+            try:
+                if tiles is None:
+                    result = results[offset]
+                else:
+                    result = source.tiler.merge(
+                        tiles, results[offset : offset + len(tiles)]
+                    )
+                source.last_outcome = self.postprocess(frame, result)
+                source.on_result(source.source_id, frame, source.last_outcome)
+            except Exception as e:
+                print(f"Error handling result for {source.source_id}: {e}")
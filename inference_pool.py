@@ -0,0 +1,449 @@
+import contextlib
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+import types
+from concurrent.futures import Future
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import metrics
+from inference_backends import PREDICT_FRAMES, PREDICT_SECONDS, DetectionResult
+
+# Worker Pool Configuration Parameters
+WORKERS = 2  # Inference processes
+THREADS_PER_WORKER = 1  # Intra-op threads each worker's runtime may use
+SLOTS_PER_WORKER = 2  # Shared-memory frame slots per worker (frames in flight)
+TASK_TIMEOUT = 10  # Seconds before a frame's inference is given up on
+READY_TIMEOUT = 120  # Seconds to wait for the first worker to load the model
+RESTART_DELAY = 1  # Seconds before a crashed worker is replaced
+MAX_RETRIES = 1  # Times a frame lost to a crashed worker is resubmitted
+MAX_LOAD_FAILURES = 3  # Failed model loads in a row before a worker is not replaced
+
+TASK_SECONDS = metrics.histogram(
+    "inference_pool_task_seconds", "Round trip of one frame through a worker"
+)
+WORKERS_ALIVE = metrics.gauge("inference_pool_workers_alive", "Live inference workers")
+WORKER_RESTARTS = metrics.counter(
+    "inference_pool_restarts_total", "Inference workers replaced after exiting"
+)
+
+
+@contextlib.contextmanager
+def _hidden_main_module():
+    """
+    Hide the parent's main script while a worker process starts.
+
+    Fork server children re-run the parent's ``__main__`` before anything
+    else. For the server that is app.py, which would start a whole server
+    (and another pool) in every worker; workers only need this module.
+    """
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+@contextlib.contextmanager
+def _thread_limits(threads):
+    """
+    Cap the BLAS/OpenMP thread pools of processes started meanwhile.
+
+    These libraries read their variables once, when loaded. The fork server
+    is started with the first worker and preloads numpy, so the variables
+    must already be in its environment; workers forked from it inherit both.
+    The server's own environment is restored afterwards.
+    """
+    variables = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+    saved = {variable: os.environ.get(variable) for variable in variables}
+    os.environ.update({variable: str(threads) for variable in variables})
+    try:
+        yield
+    finally:
+        for variable, value in saved.items():
+            if value is None:
+                os.environ.pop(variable, None)
+            else:
+                os.environ[variable] = value
+
+
+def _worker_main(worker_id, backend, weights, threads, tasks, results):
+    """Entry point of a worker process: load the model, then serve frames."""
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    from inference_backends import load_backend, result_detections
+
+    try:
+        model = load_backend(backend, weights, threads)
+    except Exception as e:
+        results.put(("failed", worker_id, str(e)))
+        return
+    results.put(("ready", worker_id, dict(model.names)))
+
+    attached = {}  # Slot index -> SharedMemory mapped in this process
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, slot, name, shape, dtype, conf, imgsz = task
+        try:
+            shm = attached.get(slot)
+            if shm is None or shm.name != name:
+                if shm is not None:
+                    shm.close()
+                shm = shared_memory.SharedMemory(name=name)
+                attached[slot] = shm
+            frame = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            options = {} if imgsz is None else {"imgsz": imgsz}
+            start = time.perf_counter()
+            result = model.predict(frame, conf=conf, verbose=False, **options)[0]
+            # The worker's own metrics never reach /metrics; report the time
+            seconds = time.perf_counter() - start
+            results.put(
+                ("result", worker_id, task_id, result_detections(result), seconds)
+            )
+        except Exception as e:
+            results.put(("error", worker_id, task_id, str(e)))
+    for shm in attached.values():
+        shm.close()
+
+
+class PoolTask:
+    """One frame in flight: its slot, the worker holding it and its future."""
+
+    def __init__(self, task_id, slot, shape, dtype, conf, imgsz=None):
+        self.task_id = task_id
+        self.slot = slot
+        self.shape = shape
+        self.dtype = dtype  # numpy dtype string, e.g. "|u1"
+        self.conf = conf
+        self.imgsz = imgsz  # Model input size, or None for the backend default
+        self.future = Future()
+        self.worker_id = None
+        self.retries = 0
+        self.submitted_at = time.perf_counter()
+
+
+class PoolWorker:
+    """Parent-side handle of one worker process."""
+
+    def __init__(self, worker_id, process, tasks):
+        self.worker_id = worker_id
+        self.process = process
+        self.tasks = tasks  # This worker's own task queue
+        self.ready = False
+        self.in_flight = {}  # task_id -> PoolTask
+
+
+class InferencePool:
+    """
+    Runs the model in separate worker processes so inference uses other
+    cores than capture, encoding and the web server.
+
+    Frames are copied once into shared-memory slots and only the slot name
+    and shape travel to the workers; results come back as small detection
+    arrays. Each worker has its own task queue, so when a worker dies its
+    frames are known: they are resubmitted to another worker and the worker
+    is replaced. ``predict`` mirrors the model's, so the pool can stand in
+    for a loaded backend anywhere (batched engine, tiling).
+
+    Workers are forked from a fork server that has imported only this
+    module, never from the server process itself: a worker replaced while
+    the server's threads run cannot inherit a lock one of them held. A
+    worker whose model fails to load MAX_LOAD_FAILURES times in a row is
+    not replaced again; ``error`` keeps the last load failure.
+
+    ``threads`` caps each worker's runtime. The BLAS/OpenMP limits are set
+    when the fork server starts, so they are shared by every pool in the
+    process; the first pool's value wins.
+    """
+
+    def __init__(
+        self,
+        backend="pytorch",
+        weights=None,
+        workers=WORKERS,
+        threads=THREADS_PER_WORKER,
+        slots_per_worker=SLOTS_PER_WORKER,
+    ):
+        self.name = backend
+        self.weights = weights
+        self.worker_count = workers
+        self.threads = threads
+        self.names = None  # Class names, reported by the first ready worker
+        self.error = None  # Last model load failure reported by a worker
+        self._context = multiprocessing.get_context("forkserver")
+        self._context.set_forkserver_preload(["inference_pool"])
+        self._results = self._context.Queue()
+        self._slots = [None] * (workers * slots_per_worker)  # SharedMemory or None
+        self._free_slots = queue.Queue()
+        for slot in range(len(self._slots)):
+            self._free_slots.put(slot)
+        self._workers = {}
+        self._pending = {}  # task_id -> PoolTask
+        self._task_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._settled = threading.Event()  # Set on first ready or when all failed
+        self._load_failures = {}  # worker_id -> failed model loads in a row
+        self._running = False
+        self._threads = []
+        self.completed = 0
+        self.restarts = 0
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        # Workers must share the parent's resource tracker; one of their own
+        # would unlink the frame slots when the worker exits or crashes
+        resource_tracker.ensure_running()
+        for worker_id in range(self.worker_count):
+            self._spawn(worker_id)
+        WORKERS_ALIVE.set_function(lambda: self.stats()["alive"])
+        WORKER_RESTARTS.set_function(lambda: self.restarts)
+        for target, name in (
+            (self._collect, "inference-pool-results"),
+            (self._supervise, "inference-pool-supervisor"),
+        ):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def wait_ready(self, timeout=READY_TIMEOUT):
+        """
+        Returns:
+            bool: True once at least one worker has loaded the model, False
+            on timeout or once every worker has been given up on
+        """
+        self._settled.wait(timeout)
+        return self._ready.is_set()
+
+    def failed(self):
+        """Whether every worker failed to load the model and was given up on."""
+        with self._lock:
+            return self._running and not self._workers
+
+    def stop(self):
+        self._running = False
+        with self._lock:
+            workers = list(self._workers.values())
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for worker in workers:
+            worker.tasks.put(None)
+        for worker in workers:
+            worker.process.join(timeout=2)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        for task in pending:
+            task.future.set_exception(RuntimeError("Inference pool stopped"))
+        for shm in self._slots:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self._slots = [None] * len(self._slots)
+
+    def stats(self):
+        with self._lock:
+            workers = list(self._workers.values())
+            in_flight = len(self._pending)
+        return {
+            "workers": len(workers),
+            "alive": sum(worker.process.is_alive() for worker in workers),
+            "ready": sum(worker.ready for worker in workers),
+            "in_flight": in_flight,
+            "completed": self.completed,
+            "restarts": self.restarts,
+            "error": self.error,
+        }
+
+    def submit(self, frame, conf=0.5, imgsz=None):
+        """
+        Queue one frame for inference. Blocks while every slot is in use.
+
+        Returns:
+            concurrent.futures.Future: Resolves to (boxes, scores, class IDs)
+        """
+        if self.failed():
+            raise RuntimeError(f"No inference workers left ({self.error})")
+        slot = self._free_slots.get(timeout=TASK_TIMEOUT)
+        shm = self._slots[slot]
+        if shm is None or shm.size < frame.nbytes:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            shm = shared_memory.SharedMemory(create=True, size=frame.nbytes)
+            self._slots[slot] = shm
+        np.copyto(np.ndarray(frame.shape, frame.dtype, buffer=shm.buf), frame)
+
+        task = PoolTask(
+            next(self._task_ids), slot, frame.shape, frame.dtype.str, conf, imgsz
+        )
+        with self._lock:
+            self._pending[task.task_id] = task
+            self._dispatch(task)
+        return task.future
+
+    def predict(self, source, conf=0.5, verbose=False, imgsz=None, **kwargs):
+        """
+        Run one frame or a list of frames, spread over the workers.
+
+        Returns:
+            list: One DetectionResult per frame
+
+        Raises:
+            TypeError: For predict options the workers do not support
+        """
+        if kwargs:
+            raise TypeError(f"Unsupported predict options: {', '.join(kwargs)}")
+        frames = source if isinstance(source, (list, tuple)) else [source]
+        futures = [self.submit(frame, conf, imgsz) for frame in frames]
+        return [DetectionResult(*future.result(TASK_TIMEOUT)) for future in futures]
+
+    def _spawn(self, worker_id):
+        tasks = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(
+                worker_id,
+                self.name,
+                self.weights,
+                self.threads,
+                tasks,
+                self._results,
+            ),
+            name=f"inference-worker-{worker_id}",
+            daemon=True,
+        )
+        with _hidden_main_module(), _thread_limits(self.threads):
+            process.start()
+        with self._lock:
+            self._workers[worker_id] = PoolWorker(worker_id, process, tasks)
+
+    def _dispatch(self, task):
+        """Hand a task to the least busy ready worker (caller holds the lock)."""
+        workers = [w for w in self._workers.values() if w.process.is_alive()]
+        ready = [w for w in workers if w.ready] or workers
+        if not ready:
+            ready = list(self._workers.values())
+        worker = min(ready, key=lambda w: len(w.in_flight))
+        task.worker_id = worker.worker_id
+        worker.in_flight[task.task_id] = task
+        worker.tasks.put(
+            (
+                task.task_id,
+                task.slot,
+                self._slots[task.slot].name,
+                task.shape,
+                task.dtype,
+                task.conf,
+                task.imgsz,
+            )
+        )
+
+    def _finish(self, task_id, worker_id):
+        with self._lock:
+            task = self._pending.pop(task_id, None)
+            worker = self._workers.get(worker_id)
+            if worker is not None:
+                worker.in_flight.pop(task_id, None)
+        if task is not None:
+            self._free_slots.put(task.slot)
+        return task
+
+    def _collect(self):
+        while self._running:
+            try:
+                message = self._results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            kind, worker_id = message[0], message[1]
+            if kind == "ready":
+                with self._lock:
+                    worker = self._workers.get(worker_id)
+                    if worker is not None:
+                        worker.ready = True
+                self._load_failures.pop(worker_id, None)
+                self.names = message[2]
+                self._ready.set()
+                self._settled.set()
+                print(f"✅ Inference worker {worker_id} ready ({self.name} backend)")
+            elif kind == "failed":
+                self._load_failures[worker_id] = (
+                    self._load_failures.get(worker_id, 0) + 1
+                )
+                self.error = message[2]
+                print(
+                    f"Error loading model in inference worker {worker_id}: {message[2]}"
+                )
+            elif kind == "result":
+                task = self._finish(message[2], worker_id)
+                if task is not None:
+                    self.completed += 1
+                    TASK_SECONDS.observe(time.perf_counter() - task.submitted_at)
+                    PREDICT_SECONDS.observe(message[4], backend=self.name)
+                    PREDICT_FRAMES.inc(backend=self.name)
+                    task.future.set_result(message[3])
+            elif kind == "error":
+                task = self._finish(message[2], worker_id)
+                if task is not None:
+                    task.future.set_exception(RuntimeError(message[3]))
+
+    def _supervise(self):
+        """Replace dead workers and resubmit the frames they were holding."""
+        while self._running:
+            time.sleep(0.5)
+            with self._lock:
+                dead = [
+                    worker
+                    for worker in self._workers.values()
+                    if not worker.process.is_alive()
+                ]
+            for worker in dead:
+                if not self._running:
+                    return
+                failures = self._load_failures.get(worker.worker_id, 0)
+                if failures >= MAX_LOAD_FAILURES:
+                    print(
+                        f"Inference worker {worker.worker_id} failed to load the "
+                        f"model {failures} times; not restarting it"
+                    )
+                    with self._lock:
+                        del self._workers[worker.worker_id]
+                        if not self._workers:
+                            self._settled.set()  # wait_ready gives up
+                else:
+                    print(
+                        f"Inference worker {worker.worker_id} exited "
+                        f"(code {worker.process.exitcode}); restarting"
+                    )
+                    time.sleep(RESTART_DELAY)
+                    self._spawn(worker.worker_id)
+                    self.restarts += 1
+                with self._lock:
+                    orphans = list(worker.in_flight.values())
+                    for task in orphans:
+                        if task.retries < MAX_RETRIES and self._workers:
+                            task.retries += 1
+                            self._dispatch(task)
+                        else:
+                            self._pending.pop(task.task_id, None)
+                for task in orphans:
+                    if task.task_id not in self._pending:
+                        self._free_slots.put(task.slot)
+                        task.future.set_exception(
+                            RuntimeError("Inference worker crashed")
+                        )
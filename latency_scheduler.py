@@ -0,0 +1,207 @@
+import threading
+import time
+
+# Scheduler Configuration Parameters
+LATENCY_BUDGET = 0.5  # Target seconds from frame capture to a processed, encoded frame
+INPUT_SIZES = (640, 512, 416, 320)  # Model input sizes, largest first
+STREAM_FPS = (15, 10, 5, 2)  # Stream frame rates, highest first
+MIN_INFERENCE_INTERVAL = 0.05  # Shortest time (seconds) between inferences (20/s)
+MAX_INFERENCE_INTERVAL = 1.0  # Longest time (seconds) between inferences
+INTERVAL_STEP = 1.5  # Factor the inference interval grows or shrinks by per step
+UPGRADE_MARGIN = 0.6  # Step back up while latency stays below this share of the budget
+UPGRADE_AFTER = 20  # Consecutive frames under the margin before stepping up
+SETTLE_FRAMES = 5  # Frames measured after a change before the next step down
+SMOOTHING = 0.3  # Weight of the newest measurement in the moving averages
+
+
+def _smooth(average, value):
+    if value is None:
+        return average
+    if average is None:
+        return value
+    return average + SMOOTHING * (value - average)
+
+
+class LatencyScheduler:
+    """
+    Paces camera verification to an end-to-end latency budget.
+
+    The loop reports, per processed frame, how old the frame was when it was
+    picked up and how long inference took; the streaming side reports each
+    encode of the loop's frames as it happens (``observe_encode``). When their
+    moving average exceeds the budget the scheduler steps down one setting
+    at a time: first the model input size, then the stream frame rate, then
+    the inference rate. Latency that stays well under the budget steps the
+    settings back up in reverse order, so a fast machine runs at full rate
+    and resolution and a slow one degrades instead of falling behind.
+
+    Only the newest frame is ever processed, so a slower rate skips frames
+    rather than queueing them.
+    """
+
+    def __init__(
+        self,
+        budget=LATENCY_BUDGET,
+        input_sizes=INPUT_SIZES,
+        stream_fps=STREAM_FPS,
+        min_interval=MIN_INFERENCE_INTERVAL,
+        max_interval=MAX_INFERENCE_INTERVAL,
+    ):
+        self.budget = budget
+        self.input_sizes = tuple(input_sizes)  # A single size fixes the resolution
+        self.stream_levels = tuple(stream_fps)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.size_level = 0
+        self.stream_level = 0
+        self.interval = min_interval  # Seconds between inferences
+        self.frame_age = None  # Moving averages, in seconds
+        self.inference_seconds = None
+        self.encode_seconds = None
+        self.inference_rate = None  # Measured inferences per second
+        self.changes = 0
+        self._under_margin = 0
+        self._since_change = 0
+        self._last_inference_at = None
+        self._last_stream_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def input_size(self):
+        return self.input_sizes[self.size_level]
+
+    @property
+    def stream_fps(self):
+        return self.stream_levels[self.stream_level]
+
+    def latency(self):
+        """
+        Returns:
+            float: Estimated seconds from capture to an encoded frame, or None
+        """
+        if self.frame_age is None and self.inference_seconds is None:
+            return None
+        return (
+            (self.frame_age or 0.0)
+            + (self.inference_seconds or 0.0)
+            + (self.encode_seconds or 0.0)
+        )
+
+    def stream_due(self):
+        """Whether the next processed frame should go to the stream."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_stream_at < 1.0 / self.stream_fps:
+                return False
+            self._last_stream_at = now
+            return True
+
+    def delay(self, elapsed):
+        """
+        Args:
+            elapsed: Seconds the current iteration has taken so far
+
+        Returns:
+            float: Seconds to wait before picking up the next frame
+        """
+        return max(0.0, self.interval - elapsed)
+
+    def observe_encode(self, seconds):
+        """Record the stream encode time of one frame, from the encoding thread."""
+        with self._lock:
+            self.encode_seconds = _smooth(self.encode_seconds, seconds)
+
+    def observe(self, frame_age, inference_seconds=None):
+        """
+        Record one processed frame and adjust the settings.
+
+        Args:
+            frame_age: Seconds between capture and the loop picking the frame up
+            inference_seconds: Model time, or None if the frame was not inferred
+
+        Returns:
+            bool: True if a setting changed
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.frame_age = _smooth(self.frame_age, frame_age)
+            self.inference_seconds = _smooth(self.inference_seconds, inference_seconds)
+            if inference_seconds is not None:
+                if self._last_inference_at is not None:
+                    gap = now - self._last_inference_at
+                    self.inference_rate = _smooth(
+                        self.inference_rate, 1.0 / gap if gap > 0 else None
+                    )
+                self._last_inference_at = now
+
+            self._since_change += 1
+            latency = self.latency()
+            if latency is None:
+                return False
+            if latency > self.budget:
+                self._under_margin = 0
+                if self._since_change >= SETTLE_FRAMES:
+                    return self._step_down()
+            elif latency < self.budget * UPGRADE_MARGIN:
+                self._under_margin += 1
+                if self._under_margin >= UPGRADE_AFTER:
+                    return self._step_up()
+            else:
+                self._under_margin = 0
+            return False
+
+    def _step_down(self):
+        if self.size_level < len(self.input_sizes) - 1:
+            self.size_level += 1
+            self.inference_seconds = None  # Re-measure at the new size
+        elif self.stream_level < len(self.stream_levels) - 1:
+            self.stream_level += 1
+            self.encode_seconds = None
+        elif self.interval < self.max_interval:
+            self.interval = min(self.max_interval, self.interval * INTERVAL_STEP)
+        else:
+            return False
+        self._changed()
+        return True
+
+    def _step_up(self):
+        if self.interval > self.min_interval:
+            self.interval = max(self.min_interval, self.interval / INTERVAL_STEP)
+        elif self.stream_level > 0:
+            self.stream_level -= 1
+        elif self.size_level > 0:
+            self.size_level -= 1
+            self.inference_seconds = None
+        else:
+            self._under_margin = 0
+            return False
+        self._changed()
+        return True
+
+    def _changed(self):
+        self.changes += 1
+        self._since_change = 0
+        self._under_margin = 0
+        self.frame_age = None
+
+    def to_dict(self):
+        def ms(seconds):
+            return None if seconds is None else round(seconds * 1000, 1)
+
+        with self._lock:
+            return {
+                "budget_ms": ms(self.budget),
+                "latency_ms": ms(self.latency()),
+                "frame_age_ms": ms(self.frame_age),
+                "inference_ms": ms(self.inference_seconds),
+                "encode_ms": ms(self.encode_seconds),
+                "input_size": self.input_size,
+                "inference_interval": round(self.interval, 3),
+                "inference_fps": (
+                    None
+                    if self.inference_rate is None
+                    else round(self.inference_rate, 1)
+                ),
+                "stream_fps": self.stream_fps,
+                "changes": self.changes,
+            }
@@ -0,0 +1,62 @@
+from sensor_filters import TrendMonitor
+
+# Pipeline Configuration Parameters
+# Shared by the live server (app.py) and offline replay (replay.py)
+SMOKE_THRESHOLD = 2600  # Emperically determined; Demo value for prototype
+TEMP_THRESHOLD = 20  # Emperically determined; Demo value for prototype
+FIRE_CHECK_DURATION = 20  # Duration (seconds); Demo value for prototype
+SMOKE_CHECK_INTERVAL = 5  # Interval (seconds) between smoke checks
+SMOKE_CONFIRM_INTERVAL = 0.5  # Re-read delay (seconds) to confirm an outlier reading
+TEMP_CHECK_INTERVAL = 1  # Interval (seconds) between temperature checks
+TEMP_CHECK_ATTEMPTS = 20  # Number of temperature checks for confirmation
+CLEARED_PAUSE = 5  # Seconds before smoke monitoring resumes after a false alarm
+DETECTION_CONFIDENCE = 0.5  # Minimum score for a fire detection
+FIRE_CLASSES = ("Cooking Oil", "Electrical", "Gas", "Liquid", "Metal", "Solid")
+
+
+class SmokeStage:
+    """
+    Decisions of the smoke monitoring stage, on any clock.
+
+    Each sweep of readings feeds the per-node trend detectors, which decide
+    whether the stage escalates to verification and how soon to read
+    again. ``monitoring_pipeline`` drives it on the wall clock and replay
+    on a virtual one, so both escalate on exactly the same readings.
+    """
+
+    def __init__(self, trends=None):
+        self.trends = (
+            trends or TrendMonitor()
+        )  # Per-node smoothing and change detection
+        self.suspect = False  # A node's last reading awaits confirmation
+
+    def update(self, readings, now, threshold=SMOKE_THRESHOLD):
+        """
+        Feed one sweep of smoke readings.
+
+        Args:
+            readings: node_id -> smoke level
+            now: Time of the sweep (seconds, monotonic or virtual)
+            threshold: Smoke level that escalates once confirmed
+
+        Returns:
+            tuple: (node_id, trigger) that escalates, or None
+        """
+        escalation, self.suspect = self.trends.update(readings, now, threshold)
+        return escalation
+
+    def interval(self):
+        """Seconds until the next sweep: sooner while a reading awaits confirmation."""
+        return SMOKE_CONFIRM_INTERVAL if self.suspect else SMOKE_CHECK_INTERVAL
+
+    def rearm(self, outcome):
+        """
+        Re-arm the detectors after verification. Smoke that verification
+        cleared becomes the new baseline.
+        """
+        self.trends.rearm(rebaseline=outcome == "cleared")
+
+
+def temperature_confirms(temperature, threshold=TEMP_THRESHOLD):
+    """Whether a temperature reading (None if unreachable) confirms fire."""
+    return temperature is not None and temperature > threshold
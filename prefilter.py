@@ -0,0 +1,112 @@
+import cv2
+import numpy as np
+
+import metrics
+
+# Prefilter Configuration Parameters
+PREFILTER_WIDTH = 160  # Width (pixels) of the downscaled frame the checks run on
+MOTION_THRESHOLD = 25  # Grey-level change for a pixel to count as changed
+MOTION_FRACTION = 0.002  # Share of changed pixels that counts as scene motion
+FIRE_FRACTION = 0.001  # Share of changed, fire-coloured pixels that counts as flame
+FORCE_EVERY = 10  # Run the model at least every K frames, whatever the prefilter says
+MOTION_EVERY = 3  # Run the model every N frames on motion without fire colours
+FIRE_HSV_LOW = np.array([0, 80, 150], np.uint8)  # Red through yellow, bright
+FIRE_HSV_HIGH = np.array([35, 255, 255], np.uint8)
+
+PREFILTER_FRAMES = metrics.counter(
+    "prefilter_frames_total", "Frames seen by the inference prefilter", ["decision"]
+)
+
+
+def fire_colour_mask(image):
+    """
+    Vectorised flame-colour test on a BGR image.
+
+    A pixel passes if its hue is red to yellow and bright enough in HSV, and
+    it is red-dominant in YCrCb (Cr > Cb and Y > Cb).
+
+    Returns:
+        numpy.ndarray: Boolean mask with the image's height and width
+    """
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    ycrcb = cv2.cvtColor(image, cv2.COLOR_BGR2YCrCb)
+    y, cr, cb = ycrcb[..., 0], ycrcb[..., 1], ycrcb[..., 2]
+    return (cv2.inRange(hsv, FIRE_HSV_LOW, FIRE_HSV_HIGH) > 0) & (cr > cb) & (y > cb)
+
+
+class FramePrefilter:
+    """
+    Decides, for one camera, which frames are worth running the model on.
+
+    Each frame is downscaled, differenced against the previous one and
+    tested for flame colours. Changed, fire-coloured pixels (flicker) always
+    run the model; plain motion runs it every ``motion_every`` frames; a
+    static scene only every ``force_every`` frames, so a flame the
+    prefilter misses is still found within K frames.
+    """
+
+    def __init__(
+        self, force_every=FORCE_EVERY, motion_every=MOTION_EVERY, width=PREFILTER_WIDTH
+    ):
+        self.force_every = force_every
+        self.motion_every = motion_every
+        self.width = width
+        self.mask = None  # Changed, fire-coloured pixels of the last frame
+        self.last_reason = None  # Why the model ran on the last frame, or None
+        self.frames = 0
+        self.inferred = 0
+        self._previous = None
+        self._skipped = None  # Frames skipped since the model last ran
+
+    def _shrink(self, frame):
+        height = max(1, int(frame.shape[0] * self.width / frame.shape[1]))
+        return cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+
+    def should_infer(self, frame):
+        """
+        Returns:
+            bool: True if the model should run on ``frame``
+        """
+        small = self._shrink(frame)
+        grey = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        previous, self._previous = self._previous, grey
+        if previous is None or previous.shape != grey.shape:
+            changed = np.ones(grey.shape, bool)
+        else:
+            changed = cv2.absdiff(grey, previous) > MOTION_THRESHOLD
+        self.mask = changed & fire_colour_mask(small)
+        self.frames += 1
+
+        due = None if self._skipped is None else self._skipped + 1
+        if due is None:
+            reason = "first"
+        elif np.count_nonzero(self.mask) >= FIRE_FRACTION * self.mask.size:
+            reason = "fire_motion"
+        elif due >= self.force_every:
+            reason = "forced"
+        elif (
+            due >= self.motion_every
+            and np.count_nonzero(changed) >= MOTION_FRACTION * changed.size
+        ):
+            reason = "motion"
+        else:
+            reason = None
+
+        self.last_reason = reason
+        if reason is None:
+            self._skipped += 1
+            PREFILTER_FRAMES.inc(decision="skip")
+            return False
+        self._skipped = 0
+        self.inferred += 1
+        PREFILTER_FRAMES.inc(decision="infer")
+        return True
+
+    def stats(self):
+        skipped = self.frames - self.inferred
+        return {
+            "frames": self.frames,
+            "inferred": self.inferred,
+            "skipped": skipped,
+            "skip_rate": round(skipped / self.frames, 3) if self.frames else 0.0,
+        }
@@ -0,0 +1,532 @@
+"""
+Faster-than-real-time replay of recorded video and sensor logs.
+
+Runs recordings through the detection pipeline's stages on a virtual
+clock: smoke checks feed the same trend detectors, verification races the
+camera (prefilter, optional tiling and the model) against the temperature
+checks, and the first to confirm fire raises the alarm. Nothing sleeps and
+the camera only decodes the frames the live loop would have looked at, so
+a recording replays as fast as the CPU allows. Camera frames are paced by
+the live loop's LatencyScheduler, fed with this machine's inference times.
+
+A recording is a video file and/or a sensor log sharing a file stem (e.g.
+``kitchen.mp4`` and ``kitchen.csv``). Sensor logs are CSV with columns
+``t``, ``smoke``, ``temperature`` and optionally ``node``, or JSONL with the
+same keys; ``t`` is seconds since the recording started. A video without a
+sensor log is verified from its first frame.
+
+Usage:
+    python replay.py recordings/ --workers 4 --output replay_report.json
+    python replay.py kitchen.mp4 kitchen.csv --smoke-threshold 2400
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import cv2
+import numpy as np
+
+from inference_backends import IMAGE_SIZE, class_ids, filter_detections, load_backend
+from latency_scheduler import INPUT_SIZES, LATENCY_BUDGET, LatencyScheduler
+from pipeline import (
+    CLEARED_PAUSE,
+    DETECTION_CONFIDENCE,
+    FIRE_CHECK_DURATION,
+    FIRE_CLASSES,
+    SMOKE_THRESHOLD,
+    TEMP_CHECK_ATTEMPTS,
+    TEMP_CHECK_INTERVAL,
+    TEMP_THRESHOLD,
+    SmokeStage,
+    temperature_confirms,
+)
+from prefilter import FramePrefilter
+from tiling import TiledDetector
+
+# Replay Configuration Parameters
+# Thresholds and stage timings come from pipeline.py, shared with app.py
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov")
+SENSOR_EXTENSIONS = (".csv", ".jsonl")
+SEEK_FRAMES = 60  # Forward jumps longer than this seek instead of grabbing
+
+
+def load_sensor_log(path):
+    """
+    Load a sensor log (CSV or JSONL) recorded from one or more nodes.
+
+    Returns:
+        dict: node_id -> sensor -> (times, values) arrays sorted by time
+    """
+    with open(path, newline="") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    samples = {}
+    for row in rows:
+        node_id = row.get("node") or "default"
+        for sensor in ("smoke", "temperature"):
+            if row.get(sensor) not in (None, ""):
+                samples.setdefault(node_id, {}).setdefault(sensor, []).append(
+                    (float(row["t"]), float(row[sensor]))
+                )
+    log = {}
+    for node_id, sensors in samples.items():
+        log[node_id] = {}
+        for sensor, points in sensors.items():
+            points.sort()
+            times, values = zip(*points)
+            log[node_id][sensor] = (np.array(times), np.array(values))
+    return log
+
+
+class SensorReplay:
+    """Answers sensor polls at virtual times from a recorded log."""
+
+    def __init__(self, log):
+        self.log = log
+        ends = [times[-1] for sensors in log.values() for times, _ in sensors.values()]
+        self.duration = max(ends) if ends else 0.0
+
+    def read(self, sensor, t):
+        """
+        The reading each node would have returned at ``t``: its latest
+        sample at or before ``t``. Nodes without one yet are offline.
+
+        Returns:
+            dict: node_id -> value
+        """
+        readings = {}
+        for node_id, sensors in self.log.items():
+            if sensor not in sensors:
+                continue
+            times, values = sensors[sensor]
+            index = np.searchsorted(times, t, side="right") - 1
+            if index >= 0:
+                readings[node_id] = float(values[index])
+        return readings
+
+    def first_crossing(self, sensor, threshold):
+        """Earliest raw sample above ``threshold``, for comparison."""
+        crossings = [
+            float(times[np.argmax(values > threshold)])
+            for sensors in self.log.values()
+            if sensor in sensors
+            for times, values in [sensors[sensor]]
+            if (values > threshold).any()
+        ]
+        return min(crossings) if crossings else None
+
+
+class VideoReplay:
+    """Frames of a recorded video addressed by virtual time."""
+
+    def __init__(self, path):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Cannot open video {path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        count = self.cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        self.duration = count / self.fps if count > 0 else 0.0
+        self.decoded = 0
+        self._index = -1  # Index of the frame last grabbed
+
+    def frame_at(self, t):
+        """
+        Returns:
+            numpy.ndarray: The frame showing at ``t``, or None past the end
+        """
+        target = int(t * self.fps)
+        if target < self._index or target - self._index > SEEK_FRAMES:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            self._index = target - 1
+        while self._index < target:
+            if not self.cap.grab():
+                return None
+            self._index += 1
+        ok, frame = self.cap.retrieve()
+        if not ok:
+            return None
+        self.decoded += 1
+        return frame
+
+    def release(self):
+        self.cap.release()
+
+
+class ReplaySession:
+    """
+    One recording through the pipeline on a virtual clock.
+
+    Follows ``monitoring_pipeline`` in app.py with the same SmokeStage:
+    smoke monitoring until a trend detector escalates, then camera and
+    temperature verification in parallel, where the earlier confirmation in
+    virtual time wins. A false
+    alarm returns to smoke monitoring after ``CLEARED_PAUSE``; the first
+    confirmed fire ends the replay, as the live alarm latches until stopped.
+    """
+
+    def __init__(
+        self,
+        video=None,
+        sensors=None,
+        model=None,
+        smoke_threshold=SMOKE_THRESHOLD,
+        temp_threshold=TEMP_THRESHOLD,
+        conf=DETECTION_CONFIDENCE,
+        prefilter=True,
+        tiled=False,
+        latency_budget=LATENCY_BUDGET,
+    ):
+        self.video = video  # VideoReplay or None
+        self.sensors = sensors  # SensorReplay or None
+        self.model = model
+        self.smoke_threshold = smoke_threshold
+        self.temp_threshold = temp_threshold
+        self.conf = conf
+        self.use_prefilter = prefilter
+        self.tiled = tiled
+        self.fire_ids = (
+            class_ids(model.names, FIRE_CLASSES) if model else np.empty(0, int)
+        )
+        # Like app.py: only the PyTorch model takes a new input size per call
+        self.scheduler = LatencyScheduler(
+            latency_budget,
+            input_sizes=(
+                INPUT_SIZES
+                if model is not None and model.name == "pytorch" and not tiled
+                else (IMAGE_SIZE,)
+            ),
+        )
+        self.smoke_stage = SmokeStage()
+        self.incidents = []
+        self.inferences = 0
+        self.inference_seconds = 0.0
+        self.frames_skipped = 0
+
+    @property
+    def duration(self):
+        return max(
+            self.sensors.duration if self.sensors else 0.0,
+            self.video.duration if self.video else 0.0,
+        )
+
+    def run(self):
+        """
+        Returns:
+            dict: The alarm (or None) and every incident on the way
+        """
+        t = 0.0
+        while t <= self.duration:
+            if self.sensors is None:
+                escalation = (0.0, None, None, "no_sensor_log")
+            else:
+                escalation = self._smoke_stage(t)
+            if escalation is None:
+                break
+            escalated_at, smoke, node_id, trigger = escalation
+
+            outcome, decided_at, confirmed_by = self._verify(escalated_at)
+            self.incidents.append(
+                {
+                    "escalated_at": round(escalated_at, 3),
+                    "smoke_level": smoke,
+                    "node": node_id,
+                    "trigger": trigger,
+                    "outcome": outcome,
+                    "confirmed_by": confirmed_by,
+                    "decided_at": round(decided_at, 3),
+                    "time_to_decision": round(decided_at - escalated_at, 3),
+                }
+            )
+            self.smoke_stage.rearm(outcome)
+            if outcome == "fire" or self.sensors is None:
+                break
+            t = decided_at + CLEARED_PAUSE
+
+        alarms = [i for i in self.incidents if i["outcome"] == "fire"]
+        return {"alarm": alarms[0] if alarms else None, "incidents": self.incidents}
+
+    def _smoke_stage(self, t):
+        """
+        Poll smoke from ``t`` until a node escalates.
+
+        Returns:
+            tuple: (time, smoke level, node_id, trigger), or None if the
+            recording ends first
+        """
+        while t <= self.sensors.duration:
+            readings = self.sensors.read("smoke", t)
+            escalation = self.smoke_stage.update(readings, t, self.smoke_threshold)
+            if escalation is not None:
+                node_id, trigger = escalation
+                return t, max(readings.values()), node_id, trigger
+            t += self.smoke_stage.interval()
+        return None
+
+    def _verify(self, t0):
+        """
+        Race the camera against the temperature checks from ``t0``.
+
+        Returns:
+            tuple: (outcome, decision time, confirming check or None)
+        """
+        temperature_end = t0 + TEMP_CHECK_ATTEMPTS * TEMP_CHECK_INTERVAL
+        temperature_at = self._temperature_check(t0)
+        # The camera only has to look until the temperature would have won
+        camera_until = t0 + FIRE_CHECK_DURATION
+        if temperature_at is not None:
+            camera_until = min(camera_until, temperature_at)
+        camera_at, camera_end = self._camera_check(t0, camera_until)
+
+        confirmations = [
+            (at, name)
+            for at, name in ((camera_at, "camera"), (temperature_at, "temperature"))
+            if at is not None
+        ]
+        if confirmations:
+            at, name = min(confirmations)
+            return "fire", at, name
+        return "cleared", max(camera_end, temperature_end), None
+
+    def _temperature_check(self, t0):
+        if self.sensors is None:
+            return None
+        for attempt in range(TEMP_CHECK_ATTEMPTS):
+            t = t0 + attempt * TEMP_CHECK_INTERVAL
+            readings = self.sensors.read("temperature", t)
+            temperature = max(readings.values()) if readings else None
+            if temperature_confirms(temperature, self.temp_threshold):
+                return t
+        return None
+
+    def _camera_check(self, t0, until):
+        """
+        Returns:
+            tuple: (virtual time of the first frame showing fire or None,
+            time the check ended)
+        """
+        if self.video is None or self.model is None:
+            return None, t0  # Like an offline camera: no verdict, at once
+        prefilter = FramePrefilter() if self.use_prefilter else None
+        tiler = TiledDetector(self.fire_ids, self.conf) if self.tiled else None
+        t = t0
+        while t < until:
+            frame = self.video.frame_at(t)
+            if frame is None:
+                return None, t  # End of the video
+            elapsed = 0.0
+            if prefilter is None or prefilter.should_infer(frame):
+                fire_found, elapsed = self._detect(frame, tiler, prefilter)
+                self.scheduler.observe(0.0, elapsed)
+                if fire_found:
+                    return t + elapsed, t + elapsed
+            else:
+                self.frames_skipped += 1
+                self.scheduler.observe(0.0)
+            # The live loop waits out the rest of the scheduler's interval
+            t += max(elapsed, self.scheduler.interval)
+        return None, until
+
+    def _detect(self, frame, tiler, prefilter):
+        """
+        Returns:
+            tuple: (fire_found, inference seconds)
+        """
+        start = time.perf_counter()
+        if tiler is not None:
+            activity = prefilter.mask if prefilter is not None else None
+            result = tiler.predict(self.model, frame, activity)
+        else:
+            result = self.model.predict(
+                frame,
+                conf=self.conf,
+                verbose=False,
+                imgsz=self.scheduler.input_size,
+            )[0]
+        elapsed = time.perf_counter() - start
+        self.inferences += 1
+        self.inference_seconds += elapsed
+        fire_found = len(filter_detections(result, self.fire_ids, self.conf)[1]) > 0
+        return fire_found, elapsed
+
+
+def find_recordings(paths):
+    """
+    Group video files and sensor logs into recordings by file stem.
+
+    Returns:
+        list: (name, video path or None, sensor log path or None), sorted
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)))
+        else:
+            files.append(path)
+
+    recordings = {}
+    for path in files:
+        stem, extension = os.path.splitext(path)
+        extension = extension.lower()
+        if extension in VIDEO_EXTENSIONS:
+            recordings.setdefault(stem, [None, None])[0] = path
+        elif extension in SENSOR_EXTENSIONS:
+            recordings.setdefault(stem, [None, None])[1] = path
+    return [
+        (os.path.basename(stem), video, sensors)
+        for stem, (video, sensors) in sorted(recordings.items())
+    ]
+
+
+# Model of a replay worker process, loaded once by _init_worker
+_worker_model = None
+
+
+def _init_worker(backend, weights, threads):
+    global _worker_model
+    for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[variable] = str(threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    try:
+        _worker_model = load_backend(backend, weights)
+    except Exception as e:
+        print(f"Error loading model for replay (camera checks disabled): {e}")
+        _worker_model = None
+
+
+def replay_recording(recording, options):
+    """
+    Replay one recording in this process (with the worker's model).
+
+    Returns:
+        dict: The per-file report
+    """
+    name, video_path, sensor_path = recording
+    report = {"recording": name, "video": video_path, "sensors": sensor_path}
+    start = time.perf_counter()
+    video = None
+    try:
+        sensors = SensorReplay(load_sensor_log(sensor_path)) if sensor_path else None
+        video = VideoReplay(video_path) if video_path else None
+        session = ReplaySession(video, sensors, _worker_model, **options)
+        report.update(session.run())
+        report["duration_s"] = round(session.duration, 3)
+        if sensors is not None:
+            report["smoke_first_crossing_s"] = sensors.first_crossing(
+                "smoke", session.smoke_threshold
+            )
+        report["frames_decoded"] = video.decoded if video else 0
+        report["frames_skipped"] = session.frames_skipped
+        report["inferences"] = session.inferences
+        report["input_size"] = session.scheduler.input_size
+        if session.inferences:
+            report["inference_ms"] = round(
+                1000.0 * session.inference_seconds / session.inferences, 2
+            )
+    except Exception as e:
+        report["error"] = str(e)
+    finally:
+        if video is not None:
+            video.release()
+    wall = time.perf_counter() - start
+    report["wall_s"] = round(wall, 3)
+    if report.get("duration_s") and wall > 0:
+        report["speedup"] = round(report["duration_s"] / wall, 1)
+    return report
+
+
+def replay_all(
+    recordings, options, backend="pytorch", weights=None, workers=1, threads=1
+):
+    """
+    Replay recordings, in parallel worker processes when ``workers`` > 1.
+
+    Returns:
+        list: One report per recording, in input order
+    """
+    if workers <= 1:
+        _init_worker(backend, weights, threads)
+        return [replay_recording(recording, options) for recording in recordings]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(backend, weights, threads),
+    ) as executor:
+        return list(
+            executor.map(replay_recording, recordings, [options] * len(recordings))
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "paths", nargs="+", help="Recording files or directories of recordings"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=1, help="Model threads each")
+    parser.add_argument("--backend", default="pytorch", help="Inference backend")
+    parser.add_argument("--weights", help="Model file (default: the backend's)")
+    parser.add_argument("--smoke-threshold", type=float, default=SMOKE_THRESHOLD)
+    parser.add_argument("--temp-threshold", type=float, default=TEMP_THRESHOLD)
+    parser.add_argument("--confidence", type=float, default=DETECTION_CONFIDENCE)
+    parser.add_argument("--latency-budget", type=float, default=LATENCY_BUDGET)
+    parser.add_argument("--no-prefilter", action="store_true")
+    parser.add_argument("--tiled", action="store_true", help="Use tiled inference")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    recordings = find_recordings(args.paths)
+    if not recordings:
+        parser.error("no video files or sensor logs found")
+    options = {
+        "smoke_threshold": args.smoke_threshold,
+        "temp_threshold": args.temp_threshold,
+        "conf": args.confidence,
+        "prefilter": not args.no_prefilter,
+        "tiled": args.tiled,
+        "latency_budget": args.latency_budget,
+    }
+    workers = max(1, min(args.workers, len(recordings)))
+    start = time.perf_counter()
+    reports = replay_all(
+        recordings, options, args.backend, args.weights, workers, args.threads
+    )
+    wall = time.perf_counter() - start
+
+    for report in reports:
+        alarm = report.get("alarm")
+        if "error" in report:
+            verdict = f"error: {report['error']}"
+        elif alarm is None:
+            verdict = f"no alarm ({len(report['incidents'])} incidents cleared)"
+        else:
+            verdict = (
+                f"🔥 alarm at {alarm['decided_at']:.1f}s by {alarm['confirmed_by']} "
+                f"(trigger: {alarm['trigger']} at {alarm['escalated_at']:.1f}s)"
+            )
+        print(f"{report['recording']}: {verdict} [{report.get('speedup', '-')}x]")
+    print(
+        f"✅ Replayed {len(reports)} recordings in {wall:.1f}s with {workers} workers"
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"✅ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import math
+import threading
+
+# Sensor Filter Configuration Parameters
+SMOOTHING_TAU = 5.0  # Time constant (seconds) of the smoothed level
+BASELINE_TAU = 300.0  # Time constant (seconds) of the clean-air baseline
+SLOPE_TAU = 10.0  # Time constant (seconds) of the smoothed rate of rise
+SPIKE_DELTA = 400  # Jump from the smoothed level that needs a second reading
+RISE_RATE = 10.0  # Sustained rise (units per second) that escalates early
+RISE_MIN_DELTA = 300  # Rise above baseline needed before the rate counts
+CUSUM_DRIFT = 50  # Deviation above baseline tolerated per sample
+CUSUM_LIMIT = 800  # Accumulated excess deviation that signals a change
+
+
+def _alpha(dt, tau):
+    """Smoothing factor for an irregular sample interval ``dt``."""
+    return 1.0 - math.exp(-max(dt, 0.0) / tau)
+
+
+class SensorTrend:
+    """
+    O(1)-per-sample change detection for one sensor stream.
+
+    Keeps an exponentially smoothed level, a slowly adapting baseline, a
+    smoothed rate of rise and a one-sided CUSUM of the excess over the
+    baseline. A reading that jumps more than ``SPIKE_DELTA`` away from the
+    level is held back until the next reading confirms it, so a single ADC
+    spike never escalates while a real step costs one quick re-read.
+    """
+
+    def __init__(self):
+        self.level = None  # Smoothed reading
+        self.baseline = None  # Slow EWMA, frozen while a change is accumulating
+        self.slope = 0.0  # Smoothed rate of rise (units per second)
+        self.cusum = 0.0
+        self.last_time = None
+        self.pending = None  # Unconfirmed outlier reading
+        self.spikes = 0  # Outliers discarded because they were not confirmed
+
+    def update(self, value, t, threshold):
+        """
+        Feed one reading taken at time ``t`` (seconds).
+
+        Returns:
+            str: "suspect" while an outlier awaits confirmation, the reason
+            for escalating ("threshold", "rate_of_rise" or "cusum"), or None
+        """
+        if self.level is None:
+            self.level = self.baseline = float(value)
+            self.last_time = t
+            return "threshold" if value > threshold else None
+
+        if abs(value - self.level) > SPIKE_DELTA:
+            if self.pending is None:
+                self.pending = value
+                return "suspect"
+            if (value - self.level) * (self.pending - self.level) < 0:
+                # Opposite direction: the held reading was a spike
+                self.spikes += 1
+                self.pending = value
+                return "suspect"
+        elif self.pending is not None:
+            self.spikes += 1  # Back to normal: the held reading was a spike
+        self.pending = None
+
+        dt = t - self.last_time
+        self.last_time = t
+        previous = self.level
+        self.level += _alpha(dt, SMOOTHING_TAU) * (value - self.level)
+        if dt > 0:
+            rate = (self.level - previous) / dt
+            self.slope += _alpha(dt, SLOPE_TAU) * (rate - self.slope)
+
+        self.cusum = max(0.0, self.cusum + value - self.baseline - CUSUM_DRIFT)
+        if self.cusum == 0.0:
+            self.baseline += _alpha(dt, BASELINE_TAU) * (value - self.baseline)
+
+        if value > threshold:
+            return "threshold"
+        if self.slope > RISE_RATE and self.level - self.baseline > RISE_MIN_DELTA:
+            return "rate_of_rise"
+        if self.cusum > CUSUM_LIMIT:
+            return "cusum"
+        return None
+
+    def rearm(self, rebaseline=False):
+        """
+        Clear accumulated evidence after an escalation was handled.
+
+        Args:
+            rebaseline: Accept the current level as the new baseline, after a
+                verification found no fire. The baseline does not adapt while
+                the CUSUM accumulates, so without this a sustained harmless
+                offset would escalate again within a minute.
+        """
+        self.cusum = 0.0
+        self.slope = 0.0
+        if rebaseline and self.level is not None:
+            self.baseline = self.level
+
+    def to_dict(self):
+        return {
+            "level": None if self.level is None else round(self.level, 1),
+            "baseline": None if self.baseline is None else round(self.baseline, 1),
+            "slope": round(self.slope, 2),
+            "cusum": round(self.cusum, 1),
+            "spikes": self.spikes,
+        }
+
+
+class TrendMonitor:
+    """Per-node SensorTrend detectors for one kind of reading."""
+
+    def __init__(self):
+        self._trends = {}
+        self._lock = threading.Lock()
+
+    def update(self, readings, t, threshold):
+        """
+        Feed one sweep of readings keyed by node ID.
+
+        Returns:
+            tuple: (escalation, suspect) where escalation is
+            (node_id, reason) for the first node that escalated, or None,
+            and suspect is True if any node awaits a confirming reading
+        """
+        escalation = None
+        suspect = False
+        with self._lock:
+            for node_id, value in readings.items():
+                trend = self._trends.get(node_id)
+                if trend is None:
+                    trend = self._trends[node_id] = SensorTrend()
+                outcome = trend.update(value, t, threshold)
+                if outcome == "suspect":
+                    suspect = True
+                elif outcome is not None and escalation is None:
+                    escalation = (node_id, outcome)
+        return escalation, suspect
+
+    def rearm(self, rebaseline=False):
+        with self._lock:
+            for trend in self._trends.values():
+                trend.rearm(rebaseline)
+
+    def remove(self, node_id):
+        with self._lock:
+            self._trends.pop(node_id, None)
+
+    def to_dict(self):
+        with self._lock:
+            return {node_id: trend.to_dict() for node_id, trend in self._trends.items()}
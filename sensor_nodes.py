@@ -0,0 +1,273 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# Poller Configuration Parameters
+NODE_TIMEOUT = 2  # Per-node request timeout (seconds)
+BACKOFF_BASE = 1  # First retry delay (seconds) after a node stops answering
+BACKOFF_MAX = 60  # Upper bound (seconds) for the retry delay of a dead node
+POLL_WORKERS = 32  # Concurrent requests (and pooled keep-alive connections)
+PUSH_STALE_AFTER = 15  # Seconds without a push before a node is polled again
+NODE_ROLES = ("sensor", "alarm")  # Default roles: read sensors and sound the alarm
+
+REQUEST_SECONDS = metrics.histogram(
+    "esp32_request_seconds", "Latency of ESP32 sensor requests", ["endpoint"]
+)
+REQUEST_ERRORS = metrics.counter(
+    "esp32_request_errors_total", "ESP32 sensor requests that failed", ["endpoint"]
+)
+INGESTED_SAMPLES = metrics.counter(
+    "sensor_ingest_samples_total", "Samples pushed by sensor nodes", ["result"]
+)
+
+
+class SensorNode:
+    """
+    A single ESP32 sensor node and its most recent state.
+
+    A node that stops answering is backed off exponentially so that dead
+    hardware does not cost a request (and a timeout) on every sweep.
+
+    A node that pushes its readings (see ``accept``) is not polled while its
+    pushes keep arriving; if they stop for ``PUSH_STALE_AFTER`` seconds it
+    falls back to being polled, provided its IP is known.
+    """
+
+    def __init__(self, node_id, ip, timeout=NODE_TIMEOUT, roles=NODE_ROLES):
+        self.node_id = node_id
+        self.ip = ip  # None for push-only nodes
+        self.timeout = timeout
+        self.roles = tuple(roles)  # "sensor" is polled, "alarm" gets alarm commands
+        self.status = "offline"  # "online" once the node answers
+        self.smoke_level = None  # Last smoke reading
+        self.temperature = None  # Last temperature reading
+        self.last_seen = None  # Epoch time of the last successful reply
+        self.latency = None  # Duration (seconds) of the last successful reply
+        self.failures = 0  # Consecutive failed requests
+        self.retry_at = 0.0  # Epoch time before which the node is skipped
+        self.pushed_at = None  # Epoch time of the last push
+        self.boot_id = None  # Pushing firmware's boot, which scopes sequence numbers
+        self.last_seq = None  # Highest sequence number accepted this boot
+        self._lock = threading.Lock()
+
+    def url(self, endpoint):
+        return f"http://{self.ip}/{endpoint}"
+
+    def pushing(self, now):
+        """Whether the node is currently pushing its readings."""
+        return self.pushed_at is not None and now - self.pushed_at < PUSH_STALE_AFTER
+
+    def available(self, now):
+        """Whether the node is due to be polled (pull mode and not backing off)."""
+        return (
+            self.ip is not None
+            and "sensor" in self.roles
+            and not self.pushing(now)
+            and now >= self.retry_at
+        )
+
+    def accept(self, samples, boot_id=None):
+        """
+        Take one pushed batch, dropping samples already accepted.
+
+        Sequence numbers increase per boot; a new ``boot_id`` starts them
+        over, so a rebooted node is not mistaken for a replay.
+
+        Args:
+            samples: Dicts with an integer "seq" and optional "smoke" and
+                "temperature" readings
+
+        Returns:
+            list: The new samples, in sequence order
+        """
+        with self._lock:
+            if boot_id != self.boot_id:
+                self.boot_id = boot_id
+                self.last_seq = None
+            fresh = {}
+            for sample in samples:
+                if self.last_seq is None or sample["seq"] > self.last_seq:
+                    fresh[sample["seq"]] = sample
+            fresh = [fresh[seq] for seq in sorted(fresh)]
+            if fresh:
+                self.last_seq = fresh[-1]["seq"]
+            for sample in fresh:
+                if sample.get("smoke") is not None:
+                    self.smoke_level = sample["smoke"]
+                if sample.get("temperature") is not None:
+                    self.temperature = sample["temperature"]
+            now = time.time()
+            self.pushed_at = now
+            self.last_seen = now
+            self.status = "online"
+            self.failures = 0
+            self.retry_at = 0.0
+        INGESTED_SAMPLES.inc(len(fresh), result="accepted")
+        INGESTED_SAMPLES.inc(len(samples) - len(fresh), result="duplicate")
+        return fresh
+
+    def record_success(self, endpoint, value, latency):
+        with self._lock:
+            if endpoint == "smoke":
+                self.smoke_level = value
+            elif endpoint == "temperature":
+                self.temperature = value
+            self.status = "online"
+            self.last_seen = time.time()
+            self.latency = latency
+            self.failures = 0
+            self.retry_at = 0.0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.failures - 1))
+            self.status = "offline"
+            self.retry_at = time.time() + delay
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "node_id": self.node_id,
+                "ip": self.ip,
+                "timeout": self.timeout,
+                "roles": list(self.roles),
+                "status": self.status,
+                "smoke_level": self.smoke_level,
+                "temperature": self.temperature,
+                "last_seen": self.last_seen,
+                "latency": self.latency,
+                "failures": self.failures,
+                "retry_at": self.retry_at,
+                "mode": "push" if self.pushing(time.time()) else "pull",
+                "last_seq": self.last_seq,
+            }
+
+
+class NodeRegistry:
+    """Thread-safe registry of the sensor nodes installed on a site."""
+
+    def __init__(self):
+        self._nodes = {}
+        self._lock = threading.Lock()
+
+    def add(self, node_id, ip, timeout=NODE_TIMEOUT, roles=NODE_ROLES):
+        """
+        Register a node, replacing any node already using the same ID.
+
+        Returns:
+            SensorNode: The registered node
+        """
+        node = SensorNode(node_id, ip, timeout, roles)
+        with self._lock:
+            self._nodes[node_id] = node
+        return node
+
+    def remove(self, node_id):
+        with self._lock:
+            return self._nodes.pop(node_id, None)
+
+    def get(self, node_id):
+        with self._lock:
+            return self._nodes.get(node_id)
+
+    def nodes(self):
+        with self._lock:
+            return list(self._nodes.values())
+
+    def to_list(self):
+        return [node.to_dict() for node in self.nodes()]
+
+
+class SensorPoller:
+    """
+    Reads every registered node concurrently over pooled keep-alive
+    connections, so a sweep takes about as long as the slowest reply.
+    """
+
+    def __init__(self, registry, max_workers=POLL_WORKERS):
+        self.registry = registry
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="esp32-poll"
+        )
+
+    def read_node(self, node, endpoint):
+        """
+        Read one endpoint of one node and update the node's state.
+
+        Returns:
+            The decoded reading, or None if the node did not answer
+        """
+        start = time.perf_counter()
+        try:
+            response = self.session.get(node.url(endpoint), timeout=node.timeout)
+            if response.status_code == 200:
+                value = response.json()
+                latency = time.perf_counter() - start
+                REQUEST_SECONDS.observe(latency, endpoint=endpoint)
+                node.record_success(endpoint, value, latency)
+                return value
+        except (requests.exceptions.RequestException, ValueError):
+            pass
+        REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=endpoint)
+        REQUEST_ERRORS.inc(endpoint=endpoint)
+        node.record_failure()
+        return None
+
+    def sweep(self, endpoint):
+        """
+        Read an endpoint from every node that is not backing off.
+
+        Returns:
+            dict: Readings keyed by node ID (nodes that failed are omitted)
+        """
+        now = time.time()
+        nodes = [node for node in self.registry.nodes() if node.available(now)]
+        if not nodes:
+            return {}
+
+        futures = {
+            self.executor.submit(self.read_node, node, endpoint): node for node in nodes
+        }
+        # requests' timeout bounds each phase rather than the whole call, so
+        # cap the sweep as well; stragglers still finish and update state.
+        deadline = max(node.timeout for node in nodes) * 2
+        done, _ = wait(futures, timeout=deadline)
+
+        readings = {}
+        for future in done:
+            value = future.result()
+            if value is not None:
+                readings[futures[future].node_id] = value
+        return readings
+
+    def pushed(self, endpoint):
+        """
+        Latest readings of the nodes that push instead of being polled.
+
+        Returns:
+            dict: Readings keyed by node ID
+        """
+        now = time.time()
+        attribute = "smoke_level" if endpoint == "smoke" else endpoint
+        readings = {}
+        for node in self.registry.nodes():
+            value = getattr(node, attribute)
+            if node.pushing(now) and value is not None:
+                readings[node.node_id] = value
+        return readings
+
+    def any_online(self):
+        return any(node.status == "online" for node in self.registry.nodes())
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
@@ -0,0 +1,274 @@
+"""
+Shared state between the web workers and the monitoring engine of a site.
+
+Web handlers write *control* state (desired monitoring state, settings,
+node registrations) and queue *commands* (stop the alarm); the engine
+applies them and *publishes* what it observes (status, incidents, nodes)
+for every worker to serve. Only control writes and commands wake the
+engine, so its own publishing never makes it spin.
+
+``LocalStateBackend`` keeps everything in the process and is the default
+for a single server process. ``FileStateBackend`` shares the same data
+between processes on one host through a directory, and also elects the
+one process that runs the engine.
+"""
+
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# State Backend Configuration Parameters
+POLL_INTERVAL = 0.2  # Seconds between checks of a file backend for control changes
+CONTROL_FILE = "control.json"  # Written by web workers, read by the engine
+PUBLISHED_FILE = "published.json"  # Written by the engine, read by web workers
+COMMANDS_FILE = "commands.jsonl"  # Queued commands, one JSON object per line
+LOCK_FILE = "state.lock"  # Serialises read-modify-write cycles
+ENGINE_LOCK_FILE = "engine.lock"  # Held by the process running the engine
+
+
+class LocalStateBackend:
+    """In-process state shared by the web handlers and the engine."""
+
+    def __init__(self):
+        self._control = {}
+        self._published = {}
+        self._commands = []
+        self._version = 0
+        self._cond = threading.Condition()
+
+    def _changed(self):
+        self._version += 1
+        self._cond.notify_all()
+
+    def get(self, key, default=None):
+        with self._cond:
+            return self._control.get(key, default)
+
+    def set(self, key, value):
+        with self._cond:
+            self._control[key] = value
+            self._changed()
+
+    def update(self, key, values):
+        """Merge ``values`` into the control dict stored under ``key``."""
+        with self._cond:
+            self._control[key] = dict(self._control.get(key) or {}, **values)
+            self._changed()
+
+    def push_command(self, name, **args):
+        with self._cond:
+            self._commands.append(dict(args, command=name))
+            self._changed()
+
+    def pop_commands(self):
+        with self._cond:
+            commands, self._commands = self._commands, []
+            return commands
+
+    def published(self, key, default=None):
+        with self._cond:
+            return self._published.get(key, default)
+
+    def publish(self, key, value):
+        with self._cond:
+            self._published[key] = value
+
+    def update_published(self, key, values):
+        with self._cond:
+            self._published[key] = dict(self._published.get(key) or {}, **values)
+
+    def version(self):
+        """Opaque token that changes with every control write or command."""
+        with self._cond:
+            return self._version
+
+    def wait(self, version, timeout):
+        """
+        Block until the control state moves past ``version`` or ``timeout``
+        passes.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != version, timeout)
+
+    def acquire_engine_lock(self):
+        """A single process is always the engine."""
+        return True
+
+    def release_engine_lock(self):
+        pass
+
+
+class FileStateBackend:
+    """
+    State shared by the server processes of one host through a directory.
+
+    Files are replaced atomically, so readers never take a lock; writers
+    serialise their read-modify-write cycles with ``flock``. The engine lock
+    is an exclusive ``flock`` held for the engine process's lifetime, which
+    the kernel releases if that process dies so a standby can take over.
+    """
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._control_path = os.path.join(directory, CONTROL_FILE)
+        self._published_path = os.path.join(directory, PUBLISHED_FILE)
+        self._commands_path = os.path.join(directory, COMMANDS_FILE)
+        self._lock_path = os.path.join(directory, LOCK_FILE)
+        self._cache = {}  # Path -> (file identity, parsed contents)
+        self._engine_lock = None  # Open file holding the engine lock
+
+    @contextmanager
+    def _locked(self):
+        with open(self._lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _identity(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        # Every write replaces the file, so the inode changes with it
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _read(self, path):
+        identity = self._identity(path)
+        if identity is None:
+            return {}
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading shared state {path}: {e}")
+            return cached[1] if cached is not None else {}
+        self._cache[path] = (identity, data)
+        return data
+
+    def _write(self, path, data):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+
+    def _modify(self, path, key, value=None, merge=None):
+        with self._locked():
+            data = dict(self._read(path))
+            if merge is not None:
+                data[key] = dict(data.get(key) or {}, **merge)
+            else:
+                data[key] = value
+            self._write(path, data)
+
+    def get(self, key, default=None):
+        return self._read(self._control_path).get(key, default)
+
+    def set(self, key, value):
+        self._modify(self._control_path, key, value)
+
+    def update(self, key, values):
+        """Merge ``values`` into the control dict stored under ``key``."""
+        self._modify(self._control_path, key, merge=values)
+
+    def push_command(self, name, **args):
+        with self._locked():
+            with open(self._commands_path, "a") as f:
+                f.write(json.dumps(dict(args, command=name)) + "\n")
+
+    def pop_commands(self):
+        with self._locked():
+            try:
+                with open(self._commands_path, "r+") as f:
+                    lines = f.readlines()
+                    f.truncate(0)
+            except FileNotFoundError:
+                return []
+        commands = []
+        for line in lines:
+            try:
+                commands.append(json.loads(line))
+            except ValueError:
+                continue
+        return commands
+
+    def published(self, key, default=None):
+        return self._read(self._published_path).get(key, default)
+
+    def publish(self, key, value):
+        self._modify(self._published_path, key, value)
+
+    def update_published(self, key, values):
+        self._modify(self._published_path, key, merge=values)
+
+    def version(self):
+        """Opaque token that changes with every control write or command."""
+        try:
+            commands = os.stat(self._commands_path).st_size
+        except FileNotFoundError:
+            commands = 0
+        return (self._identity(self._control_path), commands)
+
+    def wait(self, version, timeout):
+        """
+        Block until the control state moves past ``version`` or ``timeout``
+        passes.
+        """
+        deadline = time.monotonic() + timeout
+        while self.version() == version:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(POLL_INTERVAL, remaining))
+
+    def acquire_engine_lock(self):
+        """
+        Returns:
+            bool: True if this process now runs the site's engine
+        """
+        if self._engine_lock is not None:
+            return True
+        lock = open(os.path.join(self.directory, ENGINE_LOCK_FILE), "a+")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            return False
+        lock.truncate(0)
+        lock.write(f"{os.getpid()}\n")
+        lock.flush()
+        self._engine_lock = lock
+        return True
+
+    def release_engine_lock(self):
+        if self._engine_lock is not None:
+            fcntl.flock(self._engine_lock, fcntl.LOCK_UN)
+            self._engine_lock.close()
+            self._engine_lock = None
+
+
+def create_backend(url="local"):
+    """
+    Create the state backend named by ``url``.
+
+    Args:
+        url: "local" for a single server process, or "file://<directory>"
+            for several processes on one host
+
+    Returns:
+        LocalStateBackend or FileStateBackend
+    """
+    if url in (None, "", "local"):
+        return LocalStateBackend()
+    if url.startswith("file://"):
+        return FileStateBackend(url[len("file://") :])
+    raise ValueError(f"Unknown state backend '{url}' (use 'local' or 'file://<dir>')")
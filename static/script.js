@@ -17,6 +17,8 @@ const statusText = document.getElementById('statusText');
 const videoFeed = document.getElementById('videoFeed');
 const videoOverlay = document.getElementById('videoOverlay');
 const cameraStatus = document.getElementById('cameraStatus');
+let currentFrameUrl = null;
+let pendingFrameSeq = null;
 
 const smokeLevel = document.getElementById('smokeLevel');
 const temperature = document.getElementById('temperature');
@@ -28,6 +30,9 @@ const alertDetails = document.getElementById('alertDetails');
 
 const logContainer = document.getElementById('logContainer');
 
+// Full system status; the server sends a snapshot on connect, then only changed fields
+const systemState = {};
+
 // Chart setup
 let sensorChart;
 const chartData = {
@@ -223,8 +228,6 @@ function updateSensorData(data) {
         temperature.classList.remove('threshold-exceeded');
     }
 
-    // Update chart
-    updateChart(data);
 }
 
 function updateChart(data) {
@@ -245,6 +248,25 @@ function updateChart(data) {
     sensorChart.update('none');
 }
 
+// Seed the chart with downsampled history so a fresh dashboard shows the trend
+async function loadHistory() {
+    const buckets = 20;
+    const end = Date.now() / 1000;
+    const start = end - 20 * 60;
+    const response = await fetch(`/api/history?start=${start}&end=${end}&buckets=${buckets}`);
+    const history = await response.json();
+
+    history.t.forEach((t, i) => {
+        const smoke = history.smoke.mean[i];
+        const temp = history.temperature.mean[i];
+        if (smoke === null && temp === null) return;
+        chartData.labels.push(new Date(t * 1000).toLocaleTimeString());
+        chartData.datasets[0].data.push(smoke);
+        chartData.datasets[1].data.push(temp);
+    });
+    sensorChart.update('none');
+}
+
 function updatePipelineStatus(stage, description) {
     // Update current stage description
     const currentStageDescription = document.getElementById('currentStageDescription');
@@ -273,6 +295,15 @@ function updatePipelineStatus(stage, description) {
         case 'temp_fallback':
             activeStageId = 'stageTemp';
             break;
+        case 'verification':
+            // Camera and temperature checks run in parallel
+            ['stageCamera', 'stageTemp'].forEach(stageId => {
+                const stageElement = document.getElementById(stageId);
+                if (stageElement) {
+                    stageElement.classList.add('active');
+                }
+            });
+            return;
         case 'fire_confirmed':
             // Show all stages as active for fire confirmed
             stages.forEach(stageId => {
@@ -309,7 +340,14 @@ function updateAlertStatus(fireDetected, message) {
 
 function updateVideoFeed(frameData) {
     if (frameData && frameData.frame) {
-        videoFeed.src = 'data:image/jpeg;base64,' + frameData.frame;
+        // Frames arrive as binary JPEG; show them through a blob URL
+        const url = URL.createObjectURL(new Blob([frameData.frame], { type: 'image/jpeg' }));
+        pendingFrameSeq = frameData.seq;
+        videoFeed.src = url;
+        if (currentFrameUrl) {
+            URL.revokeObjectURL(currentFrameUrl);
+        }
+        currentFrameUrl = url;
         videoOverlay.style.display = 'none';
 
         if (frameData.fire_detected) {
@@ -320,8 +358,24 @@ function updateVideoFeed(frameData) {
     }
 }
 
+// Acknowledge each frame once it is displayed so the server only sends
+// the next one when this dashboard is ready for it
+function acknowledgeFrame() {
+    if (pendingFrameSeq !== null) {
+        socket.emit('frame_ack', { seq: pendingFrameSeq });
+        pendingFrameSeq = null;
+    }
+}
+
+videoFeed.addEventListener('load', acknowledgeFrame);
+videoFeed.addEventListener('error', acknowledgeFrame);
+
 function hideVideoFeed() {
-    videoFeed.src = '';
+    if (currentFrameUrl) {
+        URL.revokeObjectURL(currentFrameUrl);
+        currentFrameUrl = null;
+    }
+    videoFeed.removeAttribute('src');
     videoOverlay.style.display = 'flex';
     videoFeed.style.border = 'none';
 }
@@ -350,6 +404,14 @@ function addLogEntry(message, type = 'info') {
 // Socket.IO event handlers
 socket.on('connect', () => {
     addLogEntry('Connected to server', 'success');
+    if (!document.hidden) {
+        socket.emit('video_subscribe');
+    }
+});
+
+// Hidden tabs do not need video frames
+document.addEventListener('visibilitychange', () => {
+    socket.emit(document.hidden ? 'video_unsubscribe' : 'video_subscribe');
 });
 
 socket.on('disconnect', () => {
@@ -357,10 +419,16 @@ socket.on('disconnect', () => {
     updateSystemStatus('offline', 'Connection Lost');
 });
 
-socket.on('status_update', (data) => {
-    updateSensorData(data);
+socket.on('status_update', (delta) => {
+    Object.assign(systemState, delta);
+    updateSensorData(systemState);
 
-    if (data.fire_detected) {
+    // Only plot new sensor readings, not stage or status changes
+    if ('smoke_level' in delta || 'temperature' in delta) {
+        updateChart(systemState);
+    }
+
+    if (delta.fire_detected) {
         updateAlertStatus(true, 'Fire detected by sensors and camera!');
         addLogEntry('🚨 FIRE DETECTED! Alarm triggered!', 'error');
     }
@@ -390,32 +458,19 @@ socket.on('log_message', (data) => {
     addLogEntry(data.message, data.type);
 });
 
+socket.on('log_batch', (data) => {
+    data.entries.forEach(entry => addLogEntry(entry.message, entry.type));
+});
+
 // Initialize the application
 document.addEventListener('DOMContentLoaded', () => {
     initChart();
     addLogEntry('Fire Detection System initialized', 'success');
 
-    // Load initial status
-    fetch('/api/status')
-        .then(response => response.json())
-        .then(data => {
-            updateSensorData(data);
-        })
-        .catch(error => {
-            addLogEntry('Failed to load initial status: ' + error.message, 'error');
-        });
-});
+    loadHistory().catch(error => {
+        console.error('History load failed:', error);
+    });
 
-// Auto-refresh status every 30 seconds
-setInterval(() => {
-    if (!startBtn.disabled) return; // Only refresh when monitoring is active
-
-    fetch('/api/status')
-        .then(response => response.json())
-        .then(data => {
-            updateSensorData(data);
-        })
-        .catch(error => {
-            console.error('Status refresh failed:', error);
-        });
-}, 30000);
+    // No status polling: the server pushes a full snapshot on every
+    // (re)connect and only changed fields after that
+});
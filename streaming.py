@@ -0,0 +1,291 @@
+import threading
+import time
+
+import cv2
+
+import metrics
+
+# Streaming Configuration Parameters
+# Adaptive ladder of (JPEG quality, maximum width); clients start at level 0
+QUALITY_LEVELS = [(85, None), (70, 960), (60, 640), (50, 480), (40, 320)]
+ACK_TIMEOUT = 2.0  # Seconds before an unacknowledged socket frame is written off
+TARGET_RTT = 0.25  # Frame round trip (seconds) above which a client steps down
+UPGRADE_AFTER = 30  # Consecutive on-time frames before a client steps back up
+MJPEG_BOUNDARY = "frame"
+
+ENCODE_SECONDS = metrics.histogram(
+    "jpeg_encode_seconds", "Time to resize and JPEG-encode one frame", ["level"]
+)
+FRAMES_PUBLISHED = metrics.counter(
+    "stream_frames_published_total", "Processed frames handed to the stream"
+)
+FRAMES_SENT = metrics.counter(
+    "stream_frames_sent_total", "Frames delivered to viewers", ["transport"]
+)
+FRAMES_DROPPED = metrics.counter(
+    "stream_frames_dropped_total",
+    "Frames skipped because a viewer was still busy",
+    ["transport"],
+)
+
+
+def encode_jpeg(frame, quality, max_width):
+    """
+    Resize a frame to at most ``max_width`` and JPEG-encode it.
+
+    Returns:
+        bytes: The JPEG data
+    """
+    if max_width is not None and frame.shape[1] > max_width:
+        height = int(frame.shape[0] * max_width / frame.shape[1])
+        frame = cv2.resize(frame, (max_width, height), interpolation=cv2.INTER_AREA)
+    _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
+
+
+class StreamClient:
+    """Delivery and quality state of one dashboard viewing the stream."""
+
+    def __init__(self, client_id, level=None):
+        self.client_id = client_id
+        self.adaptive = level is None  # A fixed level disables adaptation
+        self.level = 0 if level is None else max(0, min(level, len(QUALITY_LEVELS) - 1))
+        self.last_seq = 0  # Sequence number of the last frame delivered
+        self.sent_at = None  # Monotonic send time of the frame awaiting an ack
+        self.on_time = 0  # Consecutive frames delivered within TARGET_RTT
+        self.sent = 0
+        self.dropped = 0  # Frames skipped because the client was still busy
+
+    def step_down(self):
+        if self.adaptive and self.level < len(QUALITY_LEVELS) - 1:
+            self.level += 1
+        self.on_time = 0
+
+    def frame_on_time(self):
+        self.on_time += 1
+        if self.adaptive and self.on_time >= UPGRADE_AFTER and self.level > 0:
+            self.level -= 1
+            self.on_time = 0
+
+    def to_dict(self):
+        quality, max_width = QUALITY_LEVELS[self.level]
+        return {
+            "client_id": self.client_id,
+            "quality": quality,
+            "max_width": max_width,
+            "sent": self.sent,
+            "dropped": self.dropped,
+        }
+
+
+class FrameBroadcaster:
+    """
+    Shares processed frames with every dashboard.
+
+    Detection only hands over the newest frame; encoding happens on the
+    streaming side, once per quality level, and the bytes are shared by all
+    clients on that level. Socket clients get binary payloads with
+    ack-based flow control and MJPEG clients pull at their own pace, so a
+    slow browser skips frames instead of slowing anything else down.
+
+    Resizing and encoding are native calls that never yield; under eventlet
+    or gevent pass a ``blocking_call`` (e.g. app.run_native) that runs them
+    on a real OS thread, as for CaptureService.
+    """
+
+    def __init__(self, blocking_call=None, on_encoded=None):
+        self._call = blocking_call or (lambda function, *args: function(*args))
+        self.on_encoded = on_encoded  # Called with (camera ID, seconds) per encode
+        self._cond = threading.Condition()
+        self._frame = None
+        self._meta = {}
+        self._seq = 0
+        self._cache = {}  # level -> (seq, jpeg bytes)
+        self._encode_locks = [threading.Lock() for _ in QUALITY_LEVELS]
+        self._socket_clients = {}
+        self._mjpeg_clients = 0
+        self._socketio = None
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self.encodes = 0
+
+    def publish(self, frame, fire_detected=False, camera_id=None):
+        """
+        Make ``frame`` the newest frame. Never blocks on clients.
+
+        The broadcaster keeps a reference, so the caller must not modify the
+        frame afterwards.
+        """
+        with self._cond:
+            self._frame = frame
+            self._meta = {"fire_detected": fire_detected, "camera": camera_id}
+            self._seq += 1
+            self._cond.notify_all()
+        FRAMES_PUBLISHED.inc()
+        self._wake.set()
+
+    def clear(self):
+        with self._cond:
+            self._frame = None
+
+    def has_viewers(self):
+        return bool(self._socket_clients) or self._mjpeg_clients > 0
+
+    def wait_for_frame(self, after_seq, timeout=None):
+        """
+        Returns:
+            int: Newest sequence number, or None if nothing newer arrived in time
+        """
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._seq > after_seq and self._frame is not None, timeout
+            )
+            if self._seq <= after_seq or self._frame is None:
+                return None
+            return self._seq
+
+    def encoded(self, level):
+        """
+        Get the newest frame encoded at a quality level, encoding it at most
+        once per level.
+
+        Returns:
+            tuple: (seq, jpeg bytes, metadata), or (0, None, {}) without a frame
+        """
+        with self._cond:
+            seq, frame, meta = self._seq, self._frame, self._meta
+        if frame is None:
+            return 0, None, {}
+
+        with self._encode_locks[level]:
+            cached = self._cache.get(level)
+            if cached is not None and cached[0] == seq:
+                return seq, cached[1], meta
+            data = self._encode(frame, level, meta.get("camera"))
+            self._cache[level] = (seq, data)
+        return seq, data, meta
+
+    def _encode(self, frame, level, camera_id=None):
+        start = time.perf_counter()
+        data = self._call(encode_jpeg, frame, *QUALITY_LEVELS[level])
+        self.encodes += 1
+        seconds = time.perf_counter() - start
+        ENCODE_SECONDS.observe(seconds, level=level)
+        if self.on_encoded is not None:
+            self.on_encoded(camera_id, seconds)
+        return data
+
+    # MJPEG (multipart/x-mixed-replace) streaming
+
+    def mjpeg(self, level=None):
+        """Generator of multipart JPEG parts for one HTTP client."""
+        client = StreamClient("mjpeg", level)
+        with self._cond:
+            self._mjpeg_clients += 1
+        try:
+            while True:
+                seq = self.wait_for_frame(client.last_seq, timeout=5)
+                if seq is None:
+                    continue
+                if client.last_seq and seq > client.last_seq + 1:
+                    # The client could not keep up with the frame rate
+                    client.dropped += seq - client.last_seq - 1
+                    FRAMES_DROPPED.inc(seq - client.last_seq - 1, transport="mjpeg")
+                    client.step_down()
+                else:
+                    client.frame_on_time()
+
+                seq, data, _ = self.encoded(client.level)
+                if data is None:
+                    continue
+                client.last_seq = seq
+                client.sent += 1
+                FRAMES_SENT.inc(transport="mjpeg")
+                yield (
+                    f"--{MJPEG_BOUNDARY}\r\n"
+                    "Content-Type: image/jpeg\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n"
+                ).encode() + data + b"\r\n"
+        finally:
+            with self._cond:
+                self._mjpeg_clients -= 1
+
+    # Binary Socket.IO streaming
+
+    def attach_socketio(self, socketio):
+        self._socketio = socketio
+
+    def add_socket_client(self, client_id, level=None):
+        self._socket_clients[client_id] = StreamClient(client_id, level)
+        self._wake.set()
+
+    def remove_socket_client(self, client_id):
+        self._socket_clients.pop(client_id, None)
+
+    def ack(self, client_id, seq):
+        """Record that a socket client has displayed frame ``seq``."""
+        client = self._socket_clients.get(client_id)
+        if client is None or client.sent_at is None or seq != client.last_seq:
+            return
+        rtt = time.monotonic() - client.sent_at
+        client.sent_at = None
+        if rtt > TARGET_RTT:
+            client.step_down()
+        else:
+            client.frame_on_time()
+        self._wake.set()
+
+    def clients(self):
+        return [client.to_dict() for client in list(self._socket_clients.values())]
+
+    def viewer_count(self, transport):
+        if transport == "mjpeg":
+            return self._mjpeg_clients
+        return len(self._socket_clients)
+
+    def start(self):
+        if self._running or self._socketio is None:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run_socket, name="frame-sender", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+    def _run_socket(self):
+        while self._running:
+            self._wake.wait(timeout=ACK_TIMEOUT)
+            self._wake.clear()
+
+            seq = self._seq
+            now = time.monotonic()
+            for client in list(self._socket_clients.values()):
+                if client.last_seq >= seq:
+                    continue
+                if client.sent_at is not None:
+                    if now - client.sent_at < ACK_TIMEOUT:
+                        continue  # Still busy with the previous frame
+                    client.step_down()  # The ack never came
+                    client.sent_at = None
+
+                frame_seq, data, meta = self.encoded(client.level)
+                if data is None:
+                    continue
+                if client.last_seq:
+                    skipped = max(0, frame_seq - client.last_seq - 1)
+                    client.dropped += skipped
+                    FRAMES_DROPPED.inc(skipped, transport="socket")
+                client.last_seq = frame_seq
+                client.sent_at = time.monotonic()
+                client.sent += 1
+                FRAMES_SENT.inc(transport="socket")
+                self._socketio.emit(
+                    "video_frame",
+                    dict(meta, frame=data, seq=frame_seq),
+                    to=client.client_id,
+                )
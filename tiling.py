@@ -0,0 +1,252 @@
+import cv2
+import numpy as np
+
+import metrics
+from inference_backends import (
+    IMAGE_SIZE,
+    DetectionResult,
+    box_iou,
+    result_detections,
+)
+
+# Tiling Configuration Parameters
+TILE_SIZE = IMAGE_SIZE  # Tile edge (pixels); tiles run at native resolution
+MIN_TILING_SCALE = 1.5  # Frames narrower than this many tiles are never tiled
+FULL_SWEEP_EVERY = 5  # Run a full-frame sweep at least every N inferences
+MAX_TILES = 4  # Tiles per frame between sweeps (largest regions first)
+TRACK_MARGIN = 0.5  # Tracked boxes grow by this fraction on each side for tiling
+MIN_ACTIVITY_PIXELS = 2  # Smallest prefilter blob (downscaled pixels) worth a tile
+NMS_IOU = 0.5  # Overlap above which duplicate boxes from neighbouring tiles merge
+TRACK_IOU = 0.3  # Overlap needed to continue a track
+TRACK_MAX_MISSES = 3  # Inferences a track survives without a matching detection
+
+TILES = metrics.counter(
+    "tiled_inference_crops_total", "Crops sent to the model in tiled mode", ["kind"]
+)
+
+
+def non_max_suppression(boxes, scores, iou_threshold=NMS_IOU):
+    """
+    Greedy class-agnostic NMS.
+
+    Returns:
+        numpy.ndarray: Indices of the boxes kept, highest score first
+    """
+    order = np.argsort(-scores)
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        if not rest.size:
+            break
+        overlaps = box_iou(boxes[best : best + 1], boxes[rest])[0]
+        order = rest[overlaps < iou_threshold]
+    return np.array(keep, dtype=int)
+
+
+class Track:
+    """A fire box followed across frames."""
+
+    def __init__(self, track_id, box, score, class_id):
+        self.track_id = track_id
+        self.box = box
+        self.score = score
+        self.class_id = class_id
+        self.hits = 1  # Inferences that matched this track
+        self.misses = 0  # Consecutive inferences without a match
+
+
+class IoUTracker:
+    """
+    Carries detections across frames by greedy IoU matching.
+
+    Only used to decide where to look next, so it keeps no motion model:
+    the expanded box from the last match is where the next tile goes.
+    """
+
+    def __init__(self, iou_threshold=TRACK_IOU, max_misses=TRACK_MAX_MISSES):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, boxes, scores, classes):
+        """
+        Match this inference's detections to the current tracks.
+
+        Returns:
+            list: The live tracks
+        """
+        matched_tracks = set()
+        matched_boxes = set()
+        if self.tracks and len(boxes):
+            track_boxes = np.array([track.box for track in self.tracks])
+            overlaps = box_iou(track_boxes, boxes)
+            for flat in np.argsort(-overlaps, axis=None):
+                t, d = np.unravel_index(flat, overlaps.shape)
+                if overlaps[t, d] < self.iou_threshold:
+                    break
+                if t in matched_tracks or d in matched_boxes:
+                    continue
+                track = self.tracks[t]
+                track.box, track.score, track.class_id = boxes[d], scores[d], classes[d]
+                track.hits += 1
+                track.misses = 0
+                matched_tracks.add(t)
+                matched_boxes.add(d)
+
+        live = []
+        for index, track in enumerate(self.tracks):
+            if index not in matched_tracks:
+                track.misses += 1
+            if track.misses <= self.max_misses:
+                live.append(track)
+        for d in range(len(boxes)):
+            if d not in matched_boxes:
+                live.append(Track(self._next_id, boxes[d], scores[d], classes[d]))
+                self._next_id += 1
+        self.tracks = live
+        return live
+
+
+class TiledDetector:
+    """
+    Runs high-resolution frames through the model as native-resolution
+    tiles, but only where something is happening.
+
+    Every ``full_every`` inferences (and whenever there is nothing to look
+    at) the whole frame is swept at model resolution. In between, tiles are
+    cut around tracked fire boxes and around the prefilter's flame-coloured
+    motion, so a small early flame is seen at full detail while the cost
+    stays at a few tiles per frame. Frames that are not much larger than a
+    tile are always run whole.
+    """
+
+    def __init__(
+        self,
+        allowed_ids,
+        conf,
+        tile_size=TILE_SIZE,
+        full_every=FULL_SWEEP_EVERY,
+        max_tiles=MAX_TILES,
+    ):
+        self.allowed_ids = allowed_ids  # Class IDs that are tracked
+        self.conf = conf
+        self.tile_size = tile_size
+        self.full_every = full_every
+        self.max_tiles = max_tiles
+        self.tracker = IoUTracker()
+        self._since_sweep = None  # Inferences since the last full-frame sweep
+
+    def _regions(self, frame, activity):
+        """Boxes (x1, y1, x2, y2) around tracked fire and prefilter activity."""
+        height, width = frame.shape[:2]
+        regions = []
+        for track in self.tracker.tracks:
+            x1, y1, x2, y2 = track.box
+            dx, dy = (x2 - x1) * TRACK_MARGIN, (y2 - y1) * TRACK_MARGIN
+            regions.append((x1 - dx, y1 - dy, x2 + dx, y2 + dy))
+
+        if activity is not None and activity.any():
+            scale_x = width / activity.shape[1]
+            scale_y = height / activity.shape[0]
+            count, _, stats, _ = cv2.connectedComponentsWithStats(
+                activity.astype(np.uint8), connectivity=8
+            )
+            blobs = sorted(stats[1:count], key=lambda s: -s[cv2.CC_STAT_AREA])
+            for x, y, w, h, area in blobs:
+                if area < MIN_ACTIVITY_PIXELS:
+                    break
+                regions.append(
+                    (x * scale_x, y * scale_y, (x + w) * scale_x, (y + h) * scale_y)
+                )
+        return regions
+
+    def _tile(self, region, width, height):
+        """Tile origin and size covering ``region``, clipped to the frame."""
+        x1, y1, x2, y2 = region
+        w = int(min(width, max(self.tile_size, x2 - x1)))
+        h = int(min(height, max(self.tile_size, y2 - y1)))
+        x0 = int(np.clip((x1 + x2 - w) / 2, 0, width - w))
+        y0 = int(np.clip((y1 + y2 - h) / 2, 0, height - h))
+        return x0, y0, w, h
+
+    def plan(self, frame, activity=None):
+        """
+        Choose what to run the model on for this frame.
+
+        Args:
+            frame: The full-resolution frame
+            activity: Optional boolean mask of flame-coloured motion at any
+                scale (e.g. ``FramePrefilter.mask``)
+
+        Returns:
+            list: (x offset, y offset, crop) tuples; one full-frame entry on
+            a sweep
+        """
+        height, width = frame.shape[:2]
+        full = [(0, 0, frame)]
+        if max(height, width) < self.tile_size * MIN_TILING_SCALE:
+            TILES.inc(kind="full")
+            return full
+
+        regions = []
+        if self._since_sweep is not None and self._since_sweep + 1 < self.full_every:
+            regions = self._regions(frame, activity)
+        if not regions:
+            self._since_sweep = 0
+            TILES.inc(kind="full")
+            return full
+
+        self._since_sweep += 1
+        tiles = []
+        for x1, y1, x2, y2 in regions:
+            region = (max(0, x1), max(0, y1), min(width, x2), min(height, y2))
+            x0, y0, w, h = self._tile(region, width, height)
+            covered = any(
+                tx <= region[0]
+                and ty <= region[1]
+                and tx + tw >= region[2]
+                and ty + th >= region[3]
+                for tx, ty, tw, th in tiles
+            )
+            if not covered:
+                tiles.append((x0, y0, w, h))
+                if len(tiles) == self.max_tiles:
+                    break
+        TILES.inc(len(tiles), kind="tile")
+        return [(x0, y0, frame[y0 : y0 + h, x0 : x0 + w]) for x0, y0, w, h in tiles]
+
+    def merge(self, tiles, results):
+        """
+        Combine the model results of one frame's tiles and update the tracker.
+
+        Returns:
+            DetectionResult: All detections in full-frame coordinates, usable
+            wherever a model result is expected
+        """
+        parts = [result_detections(result) for result in results]
+        boxes = np.concatenate(
+            [
+                b + np.array([x, y, x, y], np.float32)
+                for (x, y, _), (b, _, _) in zip(tiles, parts)
+            ]
+        )
+        scores = np.concatenate([s for _, s, _ in parts])
+        classes = np.concatenate([c for _, _, c in parts])
+        if len(tiles) > 1 and len(scores):
+            keep = non_max_suppression(boxes, scores)
+            boxes, scores, classes = boxes[keep], scores[keep], classes[keep]
+
+        fire = np.isin(classes, self.allowed_ids) & (scores >= self.conf)
+        self.tracker.update(boxes[fire], scores[fire], classes[fire])
+        return DetectionResult(boxes, scores, classes)
+
+    def predict(self, model, frame, activity=None):
+        """Plan, run and merge the tiles of one frame in a single model call."""
+        tiles = self.plan(frame, activity)
+        results = model.predict(
+            [crop for _, _, crop in tiles], conf=self.conf, verbose=False
+        )
+        return self.merge(tiles, results)